@@ -0,0 +1,103 @@
+"""
+pysud commands benchmark.
+
+Measures Game.complete_command (unique prefix completion and one edit
+typo correction) for games whose global events use 10^2 to 10^5 commands,
+comparing it against scanning every command.
+
+Usage:
+    python3 benchmarks/bench_commands.py [MAX_COMMANDS]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pysud
+import pysud_events as ev
+import pysud_output
+
+# Inputs timed for each vocabulary size (fewer for the scan, whose cost
+# grows with the vocabulary size):
+QUERIES = 2000
+SCAN_QUERIES = 20
+
+
+def random_command(rnd):
+    words = [''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randrange(3, 9)))
+             for _ in range(rnd.randrange(1, 4))]
+    return ' '.join(words)
+
+
+def mistype(command, rnd):
+    """ Answers command with its last character dropped, or two adjacent
+    characters swapped. """
+    if rnd.random() < 0.5 or len(command) < 2:
+        return command[:-1]
+    i = rnd.randrange(len(command) - 1)
+    return command[:i] + command[i + 1] + command[i] + command[i + 2:]
+
+
+def distance_at_most_one(a, b):
+    """ Answers whether b is at most one edit away from a. """
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    return (a[i + 1:] == b[i + 1:] or a[i + 1:] == b[i:] or a[i:] == b[i + 1:]
+            or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1]))
+
+
+def scan_complete_command(commands, command):
+    """ complete_command done by scanning every command. """
+    if command in commands:
+        return None
+    found = {c for c in commands if c.startswith(command) and ' ' not in c[len(command):]}
+    if not found:
+        found = {c for c in commands if distance_at_most_one(command, c)}
+    return found.pop() if len(found) == 1 else None
+
+
+def time_per_call(function, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments)
+
+
+def run(commands_amount, rnd):
+    game = pysud.Game('Player', tts_enabled=False, output=pysud_output.NullOutput(), command_completion=True)
+    commands = set()
+    while len(commands) < commands_amount:
+        commands.add(random_command(rnd))
+    for command in commands:
+        game.add_global_event(ev.ShowMessageEvent([command], ''))
+    start = time.perf_counter()
+    game.complete_command('')  # builds the vocabulary
+    build_time = time.perf_counter() - start
+    commands = list(commands)
+    queries = [mistype(rnd.choice(commands), rnd) for _ in range(QUERIES)]
+    for query in queries[:SCAN_QUERIES]:
+        assert game.complete_command(query) == scan_complete_command(commands, query)
+    trie = time_per_call(game.complete_command, queries)
+    scan = time_per_call(lambda query: scan_complete_command(commands, query), queries[:SCAN_QUERIES])
+    return build_time, trie, scan
+
+
+if __name__ == '__main__':
+    MAX_COMMANDS = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    RND = random.Random(0)
+    print('commands   build       complete (trie)    complete (scan)   speedup')
+    AMOUNT = 100
+    while AMOUNT <= MAX_COMMANDS:
+        BUILD, TRIE, SCAN = run(AMOUNT, RND)
+        print(format(AMOUNT, '<10d') + ' ' + format(BUILD * 1000, '8.2f') + ' ms  '
+              + format(TRIE * 1e6, '10.1f') + ' us      '
+              + format(SCAN * 1e6, '12.1f') + ' us  '
+              + format(SCAN / TRIE, '9.0f') + 'x')
+        AMOUNT *= 10
@@ -0,0 +1,135 @@
+"""
+pysud memory benchmark.
+
+Measures the memory taken by rooms (with their transitions), items and
+events, reporting bytes per object.
+
+Every object is measured twice: as currently built, and as built before
+entities and events declared __slots__ and items created their events
+lazily. That baseline uses copies of the pysud and pysud_events classes
+without __slots__, and items whose events are built right away. Other
+savings (interned commands, event index tuples) are kept, so baseline
+numbers are a bit lower than those of the original classes.
+
+Usage:
+    python3 benchmarks/bench_memory.py [AMOUNT]
+"""
+
+import contextlib
+import gc
+import os
+import sys
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pysud
+import pysud_events as ev
+
+
+def measure(factory, amount):
+    """ Answers the bytes taken by each object answered by factory. """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(amount)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return used / amount
+
+
+def unslotted_copies(modules):
+    """ Answers a {class: copy} python dictionary holding a copy without
+    __slots__ (instances get a regular __dict__) of every class defined
+    in some modules. Methods are shared, so copies work the same. """
+    copies = dict()
+
+    def copy(cls):
+        if cls.__module__ not in names:
+            return cls
+        if cls not in copies:
+            namespace = {key: value for key, value in vars(cls).items()
+                         if key not in ('__slots__', '__dict__', '__weakref__')
+                         and not isinstance(value, types.MemberDescriptorType)}
+            copies[cls] = type(cls)(cls.__name__, tuple(copy(base) for base in cls.__bases__), namespace)
+        return copies[cls]
+
+    names = {module.__name__ for module in modules}
+    for module in modules:
+        for value in list(vars(module).values()):
+            if isinstance(value, type):
+                copy(value)
+    return copies
+
+
+@contextlib.contextmanager
+def unslotted(modules):
+    """ Replaces the classes of some modules by copies without __slots__
+    (see unslotted_copies) while the context lasts. """
+    copies = unslotted_copies(modules)
+    replaced = []
+    for module in modules:
+        for name, value in list(vars(module).items()):
+            if isinstance(value, type) and value in copies:
+                replaced.append((module, name, value))
+                setattr(module, name, copies[value])
+    try:
+        yield
+    finally:
+        for module, name, value in replaced:
+            setattr(module, name, value)
+
+
+def make_room(i):
+    # as built by world loaders: a room and a couple of transitions
+    room = pysud.Room('Room ' + str(i), 'A plain room.', str(i))
+    room.add_transition(['north', 'n'], room)
+    room.add_transition(['south', 's'], room)
+    return room
+
+
+def make_item(i):
+    item = pysud.Item('item ' + str(i), 'A plain item.')
+    return item
+
+
+def make_eager_item(i):
+    # items used to build their look and use events along with them
+    item = make_item(i)
+    item.look_item_event()
+    item.use_item_event()
+    return item
+
+
+def make_event(i):
+    return ev.ShowMessageEvent(['read sign ' + str(i)], 'A plain message.')
+
+
+def make_item_with_events(i):
+    # an item once in play: looked at, picked up and used
+    item = pysud.Item('item ' + str(i), 'A plain item.')
+    return (item, item.look_item_event(), item.use_item_event(), ev.PickUpItemEvent(item))
+
+
+def make_combine_event(i):
+    item_a = pysud.Item('item a' + str(i), '')
+    item_b = pysud.Item('item b' + str(i), '')
+    return ev.CombineItemEvent(item_a, item_b, item_a)
+
+
+if __name__ == '__main__':
+    AMOUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('objects: ' + str(AMOUNT))
+    print(format('bytes per object', '<26s') + format('baseline', '>10s') + format('current', '>10s'))
+    for NAME, BASELINE_FACTORY, FACTORY in (
+            ('room (2 transitions)', make_room, make_room),
+            ('item', make_eager_item, make_item),
+            ('event', make_event, make_event),
+            ('item with its events', make_item_with_events, make_item_with_events),
+            ('combine event (+2 items)', make_combine_event, make_combine_event)):
+        with unslotted((pysud, ev)):
+            BASELINE = measure(BASELINE_FACTORY, AMOUNT)
+        CURRENT = measure(FACTORY, AMOUNT)
+        print(format(NAME, '<26s') + format(BASELINE, '10.0f') + format(CURRENT, '10.0f'))
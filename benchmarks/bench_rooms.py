@@ -0,0 +1,66 @@
+"""
+pysud rooms benchmark.
+
+Measures Game.add_rooms (bulk insert) and Game.get_room_by_id for worlds of
+10^3 to 10^6 rooms, comparing lookups against the linear search games used
+before rooms were indexed by id.
+
+Usage:
+    python3 benchmarks/bench_rooms.py [MAX_ROOMS]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pysud
+import pysud_output
+
+# Lookups timed for each world size (fewer for the linear search, whose
+# cost grows with the world size):
+LOOKUPS = 100000
+LINEAR_LOOKUPS = 100
+
+
+def linear_get_room_by_id(rooms, room_id):
+    """ Room lookup as done before the id index. """
+    for room in rooms:
+        if room.get_id() == room_id:
+            return room
+    return False
+
+
+def time_per_call(function, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments)
+
+
+def run(rooms_amount, rnd):
+    rooms = [pysud.Room('Room ' + str(i), '', str(i)) for i in range(rooms_amount)]
+    game = pysud.Game('Player', tts_enabled=False, output=pysud_output.NullOutput())
+    start = time.perf_counter()
+    game.add_rooms(rooms)
+    add_time = time.perf_counter() - start
+    ids = [str(rnd.randrange(rooms_amount)) for _ in range(LOOKUPS)]
+    indexed = time_per_call(game.get_room_by_id, ids)
+    linear = time_per_call(lambda room_id: linear_get_room_by_id(rooms, room_id), ids[:LINEAR_LOOKUPS])
+    return add_time, indexed, linear
+
+
+if __name__ == '__main__':
+    MAX_ROOMS = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    RND = random.Random(0)
+    print('rooms      add_rooms   lookup (indexed)   lookup (linear)   speedup')
+    AMOUNT = 1000
+    while AMOUNT <= MAX_ROOMS:
+        ADD, INDEXED, LINEAR = run(AMOUNT, RND)
+        print(format(AMOUNT, '<10d') + ' ' + format(ADD * 1000, '8.2f') + ' ms  '
+              + format(INDEXED * 1e9, '10.0f') + ' ns      '
+              + format(LINEAR * 1e9, '12.0f') + ' ns  '
+              + format(LINEAR / INDEXED, '9.0f') + 'x')
+        AMOUNT *= 10
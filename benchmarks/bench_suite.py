@@ -0,0 +1,201 @@
+"""
+pysud benchmark suite.
+
+Times the main pysud operations on a synthetic world (see worldgen):
+turn dispatch, room lookups, world loading (rooms.json, rooms.xml and the
+compiled cache), saving and loading games, and the memory taken by each
+game session. Results are written as JSON, so runs of different pysud
+versions can be compared.
+
+Usage:
+    python3 benchmarks/bench_suite.py [--rooms N] [--seed S] [--output FILE] [--compare FILE]
+
+Every measure is the best of a few repeats. With --compare, each result
+is shown along with the one stored in a previous results file.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_PATH, '..', 'src'))
+sys.path.insert(0, os.path.join(BENCHMARKS_PATH, '..', 'src', 'modules', 'json'))
+sys.path.insert(0, os.path.join(BENCHMARKS_PATH, '..', 'src', 'modules', 'xml'))
+
+import pysud
+import pysud_cache
+import pysud_gm
+import pysud_output
+import worldgen
+
+RESULTS_VERSION = 1
+REPEATS = 5
+TURNS = 5000
+LOOKUPS = 100000
+SESSIONS = 200
+SESSION_TURNS = 50
+
+
+def best_time(function, repeats=REPEATS):
+    """ Answers the shortest time (in seconds) function took to run. """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def new_game(world, spec):
+    return worldgen.make_game(world, spec, tts_enabled=False, save_enabled=False, output=pysud_output.NullOutput())
+
+
+def bench_dispatch(world, spec):
+    """ Microseconds per turn, playing a command script on a new game. """
+    script = worldgen.command_script(world, spec, TURNS, spec.seed)
+
+    def play():
+        game = new_game(world, spec)
+        for command in script:
+            game.run_turn(command)
+    return best_time(play) / TURNS * 1e6
+
+
+def bench_lookup(world, spec):
+    """ Nanoseconds per Game.get_room_by_id call. """
+    game = new_game(world, spec)
+    ids = [str(i * 7919 % spec.rooms) for i in range(LOOKUPS)]
+
+    def lookup():
+        for room_id in ids:
+            game.get_room_by_id(room_id)
+    return best_time(lookup) / LOOKUPS * 1e9
+
+
+def bench_loads(spec, directory):
+    """ Milliseconds taken to load a world from its sources and cache. """
+    json_path = os.path.join(directory, 'rooms.json')
+    xml_path = os.path.join(directory, 'rooms.xml')
+    worldgen.write_json(spec, json_path)
+    worldgen.write_xml(spec, xml_path)
+    results = dict()
+    results['load_json'] = best_time(lambda: pysud_cache.parse_source(json_path)) * 1000
+    results['load_xml'] = best_time(lambda: pysud_cache.parse_source(xml_path)) * 1000
+    compiler = pysud_cache.WorldCompiler(json_path)
+    compiler.compile()
+    results['load_cache'] = best_time(compiler.load) * 1000
+    return results
+
+
+def bench_save_load(world, spec, directory):
+    """ Milliseconds taken by GameManager.save_game and load_game_data,
+    and the save file size. """
+    game = new_game(world, spec)
+    for command in worldgen.command_script(world, spec, SESSION_TURNS, spec.seed):
+        game.run_turn(command)
+    game_mgr = pysud_gm.GameManager(game)
+    path = os.path.join(directory, 'save.data')
+    results = dict()
+    results['save'] = best_time(lambda: game_mgr.save_game(path)) * 1000
+    results['load'] = best_time(lambda: game_mgr.load_game_data(path)) * 1000
+    results['save_file_size'] = os.path.getsize(path)
+    return results
+
+
+def bench_session_memory(world, spec):
+    """ Bytes taken by each game session (its world excluded). """
+    scripts = [worldgen.command_script(world, spec, SESSION_TURNS, i) for i in range(SESSIONS)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for script in scripts:
+        game = new_game(world, spec)
+        for command in script:
+            game.run_turn(command)
+        games.append(game)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / SESSIONS
+
+
+def run(spec):
+    """ Runs the whole suite.
+
+    Returns:
+        A python dictionary holding every result, keyed by name, as a
+        {'value': number, 'unit': string} dictionary.
+    """
+    results = dict()
+
+    def add(name, value, unit):
+        results[name] = {'value': value, 'unit': unit}
+    start = time.perf_counter()
+    world = worldgen.make_world(spec)
+    add('world_build', (time.perf_counter() - start) * 1000, 'ms')
+    add('dispatch', bench_dispatch(world, spec), 'us/turn')
+    add('get_room_by_id', bench_lookup(world, spec), 'ns')
+    directory = tempfile.mkdtemp(prefix='pysud-bench-')
+    try:
+        for name, value in bench_loads(spec, directory).items():
+            add(name, value, 'ms')
+        for name, value in bench_save_load(world, spec, directory).items():
+            add(name, value, 'bytes' if name.endswith('size') else 'ms')
+    finally:
+        shutil.rmtree(directory)
+    add('session_memory', bench_session_memory(world, spec), 'bytes')
+    return results
+
+
+def report(results, baseline=None):
+    """ Answers a human readable table of some results, compared against
+    a baseline results dictionary if given. """
+    lines = []
+    for name, result in results.items():
+        line = format(name, '<16s') + format(result['value'], '14.2f') + ' ' + format(result['unit'], '<8s')
+        if baseline is not None and name in baseline and baseline[name]['value']:
+            old = baseline[name]['value']
+            line += format(old, '14.2f') + '  ' + format(result['value'] / old, '6.2f') + 'x'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Runs the pysud benchmark suite.')
+    PARSER.add_argument('--rooms', type=int, default=10000)
+    PARSER.add_argument('--transitions', type=int, default=3)
+    PARSER.add_argument('--items', type=int, default=1000)
+    PARSER.add_argument('--global-events', type=int, default=50)
+    PARSER.add_argument('--local-events', type=int, default=2)
+    PARSER.add_argument('--synonyms', type=int, default=3)
+    PARSER.add_argument('--seed', type=int, default=0)
+    PARSER.add_argument('--output', default=None, help='JSON file to write the results into')
+    PARSER.add_argument('--compare', default=None, help='JSON results file to compare against')
+    ARGS = PARSER.parse_args()
+    SPEC = worldgen.WorldSpec(ARGS.rooms, ARGS.transitions, ARGS.items, ARGS.global_events,
+                              ARGS.local_events, ARGS.synonyms, ARGS.seed)
+    RESULTS = run(SPEC)
+    BASELINE = None
+    if ARGS.compare is not None:
+        with open(ARGS.compare, 'r', encoding='utf-8') as BASELINE_FILE:
+            BASELINE = json.load(BASELINE_FILE)['results']
+    print(report(RESULTS, BASELINE))
+    if ARGS.output is not None:
+        with open(ARGS.output, 'w', encoding='utf-8') as OUTPUT_FILE:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'spec': SPEC.to_dict(),
+                'results': RESULTS}, OUTPUT_FILE, indent=2)
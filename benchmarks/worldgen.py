@@ -0,0 +1,172 @@
+"""
+pysud synthetic worlds generator.
+
+Builds worlds of any size out of a seed, so benchmarks can be repeated
+(and compared between pysud versions) on the very same world. A world
+has rooms connected in a ring plus random transitions, items placed in
+random rooms, and room local events; games built from it also get
+global events. Every command comes with a configurable amount of
+synonyms.
+
+Usage:
+    python3 benchmarks/worldgen.py ROOMS OUTPUT_FILE [SEED]
+
+Writes the world rooms (and transitions) into OUTPUT_FILE, either a
+rooms.json or a rooms.xml file depending on its extension.
+"""
+
+import json
+import os
+import random
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pysud
+import pysud_events as ev
+
+
+class WorldSpec():
+    """ Parameters of a synthetic world.
+
+    Attributes:
+        rooms: Amount of rooms.
+        transitions: Transitions per room (the first one makes the rooms
+            a ring, so every room can be reached).
+        items: Amount of items, placed in random rooms.
+        global_events: Global events every new game gets.
+        local_events: Local events per room.
+        synonyms: Commands every transition and event is triggered by.
+        seed: Random generator seed.
+    """
+
+    def __init__(self, rooms=1000, transitions=3, items=100, global_events=50, local_events=2, synonyms=3, seed=0):
+        self.rooms = rooms
+        self.transitions = transitions
+        self.items = items
+        self.global_events = global_events
+        self.local_events = local_events
+        self.synonyms = synonyms
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def commands(verb, noun, synonyms):
+    """ Answers synonyms commands for a verb and a noun: 'go 7', 'go1 7',
+    'go2 7'... """
+    return [verb + (str(i) if i else '') + ' ' + noun for i in range(synonyms)]
+
+
+def room_records(spec):
+    """ Yields a rooms.json like record for every room of a world. """
+    rnd = random.Random(spec.seed)
+    for i in range(spec.rooms):
+        destinations = [(i + 1) % spec.rooms]
+        destinations.extend(rnd.randrange(spec.rooms) for _ in range(spec.transitions - 1))
+        yield {
+            'id': str(i),
+            'name': 'Room ' + str(i),
+            'description': 'Room number ' + str(i) + ', nothing special about it.',
+            'transitions': [{'destination': str(d), 'commands': commands('go', str(d), spec.synonyms)}
+                            for d in dict.fromkeys(destinations)]}
+
+
+def make_world(spec):
+    """ Answers a pysud.World built from a spec. """
+    rooms = []
+    for record in room_records(spec):
+        rooms.append(pysud.Room(record['name'], record['description'], record['id']))
+    for room, record in zip(rooms, room_records(spec)):
+        for transition in record['transitions']:
+            room.add_transition(transition['commands'], rooms[int(transition['destination'])])
+    rnd = random.Random(spec.seed + 1)
+    for i in range(spec.items):
+        rnd.choice(rooms).add_item(pysud.Item('item ' + str(i), 'Item number ' + str(i) + '.', 1))
+    for room in rooms:
+        for i in range(spec.local_events):
+            room.add_local_event(ev.ShowMessageEvent(
+                commands('read', 'sign ' + str(i), spec.synonyms), 'Sign ' + str(i) + ' of ' + room.get_name()))
+    return pysud.World(rooms, rooms[0] if rooms else None)
+
+
+def make_game(world, spec, player_name='Player', **game_options):
+    """ Answers a new game for a world made by make_world(), adding the
+    spec global events. """
+    game = world.new_game(player_name, **game_options)
+    for i in range(spec.global_events):
+        game.add_global_event(ev.ShowMessageEvent(commands('shout', str(i), spec.synonyms), 'Shout ' + str(i)))
+    return game
+
+
+def command_script(world, spec, turns, seed=0):
+    """ Answers a list of commands walking a world made by make_world():
+    mostly transitions, plus looking around, picking up, looking at and
+    using items, local and global events and some invalid input. """
+    rnd = random.Random(seed)
+    room = world.start_room
+    taken = set()
+    inventory = []
+    script = []
+    while len(script) < turns:
+        roll = rnd.random()
+        items = [i for i in room.get_items() if i not in taken]
+        if roll < 0.5:
+            transition = rnd.choice(room.get_transitions())
+            script.append(rnd.choice(transition.commands))
+            room = transition.destination
+        elif roll < 0.6 and items:
+            item = rnd.choice(items)
+            taken.add(item)
+            inventory.append(item)
+            script.append('get ' + item.get_name())
+        elif roll < 0.7 and inventory:
+            script.append(rnd.choice(('look ', 'use ')) + rnd.choice(inventory).get_name())
+        elif roll < 0.8 and spec.local_events:
+            script.append(rnd.choice(commands('read', 'sign ' + str(rnd.randrange(spec.local_events)), spec.synonyms)))
+        elif roll < 0.9 and spec.global_events:
+            script.append(rnd.choice(commands('shout', str(rnd.randrange(spec.global_events)), spec.synonyms)))
+        elif roll < 0.95:
+            script.append('look')
+        else:
+            script.append('dance ' + str(rnd.randrange(100)))
+    return script
+
+
+def write_json(spec, path):
+    """ Writes a world rooms into a rooms.json file. """
+    with open(path, 'w', encoding='utf-8') as rooms_file:
+        rooms_file.write('[\n')
+        for i, record in enumerate(room_records(spec)):
+            rooms_file.write((',\n' if i else '') + json.dumps(record))
+        rooms_file.write('\n]\n')
+
+
+def write_xml(spec, path):
+    """ Writes a world rooms into a rooms.xml file. """
+    with open(path, 'w', encoding='utf-8') as rooms_file:
+        rooms_file.write("<?xml version='1.0' encoding='utf-8'?>\n<rooms>\n")
+        for record in room_records(spec):
+            rooms_file.write('<room name=' + quoteattr(record['name']) + ' id=' + quoteattr(record['id']) + '>\n')
+            rooms_file.write('\t<description>' + escape(record['description']) + '</description>\n\t<transitions>\n')
+            for transition in record['transitions']:
+                rooms_file.write('\t\t<transition destination=' + quoteattr(transition['destination']) + '>\n')
+                for command in transition['commands']:
+                    rooms_file.write('\t\t<command>' + escape(command) + '</command>\n')
+                rooms_file.write('\t\t</transition>\n')
+            rooms_file.write('\t</transitions>\n</room>\n')
+        rooms_file.write('</rooms>\n')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    SPEC = WorldSpec(rooms=int(sys.argv[1]), seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    if sys.argv[2].endswith('.xml'):
+        write_xml(SPEC, sys.argv[2])
+    else:
+        write_json(SPEC, sys.argv[2])
+    print(str(SPEC.rooms) + ' rooms written to ' + sys.argv[2])
@@ -67,40 +67,54 @@ class EventEndingGood(ev.CommandEvent):
             game.iom.show_message("You may be missed out something...")
 
 
-if __name__ == '__main__':
-    # 1 - initializations:
-    PLAYER_NAME = input ('Enter your character name:')
-    GAME = pysud.Game(PLAYER_NAME)
-    # 2 - rooms definitions:
-    R1 = pysud.Room('Street', 'You stand by the doorstep of your old apartment. In the street the sun is falling and you don\'t see people anywhere, everything is absolutely silent... far to the north is the won square...', "1")
-    R2 = pysud.Room('Home', 'Your humble apartment has seen better times, that is of course before you lived in it, much earlier. It is small and you have accumulated dirty clothes and garbage everywhere. So many cobwebs in the windows prevent you from seeing clearly what is happening on the street. You left the bathroom door opened, again...', "2")
-    R3 = pysud.Room('Bathroom', 'The bathroom decoration is in tune with the rest of your home: gross. Under the sink there\'s a small medicine cabinet and behind you is the main and only bedroom of your apartment...', "3")
-    R4 = pysud.Room('Park', 'The square is deserted. It has a path that crosses it through the center from north to south and in the middle of it you see a men lying down. To the south is the street that leads to your home, and in the other direction the only food stand in the park.', "4")
-    R5 = pysud.Room('Foodstand', 'At the food stand the tables have been thrown to the floor as if serious disturbances had taken place, there are some blood stains on the floor, and especially near the door that leads where the food is prepared. It is ajar. You hear strange noises coming from inside...', "5")
-    # 3 - rooms transicions -connect rooms-:
-    R1.add_transition(['go home', 'enter home'], R2)
-    R2.add_transition(['go outside', 'leave'], R1)
-    R2.add_transition(['go to bathroom', 'enter bathroom'], R3)
-    R3.add_transition(['go to living room', 'go back', 'back', 'go home'], R2)
-    R1.add_transition(['go to park', 'north', 'n'], R4)
-    R4.add_transition(['south', 'go to street', 's'], R1)  
-    R4.add_transition(['north', 'n', 'follow road', 'go to stand'], R5)
-    R5.add_transition(['s', 'park', 'south'], R4)
-    # 4 - local events and related variables:
-    GAME.set_user_defined_variable('cabinet_opened', False)
-    R3.add_local_event(EventCabinet(commands = ['open', 'open cabinet']))
-    GAME.set_user_defined_variable('check_men', False)
-    R4.add_local_event(EventMeetMen(commands = ['look men', 'examine men']))
-    R5.add_local_event(
+def make_world():
+    """ Builds the demo world.
+
+    User defined events keep their state in user defined variables, so a
+    single world can be shared between many games.
+    """
+    # 1 - rooms definitions:
+    r1 = pysud.Room('Street', 'You stand by the doorstep of your old apartment. In the street the sun is falling and you don\'t see people anywhere, everything is absolutely silent... far to the north is the won square...', "1")
+    r2 = pysud.Room('Home', 'Your humble apartment has seen better times, that is of course before you lived in it, much earlier. It is small and you have accumulated dirty clothes and garbage everywhere. So many cobwebs in the windows prevent you from seeing clearly what is happening on the street. You left the bathroom door opened, again...', "2")
+    r3 = pysud.Room('Bathroom', 'The bathroom decoration is in tune with the rest of your home: gross. Under the sink there\'s a small medicine cabinet and behind you is the main and only bedroom of your apartment...', "3")
+    r4 = pysud.Room('Park', 'The square is deserted. It has a path that crosses it through the center from north to south and in the middle of it you see a men lying down. To the south is the street that leads to your home, and in the other direction the only food stand in the park.', "4")
+    r5 = pysud.Room('Foodstand', 'At the food stand the tables have been thrown to the floor as if serious disturbances had taken place, there are some blood stains on the floor, and especially near the door that leads where the food is prepared. It is ajar. You hear strange noises coming from inside...', "5")
+    # 2 - rooms transicions -connect rooms-:
+    r1.add_transition(['go home', 'enter home'], r2)
+    r2.add_transition(['go outside', 'leave'], r1)
+    r2.add_transition(['go to bathroom', 'enter bathroom'], r3)
+    r3.add_transition(['go to living room', 'go back', 'back', 'go home'], r2)
+    r1.add_transition(['go to park', 'north', 'n'], r4)
+    r4.add_transition(['south', 'go to street', 's'], r1)  
+    r4.add_transition(['north', 'n', 'follow road', 'go to stand'], r5)
+    r5.add_transition(['s', 'park', 'south'], r4)
+    # 3 - local events and related variables:
+    variables = {'cabinet_opened': False, 'check_men': False}
+    r3.add_local_event(EventCabinet(commands = ['open', 'open cabinet']))
+    r4.add_local_event(EventMeetMen(commands = ['look men', 'examine men']))
+    r5.add_local_event(
         ev.ShowMessageEvent(
             ['look food stand', 'examine food stand', 'look stand', 'check stand'],
             'As soon as you lean your head to check the inside of the trailer you can see, a few steps from you, the back of one of the employees of the place. Crouched next to his coworker who lies in a pool of blood... He seems to be chewing an arm...')
     )
-    R5.add_local_event(EventEndingBad(['enter']))
-    R5.add_local_event(EventEndingGood(['throw bomb', 'use bomb']))
-    # 5 - add rooms to game instance:
-    GAME.add_rooms( [R1, R2, R3, R4, R5] )
-    # 6 - run the game demo:
-    GAME.pc.move_to_room(R1)
+    r5.add_local_event(EventEndingBad(['enter']))
+    r5.add_local_event(EventEndingGood(['throw bomb', 'use bomb']))
+    # 4 - the player character starts at the first room:
+    return pysud.World([r1, r2, r3, r4, r5], r1, variables)
+
+
+def make_game(player_name, **game_options):
+    """ Builds a new demo game, ready to be run.
+
+    Args:
+        player_name: The player character name.
+        game_options: Extra keyword arguments for pysud.Game.
+    """
+    return make_world().new_game(player_name, **game_options)
+
+
+if __name__ == '__main__':
+    PLAYER_NAME = input ('Enter your character name:')
+    GAME = make_game(PLAYER_NAME)
     GAME_MANAGER = gameMgr.GameManager(GAME)
     GAME_MANAGER.run_game()
@@ -15,6 +15,8 @@ class ConfigJsonParser():
         configurations_json = self.config_json_file['config']
         config_dict = dict()
         config_dict['ENABLE_JOURNAL'] = configurations_json['ENABLE_JOURNAL']
+        config_dict['ENABLE_COMMAND_COMPLETION'] = configurations_json.get('ENABLE_COMMAND_COMPLETION', False)
+        config_dict['ENABLE_TRAVEL'] = configurations_json.get('ENABLE_TRAVEL', False)
         config_dict['ENABLE_SAVEGAME'] = configurations_json['ENABLE_SAVEGAME']
         config_dict['PLAYER_DEFAULT_NAME'] = configurations_json['PLAYER_DEFAULT_NAME']
         return config_dict
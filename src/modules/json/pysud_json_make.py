@@ -2,7 +2,7 @@
 """
 
 import pysud
-import pysud_rooms_json_parser
+import pysud_cache
 import pysud_config_json_parser
 import pysud_gm as gameMgr
 
@@ -11,18 +11,16 @@ ROOMS_FILE_PATH = 'rooms.json'
 
 if __name__ == '__main__':
     CFG_PARSER = pysud_config_json_parser.ConfigJsonParser(CONFIG_FILE_PATH)
-    ROOMS_PARSER = pysud_rooms_json_parser.RoomsJsonParser(ROOMS_FILE_PATH)
     # parse configuration file:
     CFG_DICT = CFG_PARSER.parse()
-    # parse rooms data file:
-    ROOMS_LIST = ROOMS_PARSER.parse()
+    # parse rooms data file (through its cache, see pysud_cache):
+    ROOMS_LIST = pysud_cache.load_rooms(ROOMS_FILE_PATH)
     # create a new game:
-    GAME = pysud.Game(CFG_DICT['PLAYER_DEFAULT_NAME'])
+    GAME = pysud.Game(CFG_DICT['PLAYER_DEFAULT_NAME'], save_enabled = CFG_DICT['ENABLE_SAVEGAME'], journal_enabled = CFG_DICT['ENABLE_JOURNAL'], command_completion = CFG_DICT['ENABLE_COMMAND_COMPLETION'], travel_enabled = CFG_DICT['ENABLE_TRAVEL'])
 
     #
     # OLD VERSION:
     # CFG_DICT WAS NOT REALLY BEIGN USED : MSG ARE TAKEN FROM pysud_str
-    # ENABLE JOURNAL AND ENABLE SAVEGAME AREN'T IMPLEMENTED INSIDE pysud
     # set game configuration:
     # GAME.iom.msg_dict = CFG_DICT
     #
@@ -32,5 +30,5 @@ if __name__ == '__main__':
     # create a game manager class object:
     GAME_MANAGER = gameMgr.GameManager(GAME)
     # use it to persist a game data file:
-    GAME_MANAGER.save_game('game.data')
+    GAME_MANAGER.export_game('game.data')
     # this data can be retrieved using pysud_gm.GameManager.load_game_data()
@@ -1,55 +1,135 @@
 import json
+import time
 import pysud
 
+# Characters read from the rooms file at once:
+CHUNK_SIZE = 1 << 16
+# Characters a single room record may take, more means a malformed file:
+MAX_RECORD_SIZE = 1 << 24
+
+
+def is_truncated(error, buffer):
+    """ Answers whether a JSONDecodeError may be due to a record not read
+    entirely yet, rather than to a malformed one: nothing was found wrong
+    before the end of buffer (strings are left open until then). """
+    return error.msg.startswith('Unterminated string') or '}' not in buffer[error.pos:]
+
+
+def iter_room_records(rooms_file, chunk_size=CHUNK_SIZE, max_record_size=MAX_RECORD_SIZE):
+    """ Decodes room records one at a time from a text file object.
+
+    Both a JSON array of rooms and JSON lines (one room object per line)
+    are accepted. Only the record being decoded is held in memory.
+
+    Args:
+        rooms_file: A python text file object.
+        chunk_size: Amount of characters read at once.
+        max_record_size: Amount of characters a record may take.
+    Yields:
+        A python dictionary for every room found.
+    Raises:
+        ValueError: on a malformed record, or one longer than
+            max_record_size, telling its offset (in characters).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    offset = 0  # of buffer in the file
+    eof = False
+    in_array = None
+    while True:
+        # skips separators between records:
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ','):
+            position += 1
+        if position < len(buffer):
+            if in_array is None:
+                in_array = buffer[position] == '['
+                if in_array:
+                    position += 1
+                    continue
+            if in_array and buffer[position] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                position = end
+                yield record
+                continue
+            except json.JSONDecodeError as e:
+                if eof or not is_truncated(e, buffer):
+                    raise ValueError('malformed room record at offset ' + str(offset + position)
+                                     + ': ' + e.msg) from e
+                if len(buffer) - position > max_record_size:
+                    raise ValueError('room record at offset ' + str(offset + position) + ' exceeds '
+                                     + str(max_record_size) + ' characters') from e
+        elif eof:
+            if in_array:
+                raise json.JSONDecodeError('unterminated rooms array', buffer, position)
+            return
+        # the next record is not complete yet:
+        chunk = rooms_file.read(chunk_size)
+        eof = not chunk
+        offset += position
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
 class RoomsJsonParser():
     """
-    Summary
+    Streaming rooms json parser.
+
+    Rooms are built as their records are read, so memory use grows with
+    the resulting rooms rather than with the file size. Transitions to
+    rooms not read yet are completed once their destination shows up.
+
     Attributes:
-        rooms_json_file:    A valid json file path containing pysud rooms.
+        rooms_json_file_path:    A valid json (or json lines) file path containing pysud rooms.
+        rooms_amount:            Amount of rooms found by the last parse() call.
+        elapsed:                 Seconds taken by the last parse() call.
     """
     def __init__(self, rooms_json_file_path):
-        self.rooms_json_file = json.load(open(rooms_json_file_path, 'r', encoding='utf-8'))
+        self.rooms_json_file_path = rooms_json_file_path
+        self.rooms_amount = 0
+        self.elapsed = 0.0
 
-    def build_rooms_dict(self):
+    def parse(self):
         """
         Parses a rooms json.
 
-        Returns:
-            A dictionary containing all found rooms, indexed by room id.
-        """
-        rooms_dict = dict()
-        for room_json in self.rooms_json_file:
-            # rooms found in json must be converted to pysud Room objects:
-            room = pysud.Room(room_json['name'], room_json['description'], room_json['id'])
-            rooms_dict[room.get_id()] = room
-        return rooms_dict
-
-
-    def link_rooms(self, rooms_dict):
-        """ Links rooms trhough transitions.
-
-        Args:
-            rooms_dict: An id indexed rooms collection.
         Returns:
             A list containing all rooms found on file, conected between them via transitions.
+        Raises:
+            KeyError: if a transition destination room is not on file.
         """
+        start = time.perf_counter()
         rooms_list = list()
-        for room_json in self.rooms_json_file:
-            origin_room_id = room_json['id']
-            origin_room = rooms_dict[origin_room_id]
-            # transitions found will be used to create pysud.Transition objects
-            # this requires all rooms to be loaded first
-            if ('transitions' in room_json):
-                for transition_json in room_json['transitions']:
+        rooms_dict = dict()
+        # destination room id -> transitions waiting for it:
+        unresolved = dict()
+        with open(self.rooms_json_file_path, 'r', encoding='utf-8') as rooms_file:
+            for room_json in iter_room_records(rooms_file):
+                room = pysud.Room(room_json['name'], room_json['description'], room_json['id'])
+                room_id = room.get_id()
+                rooms_dict[room_id] = room
+                rooms_list.append(room)
+                for transition in unresolved.pop(room_id, ()):
+                    transition.destination = room
+                for transition_json in room_json.get('transitions', ()):
                     destination_room_id = transition_json['destination']
-                    destination_room = rooms_dict[destination_room_id]
-                    commands = transition_json['commands']
-                    origin_room.add_transition(commands, destination_room)
-            rooms_list.append(origin_room)
+                    destination_room = rooms_dict.get(destination_room_id)
+                    transition = room.add_transition(transition_json['commands'], destination_room)
+                    if destination_room is None:
+                        unresolved.setdefault(destination_room_id, []).append(transition)
+        if unresolved:
+            raise KeyError('rooms not found: ' + ', '.join(map(str, unresolved)))
+        self.rooms_amount = len(rooms_list)
+        self.elapsed = time.perf_counter() - start
         return rooms_list
 
-    def parse(self):
-        return self.link_rooms(self.build_rooms_dict())
+    def rooms_per_second(self):
+        """ Answers the last parse() call throughput. """
+        if not self.elapsed:
+            return 0.0
+        return self.rooms_amount / self.elapsed
 
 # Testing purposes: run this script in a directory containing a valid rooms.json file
 # running python3 in interative mode might be a good idea
@@ -57,5 +137,6 @@ if __name__ == '__main__':
     ROOMS_FILE = 'rooms.json'
     rooms_json_parser = RoomsJsonParser(ROOMS_FILE)
     rooms = rooms_json_parser.parse()
-    rooms_json_parser = None
     print('Rooms found: ' + str(rooms))
+    print(str(rooms_json_parser.rooms_amount) + ' rooms parsed, '
+          + format(rooms_json_parser.rooms_per_second(), '.0f') + ' rooms/s')
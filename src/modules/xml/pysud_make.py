@@ -6,6 +6,7 @@ Uses pysud_xml and other modules to create a new (initial) game data file.
 """
 
 import pysud
+import pysud_cache
 import pysud_xml
 import pysud_gm as gameMgr
 
@@ -19,13 +20,17 @@ def set_game_configs(game, configs_dict):
 
 if __name__ == '__main__':
     CFG_PARSER = pysud_xml.ConfigXMLParser(CONFIG_XML_PATH)
-    ROOMS_PARSER = pysud_xml.RoomsXMLParser(ROOMS_XML_PATH)
     # parse configuration file:
     CFG_DICT = CFG_PARSER.parse_file()
-    # parse rooms data file:
-    ROOMS_LIST = ROOMS_PARSER.parse_file()
+    # parse rooms data file (through its cache, see pysud_cache):
+    ROOMS_LIST = pysud_cache.load_rooms(ROOMS_XML_PATH)
     # create a new game:
-    GAME = pysud.Game(CFG_DICT['PLAYER_DEFAULT_NAME'])
+    GAME = pysud.Game(
+        CFG_DICT['PLAYER_DEFAULT_NAME'],
+        save_enabled = CFG_DICT['ENABLE_SAVEGAME'] == 'true',
+        journal_enabled = CFG_DICT['ENABLE_JOURNAL'] == 'true',
+        command_completion = CFG_DICT['ENABLE_COMMAND_COMPLETION'] == 'true',
+        travel_enabled = CFG_DICT['ENABLE_TRAVEL'] == 'true')
     # set game configuration:
     set_game_configs(GAME, CFG_DICT)
     # add found rooms to the game:
@@ -33,6 +38,6 @@ if __name__ == '__main__':
     # create a game manager class object:
     GAME_MANAGER = gameMgr.GameManager(GAME)
     # use it to persist a data file:
-    GAME_MANAGER.save_game('game.data')
+    GAME_MANAGER.export_game('game.data')
     #   this data can be retrieved using
     #   pysud_gm.GameManager.load_game_data()
@@ -40,6 +40,8 @@ class ConfigXMLParser(XMLParser):
         self.xml_root = tree.getroot()
         config = dict()
         config['ENABLE_JOURNAL'] = self.xml_root.find('ENABLE_JOURNAL').text
+        config['ENABLE_COMMAND_COMPLETION'] = self.xml_root.findtext('ENABLE_COMMAND_COMPLETION', 'false')
+        config['ENABLE_TRAVEL'] = self.xml_root.findtext('ENABLE_TRAVEL', 'false')
         config['ENABLE_SAVEGAME'] = self.xml_root.find('ENABLE_SAVEGAME').text
         config['HELP_TEXT'] = self.xml_root.find('HELP_TEXT').text
         config['INVALID_CMD_TEXT'] = self.xml_root.find('INVALID_CMD_TEXT').text
@@ -56,42 +58,83 @@ class ConfigXMLParser(XMLParser):
 
 
 class RoomsXMLParser(XMLParser):
-    """ This class handles all rooms.xml file parsing. """
+    """ This class handles all rooms.xml file parsing.
+
+    The file is parsed incrementally: each room tag is discarded as soon
+    as its pysud.Room is built, so no document tree is kept in memory
+    (xml_root stays None). Transitions are held as compact tuples until
+    every room is known, then linked in a second pass.
+    """
     def parse_file(self):
         """
         Parses rooms definition file.
 
         Returns:
             A python List holding pysud.Room class objects
+        Raises:
+            KeyError: if a transition destination room is not on file.
         """
-        tree = etree.parse(self.xml_file)
-        self.xml_root = tree.getroot()
-        rooms_data = dict()
-        for room_tag in self.xml_root:
-            temp = self.__parse_room(room_tag)
-            rooms_data[temp[0].get_id()] = temp
-        return self.__link_rooms(rooms_data)
-
-    def __link_rooms(self, rooms_data):
-        """ Associates each rooms with its transitions.
+        rooms = list()
+        rooms_by_id = dict()
+        transitions = list()  # (origin Room, destination id, commands)
+        for room_tag in self.__iter_room_tags():
+            room_id, room_name, room_description, room_transitions = self.__parse_room(room_tag)
+            room = pysud.Room(room_name, room_description, room_id)
+            rooms.append(room)
+            rooms_by_id[room_id] = room
+            for destination_id, commands in room_transitions:
+                transitions.append((room, destination_id, commands))
+        return self.__link_rooms(rooms, rooms_by_id, transitions)
+
+    def iter_room_records(self):
+        """ Decodes the rooms one at a time, without building them.
+
+        Yields:
+            A rooms.json like python dictionary for every room found
+            (see pysud_store.build_store), transitions commands as tuples.
+        """
+        for room_tag in self.__iter_room_tags():
+            room_id, room_name, room_description, room_transitions = self.__parse_room(room_tag)
+            yield {'id': room_id, 'name': room_name, 'description': room_description,
+                   'transitions': [{'destination': d, 'commands': c} for d, c in room_transitions]}
+
+    def __iter_room_tags(self):
+        """ Yields every room xml tag once read, discarding it next. """
+        context = etree.iterparse(self.xml_file, events=('start', 'end'))
+        root = None
+        for event, element in context:
+            if root is None:
+                root = element
+            elif event == 'end' and element.tag == 'room':
+                yield element
+                element.clear()
+                # finished rooms must not remain referenced by the root:
+                root.clear()
+
+    def __link_rooms(self, rooms, rooms_by_id, transitions):
+        """ Associates each room with its transitions.
 
         Args:
-            rooms_data: a python Dictionary composed by:
-                key : a pysud.Room Id
-                value : a pair ( Room class object, transition List for that room )
+            rooms: a python List holding the parsed pysud.Room objects
+            rooms_by_id: a python Dictionary indexing rooms by id
+            transitions: a python List of (origin room, destination room
+                id, commands) tuples
 
         Returns:
             A python List holding pysud.Room class objects
+        Raises:
+            KeyError: if a destination room id is not in rooms_by_id.
         """
-        res = list()
-        for p in rooms_data.values():
-            if p[1] != None:
-                for transition_stub in p[1]:
-                    destination_room = rooms_data.get(transition_stub.destination)[0]
-                    commands = transition_stub.get_commands()
-                    p[0].add_transition(commands, destination_room)
-            res.append(p[0])
-        return res
+        missing = dict()
+        for origin, destination_id, commands in transitions:
+            destination = rooms_by_id.get(destination_id)
+            if destination is None:
+                missing[destination_id] = None
+            else:
+                origin.add_transition(list(commands), destination)
+        if missing:
+            raise KeyError('rooms not found: ' + ', '.join(map(str, missing)))
+        return rooms
 
     def __parse_room(self, room_tag):
         """
@@ -100,64 +143,38 @@ class RoomsXMLParser(XMLParser):
         Args:
             room_tag: The room xml tag to parse
         Returns:
-            A python Tuple containing:
-                a pysud.rooms object
-                a python list
+            a (room id, name, description, transitions) tuple, where
+            transitions is a python List of (destination room id,
+            commands) tuples
         """
         room_description = None
-        room_name = room_tag.get('name')
-        room_id = room_tag.get('id')
-        room_transitions = None
-        for element in room_tag.getchildren():
+        room_transitions = ()
+        for element in room_tag:
             if element.tag == 'description':
                 room_description = element.text
             elif element.tag == 'transitions':
-                # self.print_transitions(element, room_id)
-                room_transitions = self.__parse_transition(element, room_id)
+                room_transitions = element
             else:
                 pass  # invalid tag found
-        room = pysud.Room(room_name, room_description, room_id)
-        return tuple(room, room_transitions)
-
-    def __parse_transition(self, transitions_tag, room_origin_id):
-        l = list()
+        transitions = []
         # iterates over a given room destinations:
-        for transition in transitions_tag.getchildren():
-            room_destination_id = transition.get('destination')
-            ts = TransitionStub(room_origin_id, room_destination_id)
+        for transition in room_transitions:
             # iterates over a single destination alias commands:
-            for command in transition.getchildren():
-                ts.add_command(command.text)
-            l.append(ts)
-        return l
+            commands = tuple(command.text for command in transition)
+            transitions.append((transition.get('destination'), commands))
+        return room_tag.get('id'), room_tag.get('name'), room_description, transitions
 
     def print_transitions(self, transitions_tag, room_origin_id):
         print('from ', room_origin_id, ' you can go to:')
         # iterates over a given room destinations:
-        for transition in transitions_tag.getchildren():
+        for transition in transitions_tag:
             dest = transition.get('destination')
             print('\t', dest)
             # iterates over a single destination alias commands:
-            for com in transition.getchildren():
+            for com in transition:
                 print('\t\t with commands:', com.text)
 
 
-class TransitionStub:
-    """ Internal class to hold a single transition data.
-
-    An object instance of this class is used exclusively to temporarily hold
-    parsed data for a room transition."""
-    def __init__(self, origin_room_id , destination_room_id):
-        self.origin = origin_room_id
-        self.destination = destination_room_id
-        self.__commands = list()
-
-    def add_command(self, command):
-        self.__commands.append(command)
-
-    def get_commands(self):
-        return self.__commands
-
 # @DEBUG - For testing purposes only:
 if __name__ == '__main__':
     CFG_XML_FILE = 'config.xml'
@@ -165,4 +182,3 @@ if __name__ == '__main__':
     C = ConfigXMLParser(CFG_XML_FILE)
     RP = RoomsXMLParser (ROOMS_XML_FILE)
     R = RP.parse_file()
-    E = RP.xml_root
@@ -5,19 +5,46 @@ Main pysud module.
 Contains basic classes such as the game, player character, levels(rooms)...
 """
 
+import threading
+import time
 import pysud_events as ev
+import pysud_output
+import pysud_route
 import pysud_str
 from functools import reduce
-import pyttsx3
+
+
+class _Playing(threading.local):
+    """ The game running a turn on the current thread, if any (see
+    Game.run_turn and Room). """
+
+    game = None
+
+_PLAYING = _Playing()
 
 class GameEntity():
-    """ Inner use abstract class. """
+    """ Inner use abstract class.
+
+    Entities use __slots__ to keep their memory footprint low, subclasses
+    not declaring their own __slots__ (such as user defined items) simply
+    get a regular __dict__.
+    """
+
+    __slots__ = ('name', 'uid', 'description')
 
     def __init__(self):
         self.name = None
         self.uid = None
         self.description = None       
 
+    def __setstate__(self, state):
+        # pickled as (__dict__, slots), or as a plain dictionary by
+        # versions not using __slots__:
+        if isinstance(state, tuple):
+            state = dict(state[0] or (), **(state[1] or {}))
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def __str__(self):
         return str(self.uid + ' : ' + self.name)
 
@@ -46,28 +73,36 @@ class Item(GameEntity):
     A pysud user must inherit from these class to create her own game items.
 
     Attributes:
-        look_me_ev: pysud_events.LookItemEvent reference.
-        use_me_ev: pysud_events.UseItemEvent reference.
+        look_me_ev: pysud_events.LookItemEvent reference, created when
+            first needed (items lying in rooms never need it).
+        use_me_ev: pysud_events.UseItemEvent reference, also created when
+            first needed.
         score_value: Default game points the player receives from collecting
             this item.
     """
 
+    __slots__ = ('score_value', '__look_me_ev', '__use_me_ev')
+
     def __init__(self, item_name, item_description, item_score_value = 1):
         GameEntity.__init__(self)
         self.set_name(item_name)
         self.set_description(item_description)
-        self.__look_me_ev = ev.LookItemEvent(self)
-        self.__use_me_ev = ev.UseItemEvent(self)
+        self.__look_me_ev = None
+        self.__use_me_ev = None
         self.score_value = item_score_value
 
     def look_item_event(self):
         """ Answers the pysud_events.LookItemEvent associated
         with the receiver. """
+        if self.__look_me_ev is None:
+            self.__look_me_ev = ev.LookItemEvent(self)
         return self.__look_me_ev
 
     def use_item_event(self):
         """ Answers the pysud_events.UseItemEvent associated
         with the receiver. """
+        if self.__use_me_ev is None:
+            self.__use_me_ev = ev.UseItemEvent(self)
         return self.__use_me_ev
 
     def use_on(self, game):
@@ -75,6 +110,17 @@ class Item(GameEntity):
         A pysud user must implement on her own item classes."""
         pass
 
+    def get_user_state(self):
+        """ Answers a dictionary holding the attributes added by subclasses
+        (such as an "on/off" flag). See Game.get_session_state(). """
+        # base attributes live in slots, so __dict__ only holds those:
+        return dict(getattr(self, '__dict__', ()))
+
+    def set_user_state(self, state):
+        """ Restores attributes answered by get_user_state(). """
+        for key, value in state.items():
+            setattr(self, key, value)
+
 
 class PC(GameEntity):
     """ The player character.
@@ -86,6 +132,8 @@ class PC(GameEntity):
         current_room: Player Character current location
     """
 
+    __slots__ = ('score', 'current_room', '__items', 'visited_rooms')
+
     def __init__(self, name='Player', description=''):
         GameEntity.__init__(self)
         self.set_name(name)
@@ -168,35 +216,72 @@ class Game():
             variables.
         game_mgr: GameManager class object.
         iom: IOManager class object
+        world: World class object this game was built from (if any).
+        room_overlays: Python dictionary holding a RoomOverlay for every
+            room changed during this game.
+        profiler: pysud_profile.Profiler timing this game, None unless
+            enable_profiling() was called.
+        metrics: pysud_metrics.GameMetrics counting this game turns, None
+            unless attached to one.
     """
 
-    def __init__(self, player_name, save_enabled = True, show_room_items = True, show_room_exits = True):
+    def __init__(self, player_name, save_enabled = True, show_room_items = True, show_room_exits = True, tts_enabled = True, world = None, speech_policy = 'keep', output = None, journal_enabled = False, command_completion = False, travel_enabled = False):
         self.__run = True
         self.pc = PC(player_name)
-        self.rooms = []
-        self.__global_events = []
+        self.world = world
+        # A world rooms collection is shared until this game adds its own:
+        self.rooms = world.rooms if world is not None else []
+        self.__rooms_by_id = None  # built on demand, see get_room_by_id
+        self.__indexed_amount = 0
+        self.__routes = None  # built on demand, see get_routes
+        self.__routed_amount = 0
+        self.__routed_changes = 0
+        self.__room_overlays = dict()
+        self.__global_events = ev.EventIndex()
+        # score and location events checked so far, see __added_reactions:
+        self.__reacted_sequence = 0
+        self.__reacted_room = (None, 0, 0)
+        # (score, room, triggered events) of the current turn, see __trigger:
+        self.__turn = None
         self.__user_defined_variables = dict()
         self.__game_mgr = None
-        self.iom = IOManager(self)
+        self.__turn_observers = []
+        self.profiler = None  # see enable_profiling
+        self.metrics = None  # see pysud_metrics.GameMetrics.attach
         # Setting game level configuration values:
         self.configs = dict()
         self.configs['SAVE_ENABLED'] = save_enabled
         self.configs['SHOW_ROOMS_ITEMS'] = show_room_items
         self.configs['SHOW_ROOMS_EXITS'] = show_room_exits
+        self.configs['TTS_ENABLED'] = tts_enabled
+        self.configs['SPEECH_POLICY'] = speech_policy
+        self.configs['JOURNAL_ENABLED'] = journal_enabled
+        self.configs['COMMAND_COMPLETION'] = command_completion
+        self.configs['TRAVEL_ENABLED'] = travel_enabled
+        if output is None:
+            output = pysud_output.default_output(tts_enabled, speech_policy)
+        self.iom = IOManager(self, output)
         # Adding default global events:
-        self.__global_events.append(ev.LookRoomEvent())
-        self.__global_events.append(ev.ShowScoreEvent())
-        self.__global_events.append(ev.QuitGameEvent())
-        self.__global_events.append(ev.ShowPlayerInventoryEvent())
-        self.__global_events.append(ev.ShowPlayerStatsEvent())
-        self.__global_events.append(ev.ShowHelpEvent())
+        self.__global_events.add(ev.LookRoomEvent())
+        self.__global_events.add(ev.ShowScoreEvent())
+        self.__global_events.add(ev.QuitGameEvent())
+        self.__global_events.add(ev.ShowPlayerInventoryEvent())
+        self.__global_events.add(ev.ShowPlayerStatsEvent())
+        self.__global_events.add(ev.ShowHelpEvent())
+        if self.configs['TRAVEL_ENABLED']:
+            # reserves the travel verb, see travel_to:
+            self.__global_events.add(ev.TravelEvent())
         if self.configs['SAVE_ENABLED']:
-            self.__global_events.append(ev.SaveGameEvent())
-            self.__global_events.append(ev.LoadGameEvent())
+            self.__global_events.add(ev.SaveGameEvent())
+            self.__global_events.add(ev.LoadGameEvent())
 
     def add_global_event(self, event):
         """ Adds a given event to the game's global events collection. """
-        self.__global_events.append(event)
+        self.__global_events.add(event)
+
+    def get_global_events(self):
+        """ Returns a tuple containing the game's global events. """
+        return self.__global_events.events()
 
     def remove_global_event(self, event):
         """ Removes a given event from the game's global events collection. """
@@ -231,8 +316,8 @@ class Game():
             item: a pysud.Item object.
         """
         self.pc.add_item(item)
-        self.__global_events.append(item.look_item_event())
-        self.__global_events.append(item.use_item_event())
+        self.__global_events.add(item.look_item_event())
+        self.__global_events.add(item.use_item_event())
 
     def remove_item_from_player(self, item):
         """ Removes given item from player.
@@ -255,6 +340,10 @@ class Game():
         """ Stops (doesn't terminates) the game execution. """
         self.__run = False
 
+    def is_running(self):
+        """ Answers whether the game is flagged as running or not. """
+        return self.__run
+
     def resume_game(self):
         """ Resumes game execution. """
         self.__run = True
@@ -262,32 +351,294 @@ class Game():
 
     def run_game(self):
         """ A game's main loop. """
-        self.iom.show_current_room()
+        self.show_starting_room()
         while self.__run:
-            self.iom.get_new_user_input()
-            success = False  # Valid entries flag
-            for gl_ev in self.__global_events:
-                if gl_ev.check_conditions(self):
-                    gl_ev.on_success(self)
-                    success = True
-            for lo_ev in self.pc.current_room.get_local_events():
-                if lo_ev.check_conditions(self):
-                    lo_ev.on_success(self)
-                    success = True
-            if not success:  # Input didn't match any command
-                self.iom.show_error_message()
+            self.run_turn(self.iom.get_new_user_input())
         return self
 
+    async def run_game_async(self, resumed=False):
+        """ A game's main loop, asyncio version.
+
+        Awaits self.iom.get_new_user_input_async() instead of blocking on
+        input, so many games can share a single event loop
+        (see pysud_server).
+
+        Args:
+            resumed: Whether the game continues a session the player was
+                already playing (see pysud_shard), so the current room is
+                not shown again.
+        """
+        if not resumed:
+            self.show_starting_room()
+        while self.__run:
+            command = await self.iom.get_new_user_input_async()
+            if self.__run:  # input may have stopped the game (disconnection)
+                self.run_turn(command)
+        return self
+
+    def show_starting_room(self):
+        """ Shows the current room as a main loop starts. """
+        self.iom.begin_turn()
+        try:
+            self.iom.show_current_room()
+        finally:
+            self.iom.end_turn()
+
+    def run_turn(self, command):
+        """ Runs a single game turn.
+
+        Checks (and triggers) every event the given command may trigger.
+        Every message shown during the turn is output at once at its end.
+
+        Args:
+            command: a normalized user input string.
+
+        Returns:
+            True if at least one event was triggered, False otherwise.
+        """
+        profiler, metrics = self.profiler, self.metrics
+        if profiler is not None:
+            start = profiler.clock()
+        if metrics is not None:
+            metrics_start = time.perf_counter()
+        self.iom.begin_turn()
+        playing, _PLAYING.game = _PLAYING.game, self
+        try:
+            triggered = self.__dispatch(command)
+        finally:
+            _PLAYING.game = playing
+            self.iom.end_turn()
+        if profiler is not None:
+            profiler.record('turn', profiler.clock() - start)
+        if metrics is not None:
+            metrics.on_turn(triggered, time.perf_counter() - metrics_start)
+        for observer in self.__turn_observers:
+            observer.on_turn(self, command, triggered)
+        return bool(triggered)
+
+    def __dispatch(self, command):
+        triggered = self.__trigger(command)
+        if triggered:
+            return tuple(triggered)
+        # Input didn't match any command. Games saved by older versions
+        # have no completion configuration:
+        completed = None
+        if self.configs.get('COMMAND_COMPLETION'):
+            completed = self.complete_command(command)
+        if completed is None:
+            self.iom.show_error_message()
+        else:  # only suggested, a guess is never run
+            self.iom.show_suggestion(completed)
+        return ()
+
+    def __trigger(self, command):
+        # events check these:
+        self.iom.last_user_input = command
+        self.iom.last_user_action = action = pysud_str.parse_command(command)
+        triggered = []
+        # (travel_to reacts to the rooms on the way, moving this forward)
+        self.__turn = (self.pc.score, self.pc.current_room, triggered)
+        run_events = self.__run_events if self.profiler is None else self.profiler.run_events
+        # Only events indexed under the entered command are checked:
+        run_events(self, self.__global_events.candidates(command, action), triggered)
+        run_events(self, self.get_room_local_events(self.pc.current_room, command, action), triggered)
+        score, room = self.__turn[:2]
+        self.__turn = None
+        events = self.__added_reactions()
+        if events or score != self.pc.score or room is not self.pc.current_room:
+            triggered.extend(self.__react(score, room, events))
+        return triggered
+
+    def __react(self, score, room, events):
+        # Score and location events are checked only when the score or
+        # location changed, which they may change again, and once after
+        # being added (given events). Each one is triggered once per turn
+        # at most:
+        triggered = []
+        while True:
+            events = [e for e in dict.fromkeys(events) if e not in triggered]
+            if self.profiler is None:
+                self.__run_events(self, events, triggered)
+            else:
+                self.profiler.run_events(self, events, triggered)
+            if score == self.pc.score and room is self.pc.current_room:
+                return triggered
+            entered = self.pc.current_room if room is not self.pc.current_room else None
+            events = list(self.__global_events.reactions(score, self.pc.score, entered))
+            if self.pc.current_room is not None:
+                events.extend(self.get_room_local_reactions(
+                    self.pc.current_room, None if entered else score, self.pc.score))
+                if entered is not None:
+                    self.__added_reactions()  # all of them are checked now
+            score, room = self.pc.score, self.pc.current_room
+
+    def __added_reactions(self):
+        # Answers the score and location events added since last looked
+        # for (or found as the game starts): the state they depend on may
+        # already be reached and never change again.
+        if self.__reacted_room is None:  # every event was already checked
+            self.__reacted_sequence = 0
+            self.__reacted_room = (None, 0, 0)
+            self.__added_reactions()
+            return ()
+        events, self.__reacted_sequence = self.__global_events.reactions_added(self.__reacted_sequence)
+        room = self.pc.current_room
+        if room is None:
+            return events
+        reacted_room, room_sequence, overlay_sequence = self.__reacted_room
+        if reacted_room is not room:
+            room_sequence = overlay_sequence = 0
+        local, new_room_sequence = room.get_local_reactions_added(room_sequence)
+        overlay = self.__room_overlays.get(room)
+        if overlay is None:
+            new_overlay_sequence = 0
+        else:
+            local = [e for e in local if e not in overlay.removed_events]
+            added, new_overlay_sequence = overlay.added_events.reactions_added(overlay_sequence)
+            local.extend(added)
+        if reacted_room is not room or new_room_sequence != room_sequence or new_overlay_sequence != overlay_sequence:
+            self.__reacted_room = (room, new_room_sequence, new_overlay_sequence)
+        if not local:
+            return events
+        return events + tuple(local)
+
+    @staticmethod
+    def __run_events(game, events, triggered):
+        # (same signature as pysud_profile.Profiler.run_events)
+        for event in events:
+            if event.check_conditions(game):
+                event.on_success(game)
+                triggered.append(event)
+
+    def enable_profiling(self):
+        """ Starts timing this game turns, events and output (see
+        pysud_profile). The statistics are shown by the profile command,
+        added along (see pysud_events.ShowProfileEvent).
+
+        Returns:
+            The pysud_profile.Profiler object collecting them.
+        """
+        if self.profiler is None:
+            import pysud_profile
+            self.profiler = pysud_profile.Profiler()
+            self.iom.output = pysud_profile.ProfiledOutput(self.iom.output, self.profiler)
+        if not any(isinstance(e, ev.ShowProfileEvent) for e in self.__global_events.events()):
+            self.__global_events.add(ev.ShowProfileEvent())
+        return self.profiler
+
+    def disable_profiling(self):
+        """ Stops the profiling started by enable_profiling(), removing
+        the profile command. """
+        if self.profiler is not None:
+            if getattr(self.iom.output, 'profiler', None) is self.profiler:
+                self.iom.output = self.iom.output.backend
+            self.profiler = None
+        for event in self.__global_events.events():
+            if isinstance(event, ev.ShowProfileEvent):
+                self.__global_events.remove(event)
+
+    def complete_command(self, command):
+        """ Answers the command an unknown input most likely stands for,
+        suggested to the player instead of an invalid input message.
+
+        The input is compared against the commands of the global events
+        and of the current room local events: its last word is completed
+        when it starts a single one of them ("loo" for "look", "go n" for
+        "go north"), otherwise it is corrected when a single one of them
+        is one edit (character insertion, deletion, substitution or
+        transposition) away ("look lmap" for "look lamp"). Verb synonyms
+        are accepted ("examine lmap"). Commands of events which are not
+        completable (quit, save, load... see
+        pysud_events.CommandEvent) are never answered.
+
+        Args:
+            command: a normalized user input string.
+        Returns:
+            The command to run instead, None if there is no such command,
+            more than one, or command is already a known one. Commands of
+            events removed from the room for this game (see RoomOverlay)
+            are not answered.
+        """
+        action = pysud_str.parse_command(command)
+        if action:
+            command = action[0] + ' ' + action[1]
+        room = self.pc.current_room
+        vocabularies = [self.__global_events.vocabulary()]
+        if room is not None:
+            vocabularies.append(room.get_vocabulary())
+            overlay = self.__room_overlays.get(room)
+            if overlay is not None:
+                vocabularies.append(overlay.added_events.vocabulary())
+        if any(command in vocabulary for vocabulary in vocabularies):
+            return None
+        found = set()
+        for vocabulary in vocabularies:
+            found.update(vocabulary.complete(command, 2, ' '))
+        found = self.__active_commands(found)
+        if not found:
+            for vocabulary in vocabularies:
+                found.update(vocabulary.close_matches(command, 1, 2))
+            found = self.__active_commands(found)
+        return found.pop() if len(found) == 1 else None
+
+    def __active_commands(self, commands):
+        # Vocabularies of shared rooms also hold the commands of events
+        # this game removed (picked up items...), which trigger nothing:
+        overlay = self.__room_overlays.get(self.pc.current_room)
+        if overlay is None or not overlay.removed_events:
+            return commands
+        active = set()
+        for command in commands:
+            events = self.__global_events.candidates(command)
+            events += self.get_room_local_events(self.pc.current_room, command)
+            if any(isinstance(event, ev.CommandEvent) for event in events):
+                active.add(command)
+        return active
+
+    def add_turn_observer(self, observer):
+        """ Adds an object to be notified after every turn.
+
+        Args:
+            observer: An object implementing
+                on_turn(game, command, triggered_events), where
+                triggered_events is a tuple holding the events the
+                command triggered (empty for invalid commands).
+        """
+        self.__turn_observers.append(observer)
+
+    def remove_turn_observer(self, observer):
+        """ Removes an object added with add_turn_observer(). """
+        self.__turn_observers.remove(observer)
 
     def add_rooms(self, rooms_list):
         """ Adds one or more rooms to this game.
 
         Args:
-            rooms_list: A python list/tuple containing the rooms to be added.
+            rooms_list: A python list/tuple (or any iterable) containing
+                the rooms to be added.
+        Raises:
+            ValueError: if a room id is already used by a game room or by
+                another room in rooms_list. No room is added then.
         """
-        # TODO doc possible exceptions
+        rooms_list = list(rooms_list)
+        world = self.world
+        # rooms of paged worlds are looked up, not loaded (see ExtendedRooms):
+        if world is not None and self.rooms is world.rooms and world.loaded_rooms() is not world.rooms:
+            self.rooms = ExtendedRooms(self.rooms)
+        paged = isinstance(self.rooms, ExtendedRooms)
+        rooms_by_id = self.__get_rooms_index()
+        new_rooms_by_id = dict()
         for room in rooms_list:
-            self.rooms.append(room)
+            room_id = room.get_id()
+            if room_id in rooms_by_id or room_id in new_rooms_by_id or (paged and world.get_room_by_id(room_id)):
+                raise ValueError('duplicated room id: ' + str(room_id))
+            new_rooms_by_id[room_id] = room
+        if not isinstance(self.rooms, (list, ExtendedRooms)):  # copy on write
+            self.rooms = list(self.rooms)
+        self.rooms.extend(rooms_list)
+        rooms_by_id.update(new_rooms_by_id)
+        self.__indexed_amount = len(self.rooms)
+        self.__routes = None
 
     def get_room_by_id(self, room_id):
         """ Retrieves a room object given its ID.
@@ -299,17 +650,264 @@ class Game():
             a Room class object whose id equals room_id
             False if no room with the given id was found.
         """
-        # TODO use filter
-        i = 0
-        found = False
-        rooms_amount = len(self.rooms)
-        while i < rooms_amount and not found:
-            found = self.rooms[i].get_id() == room_id
-            i += 1
-        if found:
-            return self.rooms[i-1]
+        if self.world is not None and self.rooms is self.world.rooms:
+            return self.world.get_room_by_id(room_id)
+        if isinstance(self.rooms, ExtendedRooms):
+            room = self.world.get_room_by_id(room_id)
+            if room is not False:
+                return room
+        return self.__get_rooms_index().get(room_id, False)
+
+    def __get_rooms_index(self):
+        # rooms is a public list, so the index is rebuilt if it was
+        # changed without using add_rooms():
+        if self.__rooms_by_id is None or self.__indexed_amount != len(self.rooms):
+            self.__rooms_by_id = dict()
+            rooms = self.rooms.added_rooms if isinstance(self.rooms, ExtendedRooms) else self.rooms
+            for room in rooms:
+                self.__rooms_by_id.setdefault(room.get_id(), room)
+            self.__indexed_amount = len(self.rooms)
+        return self.__rooms_by_id
+
+    def get_room_overlay(self, room, create=False):
+        """ Answers the RoomOverlay recording this game changes to a room.
+
+        Args:
+            room: a pysud.Room object.
+            create: whether to create an (empty) overlay if the room
+                has not changed yet.
+        Returns:
+            a RoomOverlay object, or None if room has no changes and
+            create is False.
+        """
+        overlay = self.__room_overlays.get(room)
+        if overlay is None and create:
+            overlay = RoomOverlay()
+            self.__room_overlays[room] = overlay
+        return overlay
+
+    def get_room_overlays(self):
+        """ Returns a tuple of (room, RoomOverlay) pairs for every room
+        changed during this game. """
+        return tuple(self.__room_overlays.items())
+
+    def get_room_items(self, room):
+        """ Returns a tuple containing the items currently in a room. """
+        overlay = self.__room_overlays.get(room)
+        if overlay is None:
+            return room.get_items()
+        return overlay.items(room)
+
+    def add_room_item(self, room, item):
+        """ Adds an item to a room for this game only.
+
+        Rooms may be shared between games, so these changes are recorded
+        in the room overlay and the room itself is left untouched.
+        Also creates the pertinent local event PickUpItemEvent.
+        """
+        overlay = self.get_room_overlay(room, True)
+        overlay.added_items.append(item)
+        overlay.added_events.add(ev.PickUpItemEvent(item))
+
+    def remove_room_item(self, room, item):
+        """ Removes an item from a room for this game only.
+
+        Does not eliminates any event that may be associated with item.
+
+        Raises:
+            ValueError: if item is not in room.
+        """
+        overlay = self.get_room_overlay(room, True)
+        if item in overlay.added_items:
+            overlay.added_items.remove(item)
+        elif item in room.get_items() and item not in overlay.removed_items:
+            overlay.removed_items.add(item)
+        else:
+            raise ValueError('item not in room')
+
+    def get_room_local_events(self, room, command=None, action=None):
+        """ Returns a tuple containing a room current local events.
+
+        Args:
+            room: a pysud.Room object.
+            command: optional normalized user input. When given, only
+                the events that input may trigger are returned.
+            action: optional command parsed by pysud_str.parse_command.
+        """
+        events = room.get_local_events(command, action)
+        overlay = self.__room_overlays.get(room)
+        if overlay is None:
+            return events
+        return overlay.local_events(events, command, action)
+
+    def get_room_local_reactions(self, room, old_score, score):
+        """ Returns a tuple containing the room current local ScoreEvent
+        and LocationEvent objects a change of the player state may
+        trigger (see pysud_events.EventIndex.reactions).
+
+        Args:
+            room: a pysud.Room object, the player current room.
+            old_score: score before the change, None if the player just
+                entered room.
+            score: current player score.
+        """
+        entered = room if old_score is None else None
+        events = room.get_local_reactions(old_score, score, entered)
+        overlay = self.__room_overlays.get(room)
+        if overlay is None:
+            return events
+        events = [e for e in events if e not in overlay.removed_events]
+        events.extend(overlay.added_events.reactions(old_score, score, entered))
+        return tuple(events)
+
+    def add_room_local_event(self, room, event):
+        """ Adds a local event to a room for this game only. """
+        overlay = self.get_room_overlay(room, True)
+        if isinstance(event, ev.TransitionEvent) and event not in overlay.added_events:
+            self.__update_routes(room, event, True)
+        overlay.added_events.add(event)
+
+    def remove_room_local_event(self, room, event):
+        """ Removes a local event from a room for this game only.
+
+        Raises:
+            ValueError: if event is not one of room local events.
+        """
+        overlay = self.get_room_overlay(room, True)
+        if event in overlay.added_events:
+            overlay.added_events.remove(event)
+        elif room.has_local_event(event) and event not in overlay.removed_events:
+            overlay.removed_events.add(event)
+        else:
+            raise ValueError('event not in room')
+        if isinstance(event, ev.TransitionEvent):
+            self.__update_routes(room, event, False)
+
+    def get_routes(self):
+        """ Answers a pysud_route.RoutingIndex over this game rooms and
+        their current transitions.
+
+        Games using a world's rooms share the world index until they add
+        or remove transitions of their own, then they get a copy of it,
+        updated in place from then on. Transitions added to (or removed
+        from) rooms directly get the index built again.
+        """
+        if (self.__routes is not None and self.__routed_amount == len(self.rooms)
+                and self.__routed_changes == Room.transition_changes):
+            return self.__routes
+        added, removed = [], []
+        for room, overlay in self.__room_overlays.items():
+            added.extend((room, e) for e in overlay.added_events.events() if isinstance(e, ev.TransitionEvent))
+            removed.extend((room, e) for e in overlay.removed_events if isinstance(e, ev.TransitionEvent))
+        if self.world is not None and self.rooms is self.world.rooms:
+            if not (added or removed):
+                return self.world.get_routes()
+            routes = self.world.get_routes().copy()
+        elif isinstance(self.rooms, ExtendedRooms):
+            routes = self.world.get_routes().copy()
+            for origin_id, destination_id in pysud_route.transition_pairs(self.rooms.added_rooms):
+                routes.add_transition(origin_id, destination_id)
+        else:
+            routes = pysud_route.RoutingIndex(pysud_route.transition_pairs(self.rooms))
+        for room, transition in added:
+            routes.add_transition(room.get_id(), transition.get_destination_id())
+        for room, transition in removed:
+            routes.remove_transition(room.get_id(), transition.get_destination_id())
+        self.__routes = routes
+        self.__routed_amount = len(self.rooms)
+        self.__routed_changes = Room.transition_changes
+        return routes
+
+    def add_transition(self, room, commands, destination):
+        """ Adds a new transition to a room for this game only (see
+        Room.add_transition and add_room_local_event), keeping the routing
+        index up to date.
+
+        Returns:
+            The new pysud_events.TransitionEvent.
+        """
+        transition = ev.TransitionEvent(commands, destination)
+        self.add_room_local_event(room, transition)
+        return transition
+
+    def __update_routes(self, room, transition, added):
+        # only own indexes are updated, shared ones are copied when needed:
+        if self.__routes is None:
+            return
+        if added:
+            self.__routes.add_transition(room.get_id(), transition.get_destination_id())
+        else:
+            self.__routes.remove_transition(room.get_id(), transition.get_destination_id())
+
+    def travel_to(self, destination_name):
+        """ Walks the player character to an already visited room, along
+        the shortest way there.
+
+        Every transition on the way is triggered as if the player entered
+        its command, so rooms on the way are shown and their events
+        checked. The player stops at the first transition that doesn't
+        occur (a locked door...).
+
+        Handles pysud_events.TravelEvent, which games only get when
+        created with travel_enabled.
+
+        Args:
+            destination_name: The destination room name (not case
+                sensitive) or id. The nearest one is chosen if many
+                visited rooms share it.
+        Returns:
+            True if the player character got there, False otherwise.
+        """
+        name = destination_name.lower()
+        destination_ids = set()
+        for room in self.pc.visited_rooms:
+            if str(room.get_id()) == destination_name or pysud_str.normalize_command(room.get_name()).lower() == name:
+                destination_ids.add(room.get_id())
+        found = None
+        if destination_ids:
+            found = self.get_routes().nearest(self.pc.current_room.get_id(), destination_ids)
+        if found is None:
+            self.iom.show_message(self.iom.get_message('TRAVEL_UNKNOWN_TEXT'))
+            return False
+        destination_id, route = found
+        if not route:
+            self.iom.show_message(self.iom.get_message('TRAVEL_ALREADY_TEXT'))
+            return True
+        command, action = self.iom.last_user_input, self.iom.last_user_action
+        try:
+            for room_id in route:
+                if not self.__travel_step(room_id):
+                    self.iom.show_message(self.iom.get_message('TRAVEL_STOPPED_TEXT'))
+                    return False
+        finally:
+            # the rest of the turn checks the entered command:
+            self.iom.last_user_input, self.iom.last_user_action = command, action
+        return True
+
+    def __travel_step(self, room_id):
+        # Triggers the first transition to room_id that occurs, then
+        # reacts to the room entered. Answers whether the player got there.
+        if self.__turn is None:  # not called by a turn event
+            self.__turn = (self.pc.score, self.pc.current_room, [])
+        score, room, triggered = self.__turn
+        run_events = self.__run_events if self.profiler is None else self.profiler.run_events
+        amount = len(triggered)
+        for transition in self.get_room_transitions(room):
+            if transition.commands and transition.get_destination_id() == room_id:
+                self.iom.last_user_input = transition.commands[0]
+                self.iom.last_user_action = pysud_str.parse_command(transition.commands[0])
+                run_events(self, (transition,), triggered)
+                if len(triggered) > amount:
+                    break
         else:
             return False
+        triggered.extend(self.__react(score, room, ()))
+        self.__turn = (self.pc.score, self.pc.current_room, triggered)
+        return self.__run and self.pc.current_room is not None and self.pc.current_room.get_id() == room_id
+
+    def get_room_transitions(self, room):
+        """ Returns a tuple containing a room current transitions. """
+        return tuple(filter(lambda x: isinstance(x,ev.TransitionEvent), self.get_room_local_events(room)))
 
     def save_game(self, filename='save.data'):
         """ Persists the current game.
@@ -323,50 +921,211 @@ class Game():
 
         Handles pysud_events.LoadGameEvent.
         """
-        self.__game_mgr.load_game(filename)
+        game_mgr = self.__game_mgr
+        if game_mgr.load_game_data(filename):
+            # restored into this game, its main loop just keeps going:
+            self.iom.show_welcome_back_message()
+            self.iom.show_current_room()
+        else:
+            game_mgr.game.iom.show_welcome_back_message()
+            game_mgr.resume_game()
 
     def clear_game_mgr(self):
         self.__game_mgr = None
 
+    def get_game_mgr(self):
+        return self.__game_mgr
+
     def set_game_mgr(self, game_manager):
         self.__game_mgr = game_manager
 
+    def get_session_state(self):
+        """ Answers everything that may change while this game is played.
+
+        Rooms are left out: the returned state only references them (and
+        their items and events), so it stays small regardless of the
+        world size. Collections are copied, but not the objects they
+        hold (user variables, items, events...), so the state must be
+        pickled before the game goes on (see pysud_gm.dumps_session).
+
+        Returns:
+            A python dictionary, to be used with set_session_state().
+        """
+        items = self.pc.get_items()
+        # events of carried items are restored along with the items:
+        item_events = set()
+        for item in items:
+            item_events.add(id(item.look_item_event()))
+            item_events.add(id(item.use_item_event()))
+        state = dict()
+        state['player_name'] = self.pc.get_name()
+        state['score'] = self.pc.score
+        state['current_room'] = self.pc.current_room
+        state['visited_rooms'] = list(self.pc.visited_rooms)
+        state['items'] = list(items)
+        state['global_events'] = [e for e in self.__global_events.events() if id(e) not in item_events]
+        state['room_overlays'] = {r: o.copy() for r, o in self.__room_overlays.items()}
+        state['variables'] = dict(self.__user_defined_variables)
+        # items may be shared with a world, so their own state goes apart:
+        touched = list(items)
+        for overlay in self.__room_overlays.values():
+            touched.extend(overlay.removed_items)
+        state['item_states'] = [(i, i.get_user_state()) for i in touched]
+        return state
+
+    def set_session_state(self, state):
+        """ Restores a state answered by get_session_state().
+
+        Args:
+            state: A python dictionary holding a game session state.
+        """
+        self.pc = PC(state['player_name'])
+        self.pc.score = state['score']
+        self.pc.current_room = state['current_room']
+        self.pc.visited_rooms = set(state['visited_rooms'])
+        self.__global_events = ev.EventIndex()
+        for event in state['global_events']:
+            self.__global_events.add(event)
+        for item in state['items']:
+            self.add_item_to_player(item)
+        self.__room_overlays = dict(state['room_overlays'])
+        self.__routes = None
+        self.__user_defined_variables = dict(state['variables'])
+        for item, item_state in state['item_states']:
+            item.set_user_state(item_state)
+        # restored events were already checked while the session was played:
+        self.__reacted_room = None
+
+    def __getstate__(self):
+        # The game manager and I/O objects (threads, sockets, files...)
+        # are not part of a persisted game, only the messages are:
+        state = self.__dict__.copy()
+        del state['iom']
+        state['_Game__game_mgr'] = None
+        state['_Game__turn_observers'] = []
+        state['profiler'] = None
+        state['metrics'] = None
+        state['_Game__rooms_by_id'] = None
+        state['_Game__routes'] = None
+        state['_Game__turn'] = None
+        state['_Game__msg_dict'] = self.iom.msg_dict
+        return state
+
+    def __setstate__(self, state):
+        msg_dict = state.pop('_Game__msg_dict')
+        self.__dict__.update(state)
+        self.__rooms_by_id = None
+        self.__routes = None
+        self.__routed_amount = 0
+        self.__routed_changes = 0
+        self.__turn = None
+        self.profiler = None
+        self.metrics = None
+        # event indexes are rebuilt when unpickled, already checked events
+        # included:
+        self.__reacted_room = None
+        output = pysud_output.default_output(self.configs['TTS_ENABLED'], self.configs['SPEECH_POLICY'])
+        self.iom = IOManager(self, output)
+        self.iom.msg_dict = msg_dict
+
 
 class Room(GameEntity):
     """
     A game level or scenario.
 
+    Rooms may be shared between games (see World), so while a game runs a
+    turn, the methods changing a room (add_item, remove_item,
+    add_local_event, remove_local_event and add_transition) only change
+    it for that game: they are recorded in its RoomOverlay, as the Game
+    room methods do. Changes made outside turns affect every game.
+
     Attributes:
         items: Items found in the room.
         local_events: Room local events collection.
+        transition_changes: (class attribute) Amount of transitions added
+            to or removed from rooms (any room) during this run, so
+            routing indexes know when to be built again.
     """
 
-    def __init__(self, room_name='', room_description='', room_id='0'):
+    # rooms may be weakly referenced (see pysud_store):
+    __slots__ = ('__local_events', '__items', '__weakref__')
+
+    transition_changes = 0
+
+    def __init__(self, room_name='', room_description='', room_id='0', local_events=()):
+        """
+        Args:
+            local_events: Events the room starts with (rooms built during
+                a turn, such as paged ones, get them this way, see
+                pysud_store).
+        """
         GameEntity.__init__(self)
         self.set_name(room_name)
         self.set_description(room_description)
         self.set_id(room_id)
-        self.__local_events = []
+        self.__local_events = ev.EventIndex()
+        for event in local_events:
+            self.__local_events.add(event)
         self.__items = []
 
     def add_local_event(self, event):
-        """ Adds given event to receiver.
+        """ Adds given event to receiver (only for the game running a
+        turn, if any).
 
         Args:
             event: a pysud_events.Event or one of its subclasses.
         """
-        self.__local_events.append(event)
+        if _PLAYING.game is not None:
+            _PLAYING.game.add_room_local_event(self, event)
+            return
+        self.__local_events.add(event)
 
-    def get_local_events(self):
-        """ Returns a tuple containing the receiver local events. """
-        return tuple(self.__local_events)
+    def get_local_events(self, command=None, action=None):
+        """ Returns a tuple containing the receiver local events.
+
+        Args:
+            command: optional normalized user input. When given, only
+                the events that input may trigger are returned.
+            action: optional command parsed by pysud_str.parse_command.
+        """
+        if command is None:
+            return self.__local_events.events()
+        return self.__local_events.candidates(command, action)
 
     def remove_local_event(self, event):
-        """ Removes given event from the receiver events collection. """
+        """ Removes given event from the receiver events collection (only
+        for the game running a turn, if any). """
+        if _PLAYING.game is not None:
+            _PLAYING.game.remove_room_local_event(self, event)
+            return
         self.__local_events.remove(event)
+        if isinstance(event, ev.TransitionEvent):
+            Room.transition_changes += 1
+
+    def get_local_reactions(self, old_score, score, room=None):
+        """ Returns a tuple containing the receiver local ScoreEvent and
+        LocationEvent objects a change of the player state may trigger
+        (see pysud_events.EventIndex.reactions). """
+        return self.__local_events.reactions(old_score, score, room)
+
+    def get_local_reactions_added(self, sequence):
+        """ Returns the receiver local ScoreEvent and LocationEvent objects
+        added since a given point, and the current point (see
+        pysud_events.EventIndex.reactions_added). """
+        return self.__local_events.reactions_added(sequence)
+
+    def get_vocabulary(self):
+        """ Answers a pysud_str.CommandTrie holding the commands that
+        trigger the receiver local events. """
+        return self.__local_events.vocabulary()
+
+    def has_local_event(self, event):
+        """ Answers whether given event is one of the receiver local events. """
+        return event in self.__local_events
 
     def add_transition(self, commands, destination):
-        """ Adds a new transition to the receiver.
+        """ Adds a new transition to the receiver (only for the game
+        running a turn, if any).
 
         This method uses its arguments to create a new
         pysud_events.TransitionEvent instance.
@@ -374,30 +1133,230 @@ class Room(GameEntity):
         Args:
             commands: A list containing one or more strings
             destination: A pysud.Room object
+        Returns:
+            The new pysud_events.TransitionEvent.
         """
-        self.__local_events.append(ev.TransitionEvent(commands, destination))
+        if _PLAYING.game is not None:
+            return _PLAYING.game.add_transition(self, commands, destination)
+        transition = ev.TransitionEvent(commands, destination)
+        self.__local_events.add(transition)
+        Room.transition_changes += 1
+        return transition
 
     def add_item(self, item):
         """ Adds item to the room and creates the pertinent global event
-        PickUpItemEvent. """
+        PickUpItemEvent (only for the game running a turn, if any). """
+        if _PLAYING.game is not None:
+            _PLAYING.game.add_room_item(self, item)
+            return
         self.__items.append(item)
-        self.add_local_event(ev.PickUpItemEvent(item))
+        self.__local_events.add(ev.PickUpItemEvent(item))
 
     def get_items(self):
         """ Returns a tuple containing the room's pysud.Items. """
         return tuple(self.__items)
 
     def get_transitions(self):
-        return tuple(filter(lambda x: isinstance(x,ev.TransitionEvent), self.__local_events))
+        return tuple(filter(lambda x: isinstance(x,ev.TransitionEvent), self.__local_events.events()))
 
     def remove_item(self, item):
-        """ Removes item from the room items collection.
+        """ Removes item from the room items collection (only for the
+        game running a turn, if any).
 
         Does not eliminates any event that may be associated with item.
         """
+        if _PLAYING.game is not None:
+            _PLAYING.game.remove_room_item(self, item)
+            return
         removed_item = self.__items.remove(item)
 
 
+class ExtendedRooms():
+    """
+    The rooms of a game adding rooms to a paged world (see
+    pysud_store.PagedWorld): the world rooms sequence followed by the
+    added ones, so world rooms don't have to be loaded to add some more.
+
+    Attributes:
+        world_rooms: The world rooms sequence.
+        added_rooms: A python list holding the rooms added by the game.
+    """
+
+    def __init__(self, world_rooms, added_rooms=()):
+        self.world_rooms = world_rooms
+        self.added_rooms = list(added_rooms)
+
+    def __len__(self):
+        return len(self.world_rooms) + len(self.added_rooms)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if position < len(self.world_rooms):
+            return self.world_rooms[position]
+        return self.added_rooms[position - len(self.world_rooms)]
+
+    def __iter__(self):
+        yield from self.world_rooms
+        yield from self.added_rooms
+
+    def append(self, room):
+        self.added_rooms.append(room)
+
+    def extend(self, rooms):
+        self.added_rooms.extend(rooms)
+
+
+class RoomOverlay():
+    """
+    Records the changes a single game made to a (shared) room.
+
+    Rooms work as a read only template during play: picking up an item,
+    removing an event and so on only touch the overlay of the game that
+    did it, so the memory used by a game grows with what the player
+    changed rather than with the world size.
+
+    Attributes:
+        added_items: Items added to the room.
+        removed_items: Room items removed from it.
+        added_events: pysud_events.EventIndex holding events added to
+            the room.
+        removed_events: Room local events removed from it.
+    """
+
+    def __init__(self):
+        self.added_items = []
+        self.removed_items = set()
+        self.added_events = ev.EventIndex()
+        self.removed_events = set()
+
+    def copy(self):
+        """ Answers a new overlay holding the same changes. """
+        overlay = RoomOverlay()
+        overlay.added_items = list(self.added_items)
+        overlay.removed_items = set(self.removed_items)
+        overlay.added_events = self.added_events.copy()
+        overlay.removed_events = set(self.removed_events)
+        return overlay
+
+    def items(self, room):
+        """ Returns a tuple containing room items once the receiver
+        changes are applied. """
+        items = [i for i in room.get_items() if i not in self.removed_items]
+        items.extend(self.added_items)
+        return tuple(items)
+
+    def local_events(self, room_events, command=None, action=None):
+        """ Applies the receiver changes to some room local events.
+
+        Args:
+            room_events: room local events (or candidates for command).
+            command: optional normalized user input room_events were
+                looked up for.
+            action: optional command parsed by pysud_str.parse_command.
+        """
+        events = [e for e in room_events if e not in self.removed_events]
+        if command is None:
+            events.extend(self.added_events.events())
+        else:
+            events.extend(self.added_events.candidates(command, action))
+        return tuple(events)
+
+
+class World():
+    """
+    A compiled game world, shared (read only) between many games.
+
+    A world holds the rooms, their transitions, items and local events
+    every game built from it starts with. Games record their own changes
+    in RoomOverlay objects, so a single world can back any amount of
+    simultaneous games (see pysud_server).
+
+    Attributes:
+        rooms: A tuple containing the world rooms.
+        start_room: Room where new games place the player character.
+        variables: Initial user defined variables for new games.
+    """
+
+    __routes = None  # built on demand, see get_routes
+    __routed_changes = 0  # Room.transition_changes when built
+
+    def __init__(self, rooms, start_room=None, variables=None):
+        self.rooms = tuple(rooms)
+        if start_room is None and self.rooms:
+            start_room = self.rooms[0]
+        self.start_room = start_room
+        self.variables = dict(variables) if variables else dict()
+        self.__rooms_by_id = None
+
+    def get_room_by_id(self, room_id):
+        """ Retrieves one of the receiver rooms given its ID.
+
+        Returns:
+            a Room class object whose id equals room_id
+            False if no room with the given id was found.
+        """
+        if self.__rooms_by_id is None:
+            self.__rooms_by_id = dict()
+            for room in self.rooms:
+                self.__rooms_by_id.setdefault(room.get_id(), room)
+        return self.__rooms_by_id.get(room_id, False)
+
+    def loaded_rooms(self):
+        """ Answers the receiver rooms currently in memory (all of them,
+        see pysud_store.PagedWorld). """
+        return self.rooms
+
+    def get_transition_pairs(self):
+        """ Yields an (origin room id, destination room id) pair for
+        every transition of the receiver rooms. """
+        return pysud_route.transition_pairs(self.rooms)
+
+    def get_routes(self):
+        """ Answers a pysud_route.RoutingIndex over the receiver rooms,
+        built on first use. """
+        if self.__routes is None or self.__routed_changes != Room.transition_changes:
+            self.__routes = pysud_route.RoutingIndex(self.get_transition_pairs())
+            self.__routed_changes = Room.transition_changes
+        return self.__routes
+
+    def add_transition(self, origin, commands, destination):
+        """ Adds a new transition to one of the receiver rooms (see
+        Room.add_transition), keeping the routing index up to date.
+
+        Returns:
+            The new pysud_events.TransitionEvent.
+        """
+        changes = Room.transition_changes
+        transition = origin.add_transition(commands, destination)
+        # (an index missing other changes is built again anyway)
+        if self.__routes is not None and self.__routed_changes == changes:
+            self.__routes.add_transition(origin.get_id(), transition.get_destination_id())
+            self.__routed_changes = Room.transition_changes
+        return transition
+
+    def new_game(self, player_name, **game_options):
+        """ Answers a new Game using the receiver rooms.
+
+        Args:
+            player_name: The player character name.
+            game_options: Extra keyword arguments for Game.
+        """
+        game = Game(player_name, world=self, **game_options)
+        for var_key, var_value in self.variables.items():
+            game.set_user_defined_variable(var_key, var_value)
+        if self.start_room is not None:
+            game.pc.move_to_room(self.start_room)
+        return game
+
+    def __getstate__(self):
+        # indexes are rebuilt on demand:
+        state = self.__dict__.copy()
+        state.pop('_World__routes', None)
+        state.pop('_World__routed_changes', None)
+        return state
+
+
 class IOManager():
     """
     Handles (cli) I/O operations.
@@ -407,62 +1366,67 @@ class IOManager():
 
     Attributes:
         last_user_input: contains the last command read from prompt
+        last_user_action: last_user_input parsed by
+            pysud_str.parse_command (checked by action events)
         game: A reference to a pysud.Game class instance
         msg_dict: A python dictionary containing general messages strings
+            (messages missing from it are taken from pysud_str.MSG_DICT,
+            see get_message)
+        output: pysud_output.OutputBackend object messages are written to.
     """
-    def __init__(self, game):
+    def __init__(self, game, output=None):
         self.last_user_input = ''
+        self.last_user_action = ()
         self.__game = game
         self.msg_dict = pysud_str.MSG_DICT
-        self.engine = pyttsx3.init('espeak')
+        if output is None:
+            output = pysud_output.ConsoleOutput()
+        self.output = output
+        self.__buffering = False
+        self.__buffer = []
+
+    def get_message(self, key):
+        """ Answers a general message string. Games built from older
+        config files (or exported by older versions) lack the newer
+        messages, the defaults are used for those. """
+        message = self.msg_dict.get(key)
+        return message if message is not None else pysud_str.MSG_DICT[key]
+
+    def begin_turn(self):
+        """ Starts buffering messages until end_turn() is called.
+
+        A whole turn output is then written (or spoken) at once, instead
+        of once for every message.
+        """
+        self.flush()
+        self.__buffering = True
+
+    def end_turn(self):
+        """ Stops buffering and outputs the buffered messages. """
+        self.__buffering = False
+        self.flush()
+
+    def flush(self):
+        """ Outputs buffered messages (if any) as a single message. """
+        if self.__buffer:
+            text = '\n'.join(self.__buffer)
+            self.__buffer.clear()
+            self.output.write(text)
+
+    def show_profile(self):
+        """ Prints the statistics collected by the game profiler (see
+        Game.enable_profiling). """
+        profiler = self.__game.profiler
+        if profiler is None:
+            self.show_message(self.get_message('PROFILE_DISABLED_TEXT'))
+            return
+        for line in profiler.report():
+            self.show_message(line)
 
     def show_player_stats(self):
         """ Prints the player game's exploration's progress. """
         msg = self.msg_dict['PLAYER_STATS_STR'] + ' ' + str(self.__game.pc.visited_rooms_amount()) + '/' + str(len(self.__game.rooms))
         self.show_message(msg)
-    def show_current_room(self):
-        """ Prints player current room description and items in it (if any) """
-        self.show_message(self.__game.pc.current_room.get_description())
-        # TODO add game level flag to disable
-        self.show_current_room_exits()
-        self.show_current_room_items()
-
-    def show_current_room_exits(self):
-        for t in self.__game.pc.current_room.get_transitions():
-            self.show_message_list([self.msg_dict['ROOM_EXITS_STR_1'], t.destination.get_name(), self.msg_dict['ROOM_EXITS_STR_2'], str(t.commands)])
-
-    def show_current_room_items(self):
-        items = self.__game.pc.current_room.get_items()
-        for an_item in items:
-            self.show_message_list([self.msg_dict['ROOM_ITEMS_STR'], an_item.get_name()])
-
-    def show_message(self, string):
-        """ Prints a given string to std out. """
-        print(string)
-
-    def show_message_list(self, strings):
-        """ Concatenates collection items with spaces prior to printing out. """
-        self.show_mesages(map(lambda s: s + ' ', strings))
-
-    def show_error_message(self):
-        """ Prints a 'command not found' or similar message. """
-        self.show_message(self.msg_dict['INVALID_CMD_TEXT'])
-
-    def show_player_inventory(self):
-        """ Prints the player inventory (items collection). """
-        self.show_message(self.msg_dict['PLAYER_INVENTORY_STR'])
-        for an_item in self.__game.pc.get_items():
-            self.show_message(an_item.get_name())
-
-    def show_score(self):
-        """ Prints the player current score. """
-        self.show_message_list([self.msg_dict['PLAYER_SCORE_STR'], str(self.__game.pc.score)])
-
-    def get_new_user_input(self):
-        """ Reads (and returns) a new input from keyboard. """
-        self.last_user_input = input(self.msg_dict['PROMPT_TEXT'])
-        return self.last_user_input
-
 
     def show_welcome_message(self):
         """ Prints the welcome to a new game message. """
@@ -489,20 +1453,20 @@ class IOManager():
             self.show_current_room_items()
 
     def show_current_room_exits(self):
-        for t in self.__game.pc.current_room.get_transitions():
+        for t in self.__game.get_room_transitions(self.__game.pc.current_room):
             self.show_message_list([self.msg_dict['ROOM_EXITS_STR_1'], t.destination.get_name(), self.msg_dict['ROOM_EXITS_STR_2'], str(t.commands)])
 
     def show_current_room_items(self):
-        items = self.__game.pc.current_room.get_items()
+        items = self.__game.get_room_items(self.__game.pc.current_room)
         for an_item in items:
             self.show_message_list([self.msg_dict['ROOM_ITEMS_STR'], an_item.get_name()])
 
     def show_message(self, string):
-        """ Prints a given string to std out. """
-        print(string)
-        self.engine.say(string)
-        self.engine.runAndWait()
-        
+        """ Writes a given string to the output backend. """
+        if self.__buffering:
+            self.__buffer.append(string)
+        else:
+            self.output.write(string)
 
     def show_message_list(self, strings):
         """ Concatenates collection items with spaces prior to printing out. """
@@ -512,6 +1476,11 @@ class IOManager():
         """ Prints a 'command not found' or similar message. """
         self.show_message(self.msg_dict['INVALID_CMD_TEXT'])
 
+    def show_suggestion(self, command):
+        """ Prints a 'did you mean' message for a given command (see
+        Game.complete_command). """
+        self.show_message(self.get_message('DID_YOU_MEAN_STR') + " '" + command + "'?")
+
     def show_player_inventory(self):
         """ Prints the player inventory (items collection). """
         self.show_message(self.msg_dict['PLAYER_INVENTORY_STR'])
@@ -524,5 +1493,9 @@ class IOManager():
 
     def get_new_user_input(self):
         """ Reads (and returns) a new input from keyboard. """
-        self.last_user_input = input(self.msg_dict['PROMPT_TEXT'])
-        return self.last_user_input
\ No newline at end of file
+        self.flush()
+        user_input = input(self.msg_dict['PROMPT_TEXT'])
+        self.output.on_user_input()
+        self.last_user_input = pysud_str.normalize_command(user_input)
+        return self.last_user_input
+
@@ -0,0 +1,256 @@
+"""
+pysud cache module.
+
+Compiles world source files (rooms.json, rooms.xml) into a compact binary
+cache, so games can start with a single fast load instead of parsing and
+linking the whole world every time.
+
+Cached rooms are stored as plain tuples, transitions referencing their
+destination by its (integer) index in the rooms tuple rather than by id.
+A cache remembers the source file modification time, size and SHA-1 hash
+taken before parsing it: a cache whose source changed (even while it was
+being compiled) is recompiled automatically.
+
+Usage:
+    python3 pysud_cache.py ROOMS_FILE [CACHE_FILE]
+
+The parser for ROOMS_FILE is chosen by its extension, the pysud json or
+xml modules must be on the same directory (see modules/xml/README.md).
+"""
+
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import time
+import pysud
+import pysud_events as ev
+
+# Header every world cache file starts with:
+CACHE_FILE_MAGIC = b'PYSUD-WORLD-2\n'
+CACHE_SUFFIX = '.cache'
+
+
+def parse_source(source_path):
+    """ Parses a rooms source file, choosing the parser by its extension.
+
+    Returns:
+        A python list holding pysud.Room class objects.
+    """
+    if source_path.endswith('.xml'):
+        import pysud_xml
+        return pysud_xml.RoomsXMLParser(source_path).parse_file()
+    import pysud_rooms_json_parser
+    return pysud_rooms_json_parser.RoomsJsonParser(source_path).parse()
+
+
+def source_digest(source_path):
+    """ Answers the SHA-1 hex digest of a given file contents. """
+    digest = hashlib.sha1()
+    with open(source_path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(source_path):
+    """ Answers a (modification time in ns, size, SHA-1 hex digest) tuple
+    identifying a given file contents. """
+    stat = os.stat(source_path)
+    return (stat.st_mtime_ns, stat.st_size, source_digest(source_path))
+
+
+def compile_rooms(rooms):
+    """ Converts rooms into their compact cached form.
+
+    Only what world sources can define is kept: rooms and transitions.
+
+    Args:
+        rooms: A python list/tuple holding pysud.Room class objects.
+    Returns:
+        A python tuple holding an (id, name, description, transitions)
+        tuple per room, transitions being a tuple of (destination index,
+        commands) tuples.
+    """
+    indices = {id(room): i for i, room in enumerate(rooms)}
+    return tuple(
+        (room.get_id(), room.get_name(), room.get_description(),
+         tuple((indices[id(t.destination)], tuple(t.commands)) for t in room.get_transitions()))
+        for room in rooms)
+
+
+def new_transition(commands):
+    """ Answers a pysud_events.TransitionEvent with no destination yet.
+
+    Cached commands were taken from events, so they are already
+    normalized and (being pickled along) still shared between events:
+    CommandEvent.__init__ is skipped rather than normalizing them again.
+    """
+    event = ev.TransitionEvent.__new__(ev.TransitionEvent)
+    event.uid = None
+    event.commands = commands
+    return event
+
+
+def build_rooms(compiled):
+    """ Builds the rooms given their compact form (see compile_rooms).
+
+    Every room is created along with its transitions, which are linked to
+    their destinations once all the rooms exist. The cyclic garbage
+    collector is paused meanwhile: the objects created can't be garbage
+    yet, and scanning them over and over took most of the time.
+
+    Returns:
+        A python list holding pysud.Room class objects.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        rooms = []
+        links = []
+        for room_id, name, description, transitions in compiled:
+            events = []
+            for destination, commands in transitions:
+                event = new_transition(commands)
+                events.append(event)
+                links.append((event, destination))
+            rooms.append(pysud.Room(name, description, room_id, events))
+        for event, destination in links:
+            event.destination = rooms[destination]
+    finally:
+        if collecting:
+            gc.enable()
+    return rooms
+
+
+class WorldCompiler():
+    """ Loads the rooms defined in a source file through a binary cache.
+
+    Attributes:
+        source_path: Path of the rooms source file.
+        cache_path: Path of the cache file (by default source_path plus
+            CACHE_SUFFIX).
+        parser: Callable receiving source_path and answering a rooms list
+            (parse_source by default).
+        from_cache: Whether the last load() was served from the cache.
+        timings: A python dictionary holding the seconds taken by each
+            step of the last load(): 'check', plus 'load' for cache hits,
+            or 'parse' and 'write' when the source was compiled.
+    """
+
+    def __init__(self, source_path, cache_path=None, parser=parse_source):
+        self.source_path = source_path
+        self.cache_path = cache_path or source_path + CACHE_SUFFIX
+        self.parser = parser
+        self.from_cache = False
+        self.timings = dict()
+
+    def load(self):
+        """ Answers the source rooms, compiling the cache when missing or
+        out of date.
+
+        Returns:
+            A python list holding pysud.Room class objects.
+        """
+        self.timings = dict()
+        start = time.perf_counter()
+        compiled = self.read_cache()
+        self.timings['check'] = time.perf_counter() - start
+        if compiled is None:
+            self.from_cache = False
+            return self.compile()
+        self.from_cache = True
+        start = time.perf_counter()
+        rooms = build_rooms(compiled)
+        self.timings['load'] = time.perf_counter() - start
+        return rooms
+
+    def compile(self):
+        """ Parses the source file and (re)writes the cache.
+
+        Returns:
+            A python list holding the parsed pysud.Room class objects.
+        """
+        start = time.perf_counter()
+        # taken before parsing: a source changed meanwhile gets compiled
+        # again on the next load.
+        fingerprint = source_fingerprint(self.source_path)
+        rooms = self.parser(self.source_path)
+        self.timings['parse'] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.write_cache(compile_rooms(rooms), fingerprint)
+        self.timings['write'] = time.perf_counter() - start
+        return rooms
+
+    def read_cache(self):
+        """ Answers the compiled rooms stored in the cache, None if there
+        is no cache or its source changed.
+
+        A source whose modification time changed but whose contents did
+        not (it was just touched, or checked out again) keeps its cache.
+        """
+        try:
+            cache_file = open(self.cache_path, 'rb')
+        except OSError:
+            return None
+        with cache_file:
+            if cache_file.read(len(CACHE_FILE_MAGIC)) != CACHE_FILE_MAGIC:
+                return None
+            try:
+                mtime, size, digest = pickle.load(cache_file)
+                stat = os.stat(self.source_path)
+                if (stat.st_mtime_ns, stat.st_size) == (mtime, size):
+                    return pickle.load(cache_file)
+                if stat.st_size != size or source_digest(self.source_path) != digest:
+                    return None
+                compiled = pickle.load(cache_file)
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                return None
+        # still valid, only its recorded modification time changes:
+        self.write_cache(compiled, (stat.st_mtime_ns, size, digest))
+        return compiled
+
+    def write_cache(self, compiled, fingerprint):
+        """ Writes compiled rooms into the cache.
+
+        Args:
+            compiled: rooms compiled by compile_rooms.
+            fingerprint: source file fingerprint (see source_fingerprint)
+                taken before reading the rooms from it.
+        """
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as cache_file:
+            cache_file.write(CACHE_FILE_MAGIC)
+            pickle.dump(fingerprint, cache_file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(compiled, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+
+    def report(self):
+        """ Answers a human readable summary of the last load() timings. """
+        steps = ', '.join(k + ': ' + format(v * 1000, '.2f') + ' ms' for k, v in self.timings.items())
+        source = 'cache' if self.from_cache else 'source'
+        return self.source_path + ' (from ' + source + ') ' + steps
+
+
+def load_rooms(source_path, cache_path=None):
+    """ Answers the rooms defined in a source file, through its cache.
+
+    Returns:
+        A python list holding pysud.Room class objects.
+    """
+    return WorldCompiler(source_path, cache_path).load()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    COMPILER = WorldCompiler(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    ROOMS = COMPILER.load()
+    print(COMPILER.report())
+    if not COMPILER.from_cache:
+        # compare against a load served by the fresh cache:
+        ROOMS = COMPILER.load()
+        print(COMPILER.report())
+    print(str(len(ROOMS)) + ' rooms')
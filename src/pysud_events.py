@@ -6,13 +6,30 @@ Contains classes to represent different game events, such as using an item,
     player moving to a room, etc.
 """
 
+import bisect
+import sys
 import pysud_str as ps
 
 class Event():
-    """ Base (abstract) Event class. """
+    """ Base (abstract) Event class.
+
+    Events use __slots__ to keep their memory footprint low, subclasses
+    not declaring their own __slots__ simply get a regular __dict__.
+    """
+
+    __slots__ = ('uid',)
+
     def __init__(self):
         self.uid = None
 
+    def __setstate__(self, state):
+        # pickled as (__dict__, slots), or as a plain dictionary by
+        # versions not using __slots__:
+        if isinstance(state, tuple):
+            state = dict(state[0] or (), **(state[1] or {}))
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def check_conditions(self, game):
         """ Checks if this event occurs.
 
@@ -29,9 +46,23 @@ class ScoreEvent(Event):
     """ These kind of events occurs when the player's score reaches a
     given value.
 
+    They occur once the score reaches (or passes) score_trigger, not on
+    every turn while it stays there: only after dropping under it and
+    reaching it again. Room local ones also occur when the player enters
+    their room with score enough. Events added while the score is already
+    there occur at the end of the turn that added them (or of the next
+    turn, if added between turns).
+
+    Earlier versions checked them on every turn, so they occurred on
+    every turn while the score was enough. Subclasses overriding
+    check_conditions still are checked on every turn (see README.md).
+
     Attributes:
         score_trigger: A (minimal) score ammount.
     """
+
+    __slots__ = ('score_trigger',)
+
     def __init__(self, score_number):
         Event.__init__(self)
         self.score_trigger = score_number
@@ -43,9 +74,22 @@ class LocationEvent(Event):
     """ These kinds of events occurs when the player is on one of given
     room/s.
 
+    They occur when the player enters one of those rooms, not on every
+    turn the player stays there: only after leaving and entering again.
+    Events added while the player is in one of them occur at the end of
+    the turn that added them (or of the next turn, if added between
+    turns).
+
+    Earlier versions checked them on every turn, so they occurred on
+    every turn the player was there. Subclasses overriding
+    check_conditions still are checked on every turn (see README.md).
+
     Attributes:
         rooms: A pysud.Room object list.
      """
+
+    __slots__ = ('rooms',)
+
     def __init__(self, rooms):
         Event.__init__(self)
         self.rooms = tuple(rooms)
@@ -62,12 +106,20 @@ class CommandEvent(Event):
 
     Attributes:
         commands: Event trigger(s) string(s).
+        completable: (class attribute) Whether mistyped or partial input
+            may be answered with a suggestion of the receiver commands
+            (see pysud.Game.complete_command). Events losing or
+            overwriting the player progress are never suggested.
     """
 
+    __slots__ = ('commands',)
+
+    completable = True
+
     def __init__(self, commands):
         Event.__init__(self)
-        # TODO consider using set or frozenset instead
-        self.commands = tuple(commands)
+        # equal commands of different events share a single string:
+        self.commands = tuple(sys.intern(ps.normalize_command(c)) for c in commands)
 
     def check_conditions(self, game):
         """ Checks if this event occurs.
@@ -89,6 +141,8 @@ class TransitionEvent(CommandEvent):
             transported on this event's success.
     """
 
+    __slots__ = ('destination',)
+
     def __init__(self, commands, destination):
         CommandEvent.__init__(self, commands)
         self.destination = destination
@@ -97,6 +151,10 @@ class TransitionEvent(CommandEvent):
         game.pc.move_to_room(self.destination)
         game.iom.show_current_room()
 
+    def get_destination_id(self):
+        """ Answers the destination room id (see pysud_route). """
+        return self.destination.get_id()
+
 
 class ShowMessageEvent(CommandEvent):
     """ Message Event.
@@ -107,6 +165,8 @@ class ShowMessageEvent(CommandEvent):
         message: String containing the message to display.
     """
 
+    __slots__ = ('message',)
+
     def __init__(self, commands, message):
         CommandEvent.__init__(self, commands)
         self.message = message
@@ -117,6 +177,9 @@ class ShowMessageEvent(CommandEvent):
 
 class LookRoomEvent(CommandEvent):
     """ """
+
+    __slots__ = ()
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_LOOK)
 
@@ -124,49 +187,119 @@ class LookRoomEvent(CommandEvent):
         game.iom.show_current_room()
 
 
-class LookItemEvent(ShowMessageEvent):
+class ActionEvent(CommandEvent):
+    """ Base action Event.
+
+    These kind of events occur when the player inputs a verb (or any of
+    its synonyms, see pysud_str.register_verb) followed by one or two
+    object names, in any order: "use lamp", "combine a b"... User input
+    is parsed only once per turn (see pysud_str.parse_command), and no
+    verb/object permutation needs to be stored. Events with no object
+    names occur on the verb followed by anything.
+
+    Attributes:
+        verb: Canonical verb.
+        objects: A tuple holding up to two object names.
+    """
+
+    __slots__ = ('verb', 'objects')
+
+    def __init__(self, verb, objects):
+        CommandEvent.__init__(self, ())
+        self.verb = ps.VERBS.get(verb, verb)
+        self.objects = tuple(sys.intern(ps.normalize_command(o)) for o in objects)
+
+    def __setstate__(self, state):
+        Event.__setstate__(self, state)
+        if not hasattr(self, 'verb'):
+            # pickled by versions using command strings, which still work
+            self.verb = None
+            self.objects = ()
+
+    def get_actions(self):
+        """ Answers the parsed inputs (see pysud_str.parse_command) that
+        trigger the receiver. """
+        objects = self.objects
+        if self.verb is None:
+            return ()
+        if not objects:
+            return ((self.verb,),)
+        if len(objects) == 2 and objects[0] != objects[1]:
+            # any order will do:
+            return ((self.verb, objects[0] + ' ' + objects[1]), (self.verb, objects[1] + ' ' + objects[0]))
+        return ((self.verb, ' '.join(objects)),)
+
+    def check_conditions(self, game):
+        if self.verb is None:
+            return CommandEvent.check_conditions(self, game)
+        action = game.iom.last_user_action
+        if not action or action[0] != self.verb:
+            return False
+        objects = self.objects
+        if not objects:
+            return True
+        if len(objects) == 2:
+            return action[1] == objects[0] + ' ' + objects[1] or action[1] == objects[1] + ' ' + objects[0]
+        return action[1] == ' '.join(objects)
+
+
+class LookItemEvent(ActionEvent):
     """ """
+
+    __slots__ = ('message',)
+
     def __init__(self, item):
-        cmd = ps.simple_map(ps.CMD_LOOK,item.name)
-        ShowMessageEvent.__init__(self, commands = cmd, message = item.description)
+        ActionEvent.__init__(self, ps.VERB_LOOK, (item.name,))
+        self.message = item.description
 
+    def on_success(self, game):
+        game.iom.show_message(self.message)
 
-class PickUpItemEvent(CommandEvent):
+
+class PickUpItemEvent(ActionEvent):
     """ """
+
+    __slots__ = ('item',)
+
     def __init__(self, an_item):
         self.item = an_item
-        CommandEvent.__init__(self, commands = ps.simple_map(ps.CMD_ITEM_GET,self.item.name))
+        ActionEvent.__init__(self, ps.VERB_ITEM_GET, (self.item.name,))
 
     def on_success(self, game):
         game.add_item_to_player(self.item)
         game.pc.score += self.item.score_value
         game.iom.show_message_list([ps.MSG_DICT['ITEM_RETRIEVED'],self.item.name])
-        game.pc.current_room.remove_local_event(self)
-        game.pc.current_room.remove_item(self.item)
+        game.remove_room_local_event(game.pc.current_room, self)
+        game.remove_room_item(game.pc.current_room, self.item)
 
 
-class UseItemEvent(CommandEvent):
+class UseItemEvent(ActionEvent):
     """  """
+
+    __slots__ = ('item',)
+
     def __init__(self, an_item):
         self.item = an_item
-        CommandEvent.__init__(self, commands = ps.simple_map(ps.CMD_ITEM_USE,self.item.name))
+        ActionEvent.__init__(self, ps.VERB_ITEM_USE, (self.item.name,))
 
     def on_success(self, game):
         self.item.use_on(game)
 
 
-class CombineItemEvent(CommandEvent):
+class CombineItemEvent(ActionEvent):
     """ These events are useful to combine two different items into a
     new one. """
+
+    __slots__ = ('__component_item_a', '__component_item_b', '__result_item')
+
     def __init__(self, component_item_a, component_item_b, result_item):
         self.__component_item_a = component_item_a
         self.__component_item_b = component_item_b
-        cmd = ps.complex_map(ps.CMD_ITEM_COMBINE,self.__component_item_a,self.component_item_b)
-        CommandEvent.__init__(self, commands = cmd)
+        ActionEvent.__init__(self, ps.VERB_ITEM_COMBINE, (self.__component_item_a.name, self.__component_item_b.name))
         self.__result_item = result_item
 
     def check_conditions(self, game):
-        return CommandEvent.check_conditions(self, game) and game.pc.has_item(self.__component_item_a) and game.pc.has_item(self.__component_item_b)
+        return ActionEvent.check_conditions(self, game) and game.pc.has_item(self.__component_item_a) and game.pc.has_item(self.__component_item_b)
 
     def on_success(self, game):
         game.remove_item_from_player(self.__component_item_a)
@@ -175,19 +308,21 @@ class CombineItemEvent(CommandEvent):
         game.iom.show_message(ps.MSG_DICT['ITEM_COMBINED_OK'])
 
 
-class UseItemWithItemEvent(CommandEvent):
+class UseItemWithItemEvent(ActionEvent):
     """ Event to use a pair of items.
 
     A pysud user must inherit and implement the on_success() method.
     """
+
+    __slots__ = ('__item_a', '__item_b')
+
     def __init__(self, item_a, item_b):
         self.__item_a = item_a
         self.__item_b = item_b
-        cmd = ps.complex_map(ps.CMD_ITEM_USE, self.__item_a.name, self.__item_b.name)
-        CommandEvent.__init__(self, commands = cmd)
+        ActionEvent.__init__(self, ps.VERB_ITEM_USE, (self.__item_a.name, self.__item_b.name))
 
     def check_conditions(self, game):
-        return CommandEvent.check_conditions(self, game) and game.pc.has_item(self.__item_a) and game.pc.has_item(self.__item_b)
+        return ActionEvent.check_conditions(self, game) and game.pc.has_item(self.__item_a) and game.pc.has_item(self.__item_b)
 
     def on_success(self, game):
         """ Abstract method. """
@@ -196,6 +331,9 @@ class UseItemWithItemEvent(CommandEvent):
 # Predefined global events:
 class ShowPlayerInventoryEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_SHOW_INVENTORY)
 
@@ -205,6 +343,9 @@ class ShowPlayerInventoryEvent(CommandEvent):
 
 class ShowScoreEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_SHOW_SCORE)
 
@@ -214,6 +355,11 @@ class ShowScoreEvent(CommandEvent):
 
 class QuitGameEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
+    completable = False
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_GAME_QUIT)
 
@@ -223,6 +369,11 @@ class QuitGameEvent(CommandEvent):
 
 class SaveGameEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
+    completable = False
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_GAME_SAVE)
 
@@ -232,6 +383,11 @@ class SaveGameEvent(CommandEvent):
 
 class LoadGameEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
+    completable = False
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_GAME_LOAD)
 
@@ -241,16 +397,295 @@ class LoadGameEvent(CommandEvent):
 
 class ShowPlayerStatsEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_SHOW_STATS)
 
     def on_success(self, game):
         game.iom.show_player_stats()
 
+class ShowProfileEvent(CommandEvent):
+    """ Shows the game profiling statistics (see pysud_profile). """
+
+    __slots__ = ()
+
+    def __init__(self):
+        CommandEvent.__init__(self, commands = ps.CMD_SHOW_PROFILE)
+
+    def on_success(self, game):
+        game.iom.show_profile()
+
+class TravelEvent(ActionEvent):
+    """ Walks the player character to an already visited room, named
+    after the travel verb ("goto kitchen"), along the shortest way there.
+
+    Transitions on the way are triggered one by one, as if the player
+    entered their commands (see pysud.Game.travel_to).
+    """
+
+    __slots__ = ()
+
+    def __init__(self):
+        ActionEvent.__init__(self, ps.VERB_TRAVEL, ())
+
+    def on_success(self, game):
+        game.travel_to(game.iom.last_user_action[1])
+
 class ShowHelpEvent(CommandEvent):
     """  """
+
+    __slots__ = ()
+
     def __init__(self):
         CommandEvent.__init__(self, commands = ps.CMD_SHOW_HELP)
 
     def on_success(self, game):
         game.iom.show_help()
+
+
+
+# check_conditions methods that only hold on the event trigger commands
+# (or actions), so events using them can be indexed by those:
+COMMAND_CONDITIONS = frozenset((
+    CommandEvent.check_conditions,
+    ActionEvent.check_conditions,
+    CombineItemEvent.check_conditions,
+    UseItemWithItemEvent.check_conditions))
+
+
+class EventIndex():
+    """ An ordered events collection indexed by trigger command.
+
+    CommandEvent objects are indexed by each one of their commands (and
+    ActionEvent objects by each one of their actions), so finding the
+    events a given input may trigger costs O(matching events) instead of
+    O(all events). Subclasses overriding check_conditions may occur on
+    other inputs too, so they are offered on every lookup instead (see
+    COMMAND_CONDITIONS). ScoreEvent objects are kept sorted by score trigger,
+    and LocationEvent objects indexed by room, so they are only offered
+    once the score or location they depend on changes (see reactions),
+    or once right after being added (see reactions_added). Those with
+    extra conditions (overriding check_conditions), as any other kind of
+    event, can't be indexed and are offered on every lookup. Lookups keep
+    the order in which events were added.
+
+    The trigger commands of completable events are also available as a
+    pysud_str.CommandTrie (see vocabulary), built on first use and kept up
+    to date from then on.
+    """
+
+    __slots__ = ('__order', '__sequence', '__by_command', '__polled', '__vocabulary', '__thresholds', '__by_room')
+
+    def __init__(self):
+        self.__order = dict()  # event -> insertion sequence number
+        self.__sequence = 0
+        # tuples are much smaller than sets for the usual one or two
+        # events per command:
+        self.__by_command = dict()  # command or action -> tuple of events
+        self.__polled = ()  # other events
+        self.__vocabulary = None
+        # created along with the first score/location event:
+        self.__thresholds = None  # sorted score triggers, their events
+        self.__by_room = None  # room -> tuple of events
+
+    def __getstate__(self):
+        return tuple(self.__order)
+
+    def __setstate__(self, state):
+        # older versions pickled the receiver dictionaries:
+        events = state if isinstance(state, tuple) else state['_EventIndex__order']
+        self.__init__()
+        for event in events:
+            self.add(event)
+
+    def __len__(self):
+        return len(self.__order)
+
+    def __contains__(self, event):
+        return event in self.__order
+
+    def add(self, event):
+        """ Adds given event to the receiver. """
+        if event in self.__order:
+            return
+        self.__order[event] = self.__sequence
+        self.__sequence += 1
+        if isinstance(event, CommandEvent):
+            if self.__vocabulary is not None and event.completable:
+                for key in self.__keys(event):
+                    self.__vocabulary.add(self.__word(key))
+            if type(event).check_conditions not in COMMAND_CONDITIONS:
+                self.__polled += (event,)
+                return
+            for key in self.__keys(event):
+                self.__by_command[key] = self.__by_command.get(key, ()) + (event,)
+        elif self.__reacts(event) is ScoreEvent:
+            if self.__thresholds is None:
+                self.__thresholds = ([], [])
+            triggers, events = self.__thresholds
+            i = bisect.bisect_right(triggers, event.score_trigger)
+            triggers.insert(i, event.score_trigger)
+            events.insert(i, event)
+        elif self.__reacts(event) is LocationEvent:
+            if self.__by_room is None:
+                self.__by_room = dict()
+            for room in dict.fromkeys(event.rooms):
+                self.__by_room[room] = self.__by_room.get(room, ()) + (event,)
+        else:
+            self.__polled += (event,)
+
+    def remove(self, event):
+        """ Removes given event from the receiver.
+
+        Raises:
+            ValueError: if event is not part of the receiver.
+        """
+        if event not in self.__order:
+            raise ValueError('event not in index')
+        del self.__order[event]
+        if isinstance(event, CommandEvent):
+            if self.__vocabulary is not None and event.completable:
+                for key in self.__keys(event):
+                    self.__vocabulary.discard(self.__word(key))
+            if type(event).check_conditions not in COMMAND_CONDITIONS:
+                self.__polled = tuple(e for e in self.__polled if e is not event)
+                return
+            for key in self.__keys(event):
+                matching = tuple(e for e in self.__by_command.get(key, ()) if e is not event)
+                if matching:
+                    self.__by_command[key] = matching
+                else:
+                    self.__by_command.pop(key, None)
+        elif self.__reacts(event) is ScoreEvent:
+            triggers, events = self.__thresholds
+            i = events.index(event, bisect.bisect_left(triggers, event.score_trigger))
+            del triggers[i]
+            del events[i]
+        elif self.__reacts(event) is LocationEvent:
+            for room in dict.fromkeys(event.rooms):
+                matching = tuple(e for e in self.__by_room.get(room, ()) if e is not event)
+                if matching:
+                    self.__by_room[room] = matching
+                else:
+                    self.__by_room.pop(room, None)
+        else:
+            self.__polled = tuple(e for e in self.__polled if e is not event)
+
+    def copy(self):
+        """ Answers a new index holding the same events. """
+        index = EventIndex()
+        for event in self.__order:
+            index.add(event)
+        return index
+
+    def events(self):
+        """ Returns a tuple containing every event, in insertion order. """
+        return tuple(self.__order)
+
+    def vocabulary(self):
+        """ Answers a pysud_str.CommandTrie holding the commands that
+        trigger the receiver completable events (actions as "verb objects"
+        strings, using the canonical verb). """
+        if self.__vocabulary is None:
+            self.__vocabulary = ps.CommandTrie(
+                self.__word(key) for e in self.__order
+                if isinstance(e, CommandEvent) and e.completable for key in self.__keys(e))
+        return self.__vocabulary
+
+    def candidates(self, command, action=None):
+        """ Returns a tuple containing the events given command may trigger.
+
+        Args:
+            command: a normalized user input string
+                (see pysud_str.normalize_command).
+            action: command parsed by pysud_str.parse_command, if already
+                done, otherwise it is parsed here.
+        """
+        if action is None:
+            action = ps.parse_command(command)
+        matching = self.__by_command.get(command, ())
+        acting = ()
+        if action:
+            acting = self.__by_command.get(action, ())
+            anything = self.__by_command.get(action[:1])  # verb only events
+            if anything is not None:
+                acting = tuple(sorted(acting + anything, key=self.__order.__getitem__))
+        if not self.__polled:
+            if not acting:
+                return matching
+            if not matching:
+                return acting
+        found = list(matching)
+        found.extend(acting)
+        found.extend(self.__polled)
+        found.sort(key=self.__order.__getitem__)
+        return tuple(found)
+
+    def reactions(self, old_score, score, room=None):
+        """ Returns a tuple containing the ScoreEvent and LocationEvent
+        objects a change of the player state may trigger.
+
+        Costs O(log(score events) + matching events), no matter how many
+        score and location events the receiver holds.
+
+        Args:
+            old_score: previous player score, or None to answer every
+                score event whose trigger score has been reached.
+            score: current player score. Score events whose trigger is
+                greater than old_score, but not than score, are answered.
+            room: room the player just entered, if any.
+        """
+        found = []
+        if self.__thresholds is not None and old_score != score:
+            triggers, events = self.__thresholds
+            start = 0 if old_score is None else bisect.bisect_right(triggers, old_score)
+            found.extend(events[start:bisect.bisect_right(triggers, score)])
+        if self.__by_room is not None and room is not None:
+            found.extend(self.__by_room.get(room, ()))
+        if len(found) > 1:
+            found.sort(key=self.__order.__getitem__)
+        return tuple(found)
+
+    def reactions_added(self, sequence):
+        """ Returns the ScoreEvent and LocationEvent objects offered by
+        reactions() that were added since a given point.
+
+        Args:
+            sequence: point answered by a previous call, 0 for every
+                event.
+        Returns:
+            A (tuple of events, in insertion order, current point) tuple.
+        """
+        if sequence == self.__sequence:
+            return (), sequence
+        found = []
+        for event, added in reversed(self.__order.items()):
+            if added < sequence:
+                break
+            if self.__reacts(event) is not None:
+                found.append(event)
+        found.reverse()
+        return tuple(found), self.__sequence
+
+    @staticmethod
+    def __reacts(event):
+        # Answers the class of the reactions event is indexed as, if any:
+        # events with extra conditions may hold for reasons other than
+        # the score or location, so they are polled instead.
+        if isinstance(event, ScoreEvent):
+            if type(event).check_conditions is ScoreEvent.check_conditions:
+                return ScoreEvent
+        elif isinstance(event, LocationEvent):
+            if type(event).check_conditions is LocationEvent.check_conditions:
+                return LocationEvent
+        return None
+
+    def __keys(self, event):
+        if isinstance(event, ActionEvent) and event.verb is not None:
+            return event.get_actions()
+        return dict.fromkeys(event.commands)  # once each
+
+    def __word(self, key):
+        return key if isinstance(key, str) else ' '.join(key)
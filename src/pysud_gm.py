@@ -1,9 +1,221 @@
-
 """
 Provides GameManager class to handle persistance and misc.
+
+Saved games only hold a game's session state (see
+pysud.Game.get_session_state): rooms, and the items and events they start
+with, are stored as references and resolved against the game's own rooms
+when loading. Save files are therefore small and fast to write no matter
+how big the world is.
+
+Sessions can also be saved periodically in the background, see Autosaver.
 """
 
+import atexit
+import io
+import os
+import pickle
 import shelve
+import sys
+import threading
+import time
+import weakref
+import pysud
+import pysud_journal
+
+# Header every save file starts with:
+SAVE_FILE_MAGIC = b'PYSUD-SAVE-1\n'
+
+# Seconds the interpreter waits at exit for pending autosaves:
+AUTOSAVE_EXIT_TIMEOUT = 10
+
+# World object references, cached for every pysud.World (see world_ids):
+_WORLDS_IDS = weakref.WeakKeyDictionary()
+
+
+def world_ids(rooms):
+    """ Answers a reference for every item and local event found in rooms.
+
+    Args:
+        rooms: A rooms collection.
+    Returns:
+        A python dictionary mapping id(object) to a reference tuple.
+    """
+    ids = dict()
+    for room in rooms:
+        room_id = room.get_id()
+        for i, item in enumerate(room.get_items()):
+            ids[id(item)] = ('item', room_id, i)
+        for i, event in enumerate(room.get_local_events()):
+            ids[id(event)] = ('event', room_id, i)
+    return ids
+
+
+class SessionPickler(pickle.Pickler):
+    """ Pickles a session state storing world objects as references. """
+
+    def __init__(self, file, ids):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.ids = ids
+
+    def persistent_id(self, obj):
+        if isinstance(obj, pysud.Room):
+            return ('room', obj.get_id())
+        return self.ids.get(id(obj))
+
+
+class SessionUnpickler(pickle.Unpickler):
+    """ Unpickles a session state resolving references against a game. """
+
+    def __init__(self, file, game):
+        pickle.Unpickler.__init__(self, file)
+        self.game = game
+
+    def persistent_load(self, pid):
+        room = self.game.get_room_by_id(pid[1])
+        if room is False:
+            raise pickle.UnpicklingError('room not found: ' + str(pid[1]))
+        if pid[0] == 'room':
+            return room
+        if pid[0] == 'item':
+            return room.get_items()[pid[2]]
+        if pid[0] == 'event':
+            return room.get_local_events()[pid[2]]
+        raise pickle.UnpicklingError('unknown reference: ' + str(pid))
+
+
+def dump_session(state, file, ids):
+    """ Writes a session state into a binary file object.
+
+    Args:
+        state: A state answered by pysud.Game.get_session_state().
+        file: A binary python file object.
+        ids: World references, see world_ids().
+    """
+    file.write(SAVE_FILE_MAGIC)
+    SessionPickler(file, ids).dump(state)
+
+
+def dumps_session(state, ids):
+    """ Answers the bytes dump_session() would write for a session state. """
+    file = io.BytesIO()
+    dump_session(state, file, ids)
+    return file.getvalue()
+
+
+def load_session(file, game):
+    """ Reads a session state written by dump_session() from a binary
+    file object, resolving references against given game rooms. """
+    if file.read(len(SAVE_FILE_MAGIC)) != SAVE_FILE_MAGIC:
+        raise pickle.UnpicklingError('not a pysud save file')
+    return SessionUnpickler(file, game).load()
+
+
+def is_save_file(filename):
+    """ Answers whether filename was written by GameManager.save_game(). """
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(SAVE_FILE_MAGIC)) == SAVE_FILE_MAGIC
+    except OSError:
+        return False
+
+
+class Autosaver():
+    """ Saves a game session every some turns and/or seconds without
+    blocking the game loop.
+
+    An Autosaver is a game turn observer (see pysud.Game.add_turn_observer).
+    When a save is due, the session state is taken and pickled on the game
+    thread (it is small, and objects it references may change as soon as
+    the game goes on) while writing it is left to a background thread. If
+    the game gets ahead of the disk, only the newest pending save is
+    written. Failures are reported on stderr, the game goes on.
+
+    Attributes:
+        game_mgr: GameManager whose game is saved.
+        filename: Save file name, it can be loaded as any other save.
+        every_turns: Amount of turns between saves (None to disable).
+        every_seconds: Minimum amount of seconds between saves (None to
+            disable). Since the state only changes during turns, a due
+            save is taken at the end of the next turn.
+        saves: Amount of saves written so far.
+    """
+
+    def __init__(self, game_mgr, filename='autosave.data', every_turns=10, every_seconds=None):
+        self.game_mgr = game_mgr
+        self.filename = filename
+        self.every_turns = every_turns
+        self.every_seconds = every_seconds
+        self.saves = 0
+        self.__turns = 0
+        self.__last_save = time.monotonic()
+        self.__pending = None
+        self.__writing = False
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def on_turn(self, game, command, triggered):
+        if not game.is_running():
+            return
+        self.__turns += 1
+        if self.every_turns and self.__turns >= self.every_turns:
+            self.save()
+        elif self.every_seconds and time.monotonic() - self.__last_save >= self.every_seconds:
+            self.save()
+
+    def save(self):
+        """ Takes a snapshot of the session and queues it to be written. """
+        start = time.perf_counter()
+        self.__turns = 0
+        self.__last_save = time.monotonic()
+        try:
+            data = dumps_session(self.game_mgr.game.get_session_state(), self.game_mgr.get_world_ids())
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # unpicklable user variables or items:
+            print('pysud: autosave failed (' + str(e) + ')', file=sys.stderr)
+            return
+        with self.__condition:
+            self.__pending = (data, time.perf_counter() - start)
+            self.__condition.notify()
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__write_pending, daemon=True)
+                self.__thread.start()
+                atexit.register(self.wait_until_done, AUTOSAVE_EXIT_TIMEOUT)
+
+    def wait_until_done(self, timeout=None):
+        """ Blocks until every queued save has been written.
+
+        Returns:
+            False if timeout (in seconds) expired first, True otherwise.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(lambda: not (self.__pending or self.__writing), timeout)
+
+    def __write_pending(self):
+        tmp_filename = self.filename + '.tmp'
+        while True:
+            with self.__condition:
+                while self.__pending is None:
+                    self.__condition.wait()
+                data, elapsed = self.__pending
+                self.__pending = None
+                self.__writing = True
+            start = time.perf_counter()
+            try:
+                with open(tmp_filename, 'wb') as tmp_file:
+                    tmp_file.write(data)
+                # a crash while writing leaves the previous save untouched:
+                os.replace(tmp_filename, self.filename)
+                self.saves += 1
+                metrics = self.game_mgr.game.metrics
+                if metrics is not None:
+                    metrics.on_save(elapsed + time.perf_counter() - start)
+            except OSError as e:
+                print('pysud: autosave failed (' + str(e) + ')', file=sys.stderr)
+            finally:
+                with self.__condition:
+                    self.__writing = False
+                    self.__condition.notify_all()
+
 
 class GameManager():
     """ GameManager class. A wrapper for pysud.Game class.
@@ -15,29 +227,80 @@ class GameManager():
     Attributes:
 
         game: pysud.Game class instance.
+        journal: pysud_journal.Journal class instance, None unless the
+            game has its JOURNAL_ENABLED configuration set.
+        journal_file: Journal file name.
+        autosaver: Autosaver class instance, None unless start_autosave()
+            was called.
     """
 
-    def __init__(self, new_game):
+    def __init__(self, new_game, journal_file = 'journal.data'):
         self.game = None
+        self.journal = None
+        self.journal_file = journal_file
+        self.autosaver = None
+        self.__ids = None
+        self.__ids_key = None
         self.link_with_game(new_game)
 
     def run_game(self):
+        if self.game.configs['JOURNAL_ENABLED'] and self.journal is None:
+            self.start_journal()
         self.game.run_game()
 
+    def start_journal(self, sync_every = 1, snapshot_every = 100):
+        """ Starts journaling the game's accepted commands.
+
+        A session left in the journal file (the program died before the
+        game ended) is recovered first.
+
+        Args:
+            sync_every: see pysud_journal.Journal.
+            snapshot_every: see pysud_journal.Journal.
+        Returns:
+            True if a previous session was recovered, False otherwise.
+        """
+        sequence = pysud_journal.recover(self, self.journal_file)
+        self.journal = pysud_journal.Journal(self, self.journal_file, sync_every, snapshot_every)
+        self.journal.open(sequence)
+        self.game.add_turn_observer(self.journal)
+        if sequence:
+            # compacts the journal, also dropping a torn last line:
+            self.journal.snapshot()
+            self.game.iom.show_welcome_back_message()
+        return sequence > 0
+
+    def start_autosave(self, filename = 'autosave.data', every_turns = 10, every_seconds = None):
+        """ Starts saving the game session periodically in the background.
+
+        Args:
+            filename: see Autosaver.
+            every_turns: see Autosaver.
+            every_seconds: see Autosaver.
+        """
+        if self.autosaver is not None:
+            self.game.remove_turn_observer(self.autosaver)
+        self.autosaver = Autosaver(self, filename, every_turns, every_seconds)
+        self.game.add_turn_observer(self.autosaver)
+
     def resume_game(self):
         self.game.resume_game()
 
     def save_game(self, filename = 'save.data'):
         """ Saves the current game state.
 
+        Only the session state is saved, see pysud.Game.get_session_state.
+
         Args:
             filename: Of file to be created.
         """
-        dest_file = shelve.open(filename)
-        self.game.clear_game_mgr()  # Avoid persisting the game manager
-        dest_file['data'] = self.game
-        dest_file.close()
-        self.game.set_game_mgr(self)
+        metrics = self.game.metrics
+        start = time.perf_counter()
+        state = self.game.get_session_state()
+        with open(filename, 'wb') as dest_file:
+            dump_session(state, dest_file, self.get_world_ids())
+        if metrics is not None:
+            metrics.on_save(time.perf_counter() - start)
 
     def load_game(self, filename = 'save.data'):
         """ Loads a previous game and resumes its execution.
@@ -52,15 +315,83 @@ class GameManager():
     def load_game_data(self, filename = 'save.data'):
         """ Loads a game data file without starting it.
 
+        Files written by save_game() are restored into the current game,
+        those written by export_game() replace it (stopping the current
+        one).
+
         Args:
             filename: Of file to be loaded.
+        Returns:
+            True if restored into the current game, False if replaced.
         """
-        self.game.stop_game()
-        game_file = shelve.open(filename)
-        new_game = game_file['data']
-        game_file.close()
-        self.link_with_game(new_game)
+        metrics = self.game.metrics
+        start = time.perf_counter()
+        if is_save_file(filename):
+            with open(filename, 'rb') as game_file:
+                state = load_session(game_file, self.game)
+            self.game.set_session_state(state)
+            restored = True
+        else:
+            old_game = self.game
+            old_game.stop_game()
+            game_file = shelve.open(filename)
+            new_game = game_file['data']
+            game_file.close()
+            self.link_with_game(new_game)
+            if metrics is not None:
+                # the loaded game replaces the measured one:
+                metrics.detach(old_game)
+                metrics.attach(new_game)
+            restored = False
+        if metrics is not None:
+            metrics.on_load(time.perf_counter() - start)
+        return restored
+
+    def export_game(self, filename = 'game.data'):
+        """ Persists the whole game (rooms included).
+
+        Useful to distribute an initial game data file, that can be loaded
+        using load_game_data().
+
+        Args:
+            filename: Of file to be created.
+        """
+        dest_file = shelve.open(filename)
+        dest_file['data'] = self.game
+        dest_file.close()
+
+    def get_world_ids(self):
+        """ Answers references for the current game rooms items and events
+        (see world_ids), computing them only when rooms change. """
+        world = self.game.world
+        if world is not None and self.game.rooms is world.rooms:
+            loaded_rooms = world.loaded_rooms()
+            if loaded_rooms is not world.rooms:
+                # paged world: only rooms in memory can be referenced
+                return world_ids(loaded_rooms)
+            ids = _WORLDS_IDS.get(world)
+            if ids is None:
+                ids = world_ids(world.rooms)
+                _WORLDS_IDS[world] = ids
+            return ids
+        if isinstance(self.game.rooms, pysud.ExtendedRooms):
+            ids = world_ids(world.loaded_rooms())
+            ids.update(world_ids(self.game.rooms.added_rooms))
+            return ids
+        key = (id(self.game.rooms), len(self.game.rooms))
+        if self.__ids is None or self.__ids_key != key:
+            self.__ids = world_ids(self.game.rooms)
+            self.__ids_key = key
+        return self.__ids
 
     def link_with_game(self, new_game):
         new_game.set_game_mgr(self)
+        old_game = self.game
         self.game = new_game
+        if self.journal is not None:
+            old_game.remove_turn_observer(self.journal)
+            new_game.add_turn_observer(self.journal)
+            self.journal.snapshot()
+        if self.autosaver is not None:
+            old_game.remove_turn_observer(self.autosaver)
+            new_game.add_turn_observer(self.autosaver)
@@ -0,0 +1,182 @@
+"""
+pysud journal module.
+
+Provides an append only journal of the commands a game accepted, so a
+session can be rebuilt after a crash by replaying them. Every now and
+then a snapshot of the session state (see pysud_gm.dump_session) is taken
+and the journal is truncated, keeping replays short.
+
+Journal files hold one JSON encoded [sequence number, command] pair per
+line. The snapshot (journal file name plus SNAPSHOT_SUFFIX) stores the
+sequence number of the last command it includes, so commands already in
+a snapshot are never replayed twice.
+"""
+
+import json
+import os
+import pysud_events as ev
+import pysud_gm
+import pysud_output
+
+SNAPSHOT_SUFFIX = '.snapshot'
+
+# Commands triggering only these events don't change the session state:
+UNJOURNALED_EVENTS = frozenset((ev.SaveGameEvent, ev.QuitGameEvent, ev.LookRoomEvent, ev.ShowPlayerInventoryEvent, ev.ShowScoreEvent, ev.ShowPlayerStatsEvent, ev.ShowHelpEvent, ev.ShowProfileEvent))
+
+
+class Journal():
+    """ Append only journal of a game's accepted commands.
+
+    A Journal is a game turn observer (see pysud.Game.add_turn_observer).
+
+    Attributes:
+        game_mgr: pysud_gm.GameManager whose game is journaled.
+        filename: Journal file name.
+        sync_every: Amount of commands written between fsync calls. With
+            1 (default) a crash loses at most the turn being played.
+        snapshot_every: Amount of commands between snapshots.
+        sequence: Sequence number of the last journaled command.
+    """
+
+    def __init__(self, game_mgr, filename='journal.data', sync_every=1, snapshot_every=100):
+        self.game_mgr = game_mgr
+        self.filename = filename
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.sequence = 0
+        self.__unsynced = 0
+        self.__since_snapshot = 0
+        self.__file = None
+
+    def open(self, sequence=0):
+        """ Opens the journal file for appending.
+
+        Args:
+            sequence: Sequence number of the last command already in the
+                journal (see recover()).
+        """
+        self.sequence = sequence
+        self.__file = open(self.filename, 'a', encoding='utf-8')
+
+    def on_turn(self, game, command, triggered):
+        if not game.is_running():
+            # the session is over, nothing left to recover:
+            self.discard()
+        elif any(isinstance(e, ev.LoadGameEvent) for e in triggered):
+            # the whole state was replaced, start over from it:
+            self.snapshot()
+        elif any(type(e) not in UNJOURNALED_EVENTS for e in triggered):
+            self.append(command)
+
+    def append(self, command):
+        """ Appends a command to the journal. """
+        self.sequence += 1
+        self.__file.write(json.dumps([self.sequence, command]) + '\n')
+        self.__unsynced += 1
+        if self.__unsynced >= self.sync_every:
+            self.sync()
+        self.__since_snapshot += 1
+        if self.__since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def sync(self):
+        """ Forces journaled commands to disk. """
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__unsynced = 0
+
+    def pending_amount(self):
+        """ Answers how many journaled commands are not on disk yet. """
+        return self.__unsynced
+
+    def snapshot(self):
+        """ Saves the current session state and truncates the journal. """
+        tmp_filename = self.filename + SNAPSHOT_SUFFIX + '.tmp'
+        state = self.game_mgr.game.get_session_state()
+        with open(tmp_filename, 'wb') as tmp_file:
+            pysud_gm.dump_session((self.sequence, state), tmp_file, self.game_mgr.get_world_ids())
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_filename, self.filename + SNAPSHOT_SUFFIX)
+        # a crash right here is fine: replay skips commands in the snapshot
+        self.__file.close()
+        self.__file = open(self.filename, 'w', encoding='utf-8')
+        self.__unsynced = 0
+        self.__since_snapshot = 0
+
+    def close(self):
+        """ Syncs and closes the journal file. """
+        if self.__file is not None:
+            self.sync()
+            self.__file.close()
+            self.__file = None
+
+    def discard(self):
+        """ Closes and removes the journal and its snapshot. """
+        self.close()
+        for filename in (self.filename, self.filename + SNAPSHOT_SUFFIX):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+
+def read_commands(filename, after=0):
+    """ Reads the commands stored in a journal file.
+
+    A torn last line (the process died while writing it) is ignored.
+
+    Args:
+        filename: Journal file name.
+        after: Sequence number of the last command to skip.
+    Returns:
+        A python list of (sequence number, command) pairs.
+    """
+    commands = []
+    with open(filename, 'r', encoding='utf-8') as journal_file:
+        for line in journal_file:
+            try:
+                sequence, command = json.loads(line)
+            except ValueError:
+                break
+            if sequence > after:
+                commands.append((sequence, command))
+    return commands
+
+
+def replay(game, commands):
+    """ Runs commands through a game dispatch loop without any output.
+
+    Args:
+        game: A pysud.Game object.
+        commands: A collection of commands (strings).
+    """
+    output = game.iom.output
+    game.iom.output = pysud_output.NullOutput()
+    try:
+        for command in commands:
+            game.run_turn(command)
+    finally:
+        game.iom.output = output
+
+
+def recover(game_mgr, filename='journal.data'):
+    """ Rebuilds a journaled session into a game manager's game.
+
+    The snapshot (if any) is loaded first, then newer commands are
+    replayed.
+
+    Returns:
+        Sequence number of the last recovered command (0 if there was
+        nothing to recover).
+    """
+    sequence = 0
+    snapshot_filename = filename + SNAPSHOT_SUFFIX
+    if os.path.exists(snapshot_filename):
+        with open(snapshot_filename, 'rb') as snapshot_file:
+            sequence, state = pysud_gm.load_session(snapshot_file, game_mgr.game)
+        game_mgr.game.set_session_state(state)
+    if os.path.exists(filename):
+        commands = read_commands(filename, sequence)
+        replay(game_mgr.game, [c for s, c in commands])
+        if commands:
+            sequence = commands[-1][0]
+    return sequence
@@ -0,0 +1,323 @@
+"""
+pysud metrics module.
+
+Keeps counters, gauges and histograms about running games (sessions,
+turns, turn latency, save and load durations, journal lag, memory) and
+serves them over HTTP in the Prometheus text exposition format, so a
+locally run collector can scrape them.
+
+Usage:
+    metrics = pysud_metrics.GameMetrics()
+    pysud_metrics.serve(metrics.registry, port=9400)
+    ...
+    metrics.attach(game)  # for every game to be measured
+
+Games not attached run exactly as before. Attached games only update a
+counter and a histogram bucket per turn; gauges (journal lag, memory) are
+computed when scraped.
+"""
+
+import bisect
+import http.server
+import os
+import sys
+import threading
+import weakref
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9400
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram bucket upper bounds, in seconds:
+TURN_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+FILE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+
+def format_value(value):
+    """ Answers a number as written in the exposition format. """
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter():
+    """ A value that only goes up.
+
+    Attributes:
+        name: Metric name.
+        help: Metric description.
+        value: Current value.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help=''):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        """ Answers a list of (sample name, labels string, value) tuples. """
+        return [(self.name, '', self.value)]
+
+
+class Gauge():
+    """ A value that goes up and down.
+
+    Attributes:
+        name: Metric name.
+        help: Metric description.
+        function: Function answering the value when scraped, None if the
+            value is set instead.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, help='', function=None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.__value = 0
+
+    def set(self, value):
+        self.__value = value
+
+    def inc(self, amount=1):
+        self.__value += amount
+
+    def dec(self, amount=1):
+        self.__value -= amount
+
+    def get(self):
+        return self.function() if self.function is not None else self.__value
+
+    def samples(self):
+        return [(self.name, '', self.get())]
+
+
+class Histogram():
+    """ Distribution of observed values over fixed buckets.
+
+    Attributes:
+        name: Metric name.
+        help: Metric description.
+        bounds: Sorted tuple of bucket upper bounds (an implicit +Inf
+            bucket follows the last one).
+        count: Amount of observed values.
+        sum: Sum of the observed values.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help='', bounds=TURN_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(bounds))
+        self.count = 0
+        self.sum = 0.0
+        self.__counts = [0] * (len(self.bounds) + 1)  # not cumulative
+
+    def observe(self, value):
+        self.__counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self):
+        samples = []
+        cumulative = 0
+        for bound, amount in zip(self.bounds + (float('inf'),), self.__counts):
+            cumulative += amount
+            samples.append((self.name + '_bucket', '{le="' + format_value(float(bound)) + '"}', cumulative))
+        samples.append((self.name + '_sum', '', self.sum))
+        samples.append((self.name + '_count', '', self.count))
+        return samples
+
+
+class Registry():
+    """ A collection of metrics, exposed together. """
+
+    def __init__(self):
+        self.__metrics = dict()  # name -> metric
+
+    def register(self, metric):
+        """ Adds a metric.
+
+        Returns:
+            The given metric.
+        Raises:
+            ValueError: if there is already a metric with the same name.
+        """
+        if metric.name in self.__metrics:
+            raise ValueError('duplicated metric name: ' + metric.name)
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        """ Answers the metric registered under name, None if there is
+        none. """
+        return self.__metrics.get(name)
+
+    def exposition(self):
+        """ Answers every metric in the Prometheus text exposition
+        format. """
+        lines = []
+        for metric in self.__metrics.values():
+            if metric.help:
+                lines.append('# HELP ' + metric.name + ' ' + metric.help.replace('\\', '\\\\').replace('\n', '\\n'))
+            lines.append('# TYPE ' + metric.name + ' ' + metric.kind)
+            for name, labels, value in metric.samples():
+                lines.append(name + labels + ' ' + format_value(value))
+        return '\n'.join(lines) + '\n'
+
+
+def resident_memory():
+    """ Answers the process resident memory in bytes, 0 if unknown. """
+    try:
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # peak instead of current, in kilobytes (bytes on macOS):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class GameMetrics():
+    """ The metrics of the games hosted by a process.
+
+    Games are measured once attached (see attach()); a pysud.Game calls
+    on_turn() after every turn and its GameManager calls on_save() and
+    on_load() after saving and loading.
+
+    Attributes:
+        registry: Registry holding the metrics.
+        turns: Counter of turns run.
+        unmatched_turns: Counter of turns whose input triggered nothing.
+        turn_seconds: Histogram of turn durations.
+        save_seconds: Histogram of save durations (autosaves included).
+        load_seconds: Histogram of load durations.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else Registry()
+        # games are attached on the game threads but read by the HTTP
+        # handler thread when scraped (see games()):
+        self.__games = weakref.WeakSet()
+        self.__games_lock = threading.Lock()
+        self.__baseline_memory = resident_memory()
+        register = self.registry.register
+        register(Gauge('pysud_sessions_active', 'Game sessions being measured.', self.sessions_amount))
+        self.turns = register(Counter('pysud_turns_total', 'Turns run.'))
+        self.unmatched_turns = register(Counter(
+            'pysud_unmatched_turns_total', 'Turns whose input did not trigger any event.'))
+        self.turn_seconds = register(Histogram(
+            'pysud_turn_duration_seconds', 'Time taken by each turn.', TURN_BUCKETS))
+        self.save_seconds = register(Histogram(
+            'pysud_save_duration_seconds', 'Time taken to save a game session.', FILE_BUCKETS))
+        self.load_seconds = register(Histogram(
+            'pysud_load_duration_seconds', 'Time taken to load a game.', FILE_BUCKETS))
+        register(Gauge('pysud_journal_unsynced_commands',
+                       'Journaled commands not synced to disk yet, all sessions together.', self.journal_lag))
+        register(Gauge('pysud_process_resident_bytes', 'Process resident memory.', resident_memory))
+        register(Gauge('pysud_session_resident_bytes',
+                       'Resident memory gained since startup, per active session.', self.memory_per_session))
+
+    def attach(self, game):
+        """ Starts measuring a pysud.Game. """
+        game.metrics = self
+        with self.__games_lock:
+            self.__games.add(game)
+
+    def detach(self, game):
+        """ Stops measuring a pysud.Game (games are also forgotten once
+        garbage collected). """
+        if game.metrics is self:
+            game.metrics = None
+        with self.__games_lock:
+            self.__games.discard(game)
+
+    def on_turn(self, triggered, seconds):
+        """ Records a turn that took some seconds and triggered some
+        events. """
+        self.turns.value += 1
+        if not triggered:
+            self.unmatched_turns.value += 1
+        self.turn_seconds.observe(seconds)
+
+    def on_save(self, seconds):
+        self.save_seconds.observe(seconds)
+
+    def on_load(self, seconds):
+        self.load_seconds.observe(seconds)
+
+    def games(self):
+        """ Answers a list of the attached games, safe to iterate from any
+        thread. """
+        with self.__games_lock:
+            return list(self.__games)
+
+    def sessions_amount(self):
+        return len(self.games())
+
+    def journal_lag(self):
+        """ Answers how many journaled commands of the attached games are
+        not on disk yet. """
+        lag = 0
+        for game in self.games():
+            game_mgr = game.get_game_mgr()
+            if game_mgr is not None and game_mgr.journal is not None:
+                lag += game_mgr.journal.pending_amount()
+        return lag
+
+    def memory_per_session(self):
+        """ Answers the resident memory gained since these metrics were
+        created, divided among the active sessions. """
+        sessions = self.sessions_amount()
+        if not sessions:
+            return 0
+        return max(resident_memory() - self.__baseline_memory, 0) // sessions
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """ Answers GET /metrics requests with the server registry. """
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scraped every few seconds, not worth logging
+
+
+def serve(registry, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """ Serves a registry over HTTP from a background (daemon) thread.
+
+    Args:
+        registry: Registry to serve.
+        host: Address to listen on, the local host only by default.
+        port: TCP port to listen on, 0 for any free one.
+    Returns:
+        The http.server.ThreadingHTTPServer object (its server_address
+        attribute tells the actual port, shutdown() stops it).
+    """
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,253 @@
+"""
+pysud output module.
+
+Contains the output backends an IOManager writes game messages to:
+console, null (headless), in memory capture, file/log and text to speech.
+"""
+
+import atexit
+import collections
+import sys
+import threading
+
+# Seconds pending speech may delay the interpreter exit (or a close()):
+SPEECH_EXIT_TIMEOUT = 10
+
+
+class OutputBackend():
+    """ Base (abstract) output backend. """
+
+    def write(self, string):
+        """ Outputs a given message string. """
+        pass
+
+    def on_user_input(self):
+        """ This method will be called when the player enters a new
+        command. """
+        pass
+
+    def close(self):
+        """ Releases any resource held by the receiver. """
+        pass
+
+
+class ConsoleOutput(OutputBackend):
+    """ Prints messages to std out. """
+
+    def write(self, string):
+        print(string)
+
+
+class NullOutput(OutputBackend):
+    """ Discards every message. Useful for headless games and tests. """
+
+
+class CaptureOutput(OutputBackend):
+    """ Keeps every message in memory, for headless games whose output
+    is checked afterwards (see pysud_runner).
+
+    Attributes:
+        messages: A python list holding the written messages.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, string):
+        self.messages.append(string)
+
+    def text(self):
+        """ Answers the messages written so far, one per line. """
+        return ''.join(message + '\n' for message in self.messages)
+
+
+class FileOutput(OutputBackend):
+    """ Appends messages, one per line, to a text file.
+
+    Attributes:
+        file: The python file object messages are written to.
+    """
+
+    def __init__(self, file_or_path, encoding='utf-8'):
+        if isinstance(file_or_path, str):
+            self.file = open(file_or_path, 'a', encoding=encoding)
+            self.__owned = True
+        else:
+            self.file = file_or_path
+            self.__owned = False
+
+    def write(self, string):
+        self.file.write(string + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.__owned:
+            self.file.close()
+
+
+class MultiOutput(OutputBackend):
+    """ Writes every message to several backends.
+
+    Attributes:
+        backends: A tuple containing the OutputBackend objects to use.
+    """
+
+    def __init__(self, *backends):
+        self.backends = backends
+
+    def write(self, string):
+        for backend in self.backends:
+            backend.write(string)
+
+    def on_user_input(self):
+        for backend in self.backends:
+            backend.on_user_input()
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+class TTSOutput(OutputBackend):
+    """ Speaks messages through a pyttsx3 engine.
+
+    Nothing (not even pyttsx3) is loaded until the first message is
+    written, so creating games with this backend costs nothing. If pyttsx3
+    or its driver is not available a warning is printed and messages are
+    discarded.
+
+    Attributes:
+        policy: What to do with pending messages when the player enters
+            a new command (see SpeechQueue).
+        driver: pyttsx3 driver name.
+    """
+
+    def __init__(self, policy='keep', driver='espeak'):
+        if policy not in SpeechQueue.POLICIES:
+            raise ValueError('unknown speech policy: ' + str(policy))
+        self.policy = policy
+        self.driver = driver
+        self.__speech = None
+
+    def write(self, string):
+        if self.__speech is None:
+            self.__speech = SpeechQueue(self.policy, self.driver)
+        self.__speech.say(string)
+
+    def on_user_input(self):
+        if self.__speech is not None:
+            self.__speech.on_user_input()
+
+    def close(self):
+        if self.__speech is not None:
+            self.__speech.wait_until_done(SPEECH_EXIT_TIMEOUT)
+            self.__speech.stop()
+
+
+def default_output(tts_enabled=True, speech_policy='keep'):
+    """ Answers the backend used by games not given one: the console,
+    plus speech if enabled. """
+    if tts_enabled:
+        return MultiOutput(ConsoleOutput(), TTSOutput(speech_policy))
+    return ConsoleOutput()
+
+
+class SpeechQueue():
+    """
+    Speaks messages through a TTS engine on a background thread.
+
+    Messages are queued and spoken in order while the game keeps running,
+    so the player may type a new command while speech continues. Pending
+    messages are still spoken when the program exits, for up to
+    SPEECH_EXIT_TIMEOUT seconds.
+
+    Attributes:
+        policy: What to do with pending messages when the player enters
+            a new command:
+                'keep': speak them all anyway.
+                'drop': discard them.
+                'merge': speak them all as a single utterance.
+        driver: pyttsx3 driver name.
+    """
+
+    POLICIES = ('keep', 'drop', 'merge')
+
+    def __init__(self, policy='keep', driver='espeak'):
+        if policy not in self.POLICIES:
+            raise ValueError('unknown speech policy: ' + str(policy))
+        self.policy = policy
+        self.driver = driver
+        self.__available = True
+        self.__pending = collections.deque()
+        self.__speaking = False
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def say(self, string):
+        """ Queues a given string to be spoken. """
+        with self.__condition:
+            if not self.__available:
+                return
+            self.__pending.append(string)
+            self.__condition.notify()
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__speak_pending, daemon=True)
+                self.__thread.start()
+                atexit.register(self.wait_until_done, SPEECH_EXIT_TIMEOUT)
+
+    def on_user_input(self):
+        """ Applies the receiver policy to the pending messages. """
+        with self.__condition:
+            if self.policy == 'drop':
+                self.__pending.clear()
+            elif self.policy == 'merge' and len(self.__pending) > 1:
+                merged = ' '.join(self.__pending)
+                self.__pending.clear()
+                self.__pending.append(merged)
+
+    def stop(self):
+        """ Discards pending messages and stops the speech thread once the
+        current message (if any) is spoken. Further messages are ignored. """
+        with self.__condition:
+            self.__available = False
+            self.__pending.clear()
+            self.__condition.notify_all()
+
+    def pending_amount(self):
+        """ Answers how many messages are waiting to be spoken. """
+        return len(self.__pending)
+
+    def wait_until_done(self, timeout=None):
+        """ Blocks until every queued message has been spoken.
+
+        Returns:
+            False if timeout (in seconds) expired first, True otherwise.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(
+                lambda: not self.__available or not (self.__pending or self.__speaking), timeout)
+
+    def __speak_pending(self):
+        # pyttsx3 engines must be used from the thread that created them:
+        try:
+            import pyttsx3
+            engine = pyttsx3.init(self.driver)
+        except Exception as e:
+            with self.__condition:
+                self.__available = False
+                self.__pending.clear()
+                self.__condition.notify_all()
+            print('pysud: speech disabled (' + str(e) + ')', file=sys.stderr)
+            return
+        while True:
+            with self.__condition:
+                self.__speaking = False
+                self.__condition.notify_all()
+                while self.__available and not self.__pending:
+                    self.__condition.wait()
+                if not self.__available:
+                    return  # stopped
+                string = self.__pending.popleft()
+                self.__speaking = True
+            engine.say(string)
+            engine.runAndWait()
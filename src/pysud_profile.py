@@ -0,0 +1,182 @@
+"""
+pysud profile module.
+
+Measures where a game spends its time: whole turns, the check_conditions
+and on_success methods of every event class, and the output (console,
+speech...) written during turns. Times are kept in memory as log scale
+histograms, so percentiles are available at any moment at a fixed cost.
+
+Profiling is opt-in (see pysud.Game.enable_profiling); games not being
+profiled run exactly as before. While enabled, the 'profile' command
+shows the collected statistics (games not being profiled don't reserve
+it).
+"""
+
+import math
+import time
+import pysud_output
+
+# Histogram buckets per doubling of the measured time (a bucket spans at
+# most 1 / BUCKETS_PER_OCTAVE of its lower bound):
+BUCKETS_PER_OCTAVE = 8
+
+
+class Histogram():
+    """ Log scale histogram of durations.
+
+    Percentiles are answered with the upper bound of their bucket, so
+    they may exceed the exact value by 1 / BUCKETS_PER_OCTAVE at most.
+
+    Attributes:
+        count: Amount of recorded durations.
+        total: Sum of the recorded durations, in seconds.
+        max: Longest recorded duration, in seconds.
+    """
+
+    __slots__ = ('count', 'total', 'max', '__buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.__buckets = dict()  # bucket number -> amount of durations
+
+    def add(self, seconds):
+        """ Records a duration. """
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > 0.0:
+            mantissa, exponent = math.frexp(seconds)  # mantissa in [0.5, 1)
+            bucket = exponent * BUCKETS_PER_OCTAVE + int((mantissa - 0.5) * 2 * BUCKETS_PER_OCTAVE)
+        else:
+            bucket = None
+        self.__buckets[bucket] = self.__buckets.get(bucket, 0) + 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """ Answers the duration (in seconds) percent of the recorded
+        durations don't exceed. """
+        if not self.count:
+            return 0.0
+        rank = percent / 100.0 * self.count
+        seen = self.__buckets.get(None, 0)
+        if seen >= rank:
+            return 0.0
+        for bucket in sorted(b for b in self.__buckets if b is not None):
+            seen += self.__buckets[bucket]
+            if seen >= rank:
+                exponent, step = divmod(bucket + 1, BUCKETS_PER_OCTAVE)
+                return min(math.ldexp(0.5 + step / (2.0 * BUCKETS_PER_OCTAVE), exponent), self.max)
+        return self.max
+
+
+class Profiler():
+    """ Collects duration histograms, by name.
+
+    Names used by pysud.Game: 'turn', 'output', and the event class name
+    followed by '.check_conditions' or '.on_success'.
+
+    Attributes:
+        clock: Function answering the current time, in seconds.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.__histograms = dict()  # name -> Histogram
+
+    def record(self, name, seconds):
+        """ Adds a duration to the name histogram. """
+        histogram = self.__histograms.get(name)
+        if histogram is None:
+            histogram = self.__histograms[name] = Histogram()
+        histogram.add(seconds)
+
+    def get_histogram(self, name):
+        """ Answers the Histogram recorded under name, None if there is
+        none. """
+        return self.__histograms.get(name)
+
+    def reset(self):
+        """ Discards every recorded duration. """
+        self.__histograms.clear()
+
+    def run_events(self, game, events, triggered):
+        """ Checks (and triggers) some events, as pysud.Game does, timing
+        each event check_conditions and on_success calls.
+
+        Args:
+            game: The pysud.Game the events belong to.
+            events: An iterable of events.
+            triggered: A python list the triggered events are appended to.
+        """
+        clock = self.clock
+        for event in events:
+            name = type(event).__name__
+            start = clock()
+            happened = event.check_conditions(game)
+            end = clock()
+            self.record(name + '.check_conditions', end - start)
+            if happened:
+                event.on_success(game)
+                self.record(name + '.on_success', clock() - end)
+                triggered.append(event)
+
+    def stats(self):
+        """ Answers the recorded statistics.
+
+        Returns:
+            A python dictionary mapping every name to a dictionary holding
+            'count', 'total', 'mean', 'p50', 'p95', 'p99' and 'max' (all
+            of them but count in seconds).
+        """
+        stats = dict()
+        for name, histogram in self.__histograms.items():
+            stats[name] = {
+                'count': histogram.count,
+                'total': histogram.total,
+                'mean': histogram.mean(),
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'p99': histogram.percentile(99),
+                'max': histogram.max}
+        return stats
+
+    def report(self):
+        """ Answers a list of human readable lines, one per name, taking
+        the most time first. Times are in milliseconds. """
+        lines = [format('', '<40s') + format('count', '>8s') + ''.join(
+            format(column, '>9s') for column in ('total', 'p50', 'p95', 'p99', 'max'))]
+        stats = self.stats()
+        for name in sorted(stats, key=lambda n: -stats[n]['total']):
+            entry = stats[name]
+            lines.append(format(name[:40], '<40s') + format(entry['count'], '8d') + ''.join(
+                format(entry[column] * 1000, '9.3f') for column in ('total', 'p50', 'p95', 'p99', 'max')))
+        return lines
+
+
+class ProfiledOutput(pysud_output.OutputBackend):
+    """ Times the writes to an output backend.
+
+    Attributes:
+        backend: The OutputBackend object being timed.
+        profiler: Profiler recording the 'output' durations.
+    """
+
+    def __init__(self, backend, profiler):
+        self.backend = backend
+        self.profiler = profiler
+
+    def write(self, string):
+        start = self.profiler.clock()
+        self.backend.write(string)
+        self.profiler.record('output', self.profiler.clock() - start)
+
+    def on_user_input(self):
+        self.backend.on_user_input()
+
+    def close(self):
+        self.backend.close()
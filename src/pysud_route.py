@@ -0,0 +1,328 @@
+"""
+pysud route module.
+
+Finds the shortest way between two rooms, following transitions. Rooms
+are graph nodes (identified by room id) and every transition is an edge,
+so routes are answered without touching the rooms themselves, which
+matters for worlds larger than the available memory (see pysud_store).
+
+Next hop tables are computed on demand, one per destination room, with a
+breadth first search over the transitions reversed: a single search
+answers the route from every room to that destination. The most recently
+used tables are cached, and kept up to date as transitions are added or
+removed.
+
+Usage:
+    routes = pysud_route.RoutingIndex(transition_pairs)
+    routes.route(origin_id, destination_id)  # -> ['b', 'c', destination_id]
+"""
+
+import array
+import collections
+
+# Next hop tables kept by default (each one takes 8 bytes per room):
+CACHE_SIZE = 32
+
+_UNREACHABLE = -1
+
+
+def transition_pairs(rooms):
+    """ Yields an (origin room id, destination room id) pair for every
+    transition of some pysud.Room objects. """
+    for room in rooms:
+        room_id = room.get_id()
+        for transition in room.get_transitions():
+            yield room_id, transition.get_destination_id()
+
+
+class _Adjacency():
+    """ Node number -> neighbour node numbers.
+
+    Neighbours are packed into two arrays (offsets and targets) rather
+    than kept in a list per node: huge worlds are built much faster and
+    the garbage collector has nothing to traverse. Nodes changed later
+    get a list of their own.
+    """
+
+    __slots__ = ('offsets', 'targets', 'changed')
+
+    def __init__(self, size, origins=(), targets=()):
+        offsets = array.array('i', (0,)) * (size + 1)
+        for origin in origins:
+            offsets[origin + 1] += 1
+        for node in range(size):
+            offsets[node + 1] += offsets[node]
+        packed = array.array('i', (0,)) * len(targets)
+        free = offsets[:-1]  # next free position of every node
+        for origin, target in zip(origins, targets):
+            packed[free[origin]] = target
+            free[origin] += 1
+        self.offsets = offsets
+        self.targets = packed
+        self.changed = dict()  # node number -> list of node numbers
+
+    def copy(self):
+        adjacency = _Adjacency(0)
+        adjacency.offsets = self.offsets  # never changed once built
+        adjacency.targets = self.targets
+        adjacency.changed = {node: list(neighbours) for node, neighbours in self.changed.items()}
+        return adjacency
+
+    def get(self, node):
+        neighbours = self.changed.get(node)
+        if neighbours is not None:
+            return neighbours
+        if node + 1 < len(self.offsets):
+            return self.targets[self.offsets[node]:self.offsets[node + 1]]
+        return ()
+
+    def add(self, node, target):
+        self.__change(node).append(target)
+
+    def remove(self, node, target):
+        self.__change(node).remove(target)
+
+    def __change(self, node):
+        neighbours = self.changed.get(node)
+        if neighbours is None:
+            neighbours = self.changed[node] = list(self.get(node))
+        return neighbours
+
+
+class RoutingIndex():
+    """ Shortest routes between rooms, by room id.
+
+    Attributes:
+        cache_size: Maximum amount of next hop tables kept in memory.
+    """
+
+    def __init__(self, transitions=(), cache_size=CACHE_SIZE):
+        """
+        Args:
+            transitions: An iterable of (origin room id, destination room
+                id) pairs.
+            cache_size: see Attributes.
+        """
+        self.cache_size = cache_size
+        self.__nodes = dict()  # room id -> node number
+        self.__room_ids = []  # node number -> room id
+        # destination node -> (distances, next hops), least recently used first:
+        self.__tables = collections.OrderedDict()
+        origins, destinations = array.array('i'), array.array('i')
+        nodes = self.__nodes
+        for origin_id, destination_id in transitions:
+            # (same as __node, nodes being numbered in insertion order)
+            origins.append(nodes.setdefault(origin_id, len(nodes)))
+            destinations.append(nodes.setdefault(destination_id, len(nodes)))
+        self.__room_ids = list(nodes)
+        size = len(self.__room_ids)
+        self.__successors = _Adjacency(size, origins, destinations)
+        self.__predecessors = _Adjacency(size, destinations, origins)
+
+    def __len__(self):
+        return len(self.__room_ids)
+
+    def __contains__(self, room_id):
+        return room_id in self.__nodes
+
+    def copy(self):
+        """ Answers a new index holding the same transitions (cached
+        tables are not copied). """
+        index = RoutingIndex(cache_size=self.cache_size)
+        index.__nodes = dict(self.__nodes)
+        index.__room_ids = list(self.__room_ids)
+        index.__successors = self.__successors.copy()
+        index.__predecessors = self.__predecessors.copy()
+        return index
+
+    def add_transition(self, origin_id, destination_id):
+        """ Adds a transition, updating the cached tables in place: routes
+        can only get shorter, and only for the rooms from which the new
+        transition origin is reached. """
+        origin, destination = self.__node(origin_id), self.__node(destination_id)
+        self.__successors.add(origin, destination)
+        self.__predecessors.add(destination, origin)
+        for table in self.__tables.values():
+            distances, hops = self.__extend(table)
+            if distances[destination] == _UNREACHABLE:
+                continue
+            distance = distances[destination] + 1
+            if distances[origin] != _UNREACHABLE and distances[origin] <= distance:
+                continue
+            distances[origin] = distance
+            hops[origin] = destination
+            # shorter routes spread to the rooms leading to origin:
+            queue = collections.deque((origin,))
+            while queue:
+                node = queue.popleft()
+                distance = distances[node] + 1
+                for predecessor in self.__predecessors.get(node):
+                    if distances[predecessor] == _UNREACHABLE or distances[predecessor] > distance:
+                        distances[predecessor] = distance
+                        hops[predecessor] = node
+                        queue.append(predecessor)
+
+    def remove_transition(self, origin_id, destination_id):
+        """ Removes a transition (one of them, if origin has many to the
+        same destination). Only cached tables routing through it are
+        dropped, to be computed again when needed.
+
+        Raises:
+            ValueError: if there is no such transition.
+        """
+        origin, destination = self.__nodes.get(origin_id), self.__nodes.get(destination_id)
+        if origin is None or destination is None or destination not in self.__successors.get(origin):
+            raise ValueError('transition not in index')
+        self.__successors.remove(origin, destination)
+        self.__predecessors.remove(destination, origin)
+        if destination in self.__successors.get(origin):
+            return  # an equal transition is still there
+        for target in list(self.__tables):
+            hops = self.__tables[target][1]
+            if origin < len(hops) and hops[origin] == destination:
+                del self.__tables[target]
+
+    def reachable(self, origin_id):
+        """ Answers a set holding the ids of the rooms that can be reached
+        from origin (origin included). """
+        origin = self.__nodes.get(origin_id)
+        if origin is None:
+            return {origin_id}
+        seen = {origin}
+        frontier = [origin]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for successor in self.__successors.get(node):
+                    if successor not in seen:
+                        seen.add(successor)
+                        next_frontier.append(successor)
+            frontier = next_frontier
+        return {self.__room_ids[node] for node in seen}
+
+    def next_hop(self, origin_id, destination_id):
+        """ Answers the id of the room to go to from origin on the way to
+        destination, None if destination can't be reached (or it is
+        origin itself). """
+        origin, destination = self.__nodes.get(origin_id), self.__nodes.get(destination_id)
+        if origin is None or destination is None or origin == destination:
+            return None
+        hop = self.__table(destination)[1][origin]
+        return None if hop == _UNREACHABLE else self.__room_ids[hop]
+
+    def distance(self, origin_id, destination_id):
+        """ Answers the amount of transitions in the shortest route from
+        origin to destination, None if there is no route. """
+        if origin_id == destination_id:
+            return 0
+        origin, destination = self.__nodes.get(origin_id), self.__nodes.get(destination_id)
+        if origin is None or destination is None:
+            return None
+        distance = self.__table(destination)[0][origin]
+        return None if distance == _UNREACHABLE else distance
+
+    def route(self, origin_id, destination_id):
+        """ Answers the shortest route from origin to destination.
+
+        Returns:
+            A python list holding the ids of the rooms to go through, in
+            order, destination included (an empty list if origin is the
+            destination), or None if there is no route.
+        """
+        if origin_id == destination_id:
+            return []
+        origin, destination = self.__nodes.get(origin_id), self.__nodes.get(destination_id)
+        if origin is None or destination is None:
+            return None
+        hops = self.__table(destination)[1]
+        if hops[origin] == _UNREACHABLE:
+            return None
+        route = []
+        node = origin
+        while node != destination:
+            node = hops[node]
+            route.append(self.__room_ids[node])
+        return route
+
+    def nearest(self, origin_id, destination_ids):
+        """ Answers the shortest route from origin to the nearest one of
+        some destinations, found with a single breadth first search.
+
+        Args:
+            origin_id: Origin room id.
+            destination_ids: A python set holding destination room ids.
+        Returns:
+            A (destination room id, route) tuple, route as answered by
+            route(), or None if no destination can be reached.
+        """
+        if origin_id in destination_ids:
+            return origin_id, []
+        origin = self.__nodes.get(origin_id)
+        targets = {self.__nodes[d] for d in destination_ids if d in self.__nodes}
+        if origin is None or not targets:
+            return None
+        previous = {origin: None}  # node -> node it was reached from
+        frontier = [origin]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for successor in self.__successors.get(node):
+                    if successor in previous:
+                        continue
+                    previous[successor] = node
+                    if successor in targets:
+                        route = []
+                        while successor != origin:
+                            route.append(self.__room_ids[successor])
+                            successor = previous[successor]
+                        route.reverse()
+                        return route[-1], route
+                    next_frontier.append(successor)
+            frontier = next_frontier
+        return None
+
+    def __node(self, room_id):
+        node = self.__nodes.get(room_id)
+        if node is None:
+            node = self.__nodes[room_id] = len(self.__room_ids)
+            self.__room_ids.append(room_id)
+        return node
+
+    def __table(self, destination):
+        table = self.__tables.get(destination)
+        if table is None:
+            table = self.__search(destination)
+            self.__tables[destination] = table
+            while len(self.__tables) > self.cache_size:
+                self.__tables.popitem(last=False)
+        else:
+            self.__tables.move_to_end(destination)
+            self.__extend(table)
+        return table
+
+    def __extend(self, table):
+        missing = len(self.__room_ids) - len(table[0])
+        if missing:  # rooms added since the table was computed
+            for column in table:
+                column.extend(array.array('i', (_UNREACHABLE,)) * missing)
+        return table
+
+    def __search(self, destination):
+        # breadth first, from destination along transitions reversed:
+        distances = array.array('i', (_UNREACHABLE,)) * len(self.__room_ids)
+        hops = array.array('i', (_UNREACHABLE,)) * len(self.__room_ids)
+        predecessors = self.__predecessors
+        distances[destination] = 0
+        frontier = [destination]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for node in frontier:
+                for predecessor in predecessors.get(node):
+                    if distances[predecessor] == _UNREACHABLE:
+                        distances[predecessor] = distance
+                        hops[predecessor] = node
+                        next_frontier.append(predecessor)
+            frontier = next_frontier
+        return distances, hops
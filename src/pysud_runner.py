@@ -0,0 +1,257 @@
+"""
+pysud runner module.
+
+Plays games headlessly from command scripts: text files holding one
+player command per line (blank lines and lines starting with '#' are
+skipped). Every command goes through pysud.Game.run_turn, just like when
+typed at the prompt, and the game output is captured instead of printed.
+Many scripts are played at once, one per process of a process pool.
+
+A script may be paired with an expected transcript: the captured output
+of a script SCRIPT is compared against SCRIPT + EXPECTED_SUFFIX if such
+a file exists, so a directory of scripts works as a content regression
+suite.
+
+Usage:
+    python3 pysud_runner.py [-j JOBS] [-n REPEAT] [-o OUTPUT_DIR] GAME SCRIPT...
+
+GAME is either a game script (a python file defining make_world() or
+make_game(), see pysud_server), a world store (.db, see pysud_store) or
+a rooms source file (rooms.json, rooms.xml, loaded through pysud_cache).
+Transcripts are written into OUTPUT_DIR when given. The exit code is 1
+if any script failed or didn't match its expected transcript.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+import traceback
+import pysud
+import pysud_output
+import pysud_str
+
+EXPECTED_SUFFIX = '.expected'
+TRANSCRIPT_SUFFIX = '.out'
+
+# pysud.Game options every game is created with (see pysud_server):
+GAME_OPTIONS = {'save_enabled': False, 'tts_enabled': False, 'output': pysud_output.NullOutput()}
+
+# Game factory used by the worker processes, see run_scripts():
+_game_factory = None
+
+
+def load_game_factory(game_path):
+    """ Answers a game factory for a given game script, world store or
+    rooms source file.
+
+    Returns:
+        A callable receiving a player name plus pysud.Game keyword
+        arguments, answering a new pysud.Game.
+    """
+    if game_path.endswith('.py'):
+        import pysud_server
+        return pysud_server.load_game_factory(game_path)
+    if game_path.endswith('.db'):
+        import pysud_store
+        return pysud_store.open_world(game_path).new_game
+    import pysud_cache
+    return pysud.World(pysud_cache.load_rooms(game_path)).new_game
+
+
+def read_commands(script_path):
+    """ Answers the commands in a script file, normalized. """
+    commands = []
+    with open(script_path, 'r', encoding='utf-8') as script_file:
+        for line in script_file:
+            command = pysud_str.normalize_command(line)
+            if command and not command.startswith('#'):
+                commands.append(command)
+    return commands
+
+
+def play(game, commands, echo=True, result=None):
+    """ Plays some commands on a game, until they run out or the game
+    stops.
+
+    Args:
+        game: A pysud.Game object.
+        commands: An iterable of normalized command strings.
+        echo: Whether each command is written to the game output,
+            preceded by the prompt, like a console session shows it.
+        result: Optional ScriptResult whose turns are counted as they are
+            played, so they are known even if a turn raises.
+    Returns:
+        Amount of turns played.
+    """
+    iom = game.iom
+    if game.pc.current_room is None:
+        game.pc.move_to_room(game.rooms[0])
+    iom.show_welcome_message()
+    game.show_starting_room()
+    turns = 0
+    for command in commands:
+        if not game.is_running():
+            break
+        if echo:
+            iom.output.write(iom.msg_dict['PROMPT_TEXT'] + command)
+        turns += 1
+        if result is not None:
+            result.turns = turns
+        game.run_turn(command)
+    return turns
+
+
+class ScriptResult():
+    """ Outcome of playing a script.
+
+    Attributes:
+        script_path: Path of the played script.
+        turns: Amount of turns played (the one raising an exception, if
+            any, included).
+        seconds: Time taken to play them (the game creation left out).
+        transcript: Captured game output, None if not kept.
+        matches: Whether the transcript matched the expected one, None
+            if there is no expected transcript.
+        error: Traceback string if the game raised an exception.
+    """
+
+    def __init__(self, script_path):
+        self.script_path = script_path
+        self.turns = 0
+        self.seconds = 0.0
+        self.transcript = None
+        self.matches = None
+        self.error = None
+
+    def failed(self):
+        """ Answers whether the script raised an exception or didn't
+        match its expected transcript. """
+        return self.error is not None or self.matches is False
+
+    def turns_per_second(self):
+        return self.turns / self.seconds if self.seconds else 0.0
+
+
+def run_script(game_factory, script_path, keep_transcript=False, player_name='Player'):
+    """ Plays a script on a new game.
+
+    Args:
+        game_factory: see load_game_factory().
+        script_path: Path of the script to play.
+        keep_transcript: Whether the captured output is answered even if
+            there is no expected transcript to compare it with.
+        player_name: The player character name.
+    Returns:
+        A ScriptResult object.
+    """
+    result = ScriptResult(script_path)
+    expected_path = script_path + EXPECTED_SUFFIX
+    expected = None
+    if os.path.exists(expected_path):
+        with open(expected_path, 'r', encoding='utf-8') as expected_file:
+            expected = expected_file.read()
+    capture = keep_transcript or expected is not None
+    output = pysud_output.CaptureOutput() if capture else pysud_output.NullOutput()
+    start = None
+    try:
+        commands = read_commands(script_path)
+        game = game_factory(player_name, **GAME_OPTIONS)
+        game.iom.output = output
+        start = time.perf_counter()
+        play(game, commands, echo=capture, result=result)
+        result.seconds = time.perf_counter() - start
+    except Exception:
+        result.error = traceback.format_exc()
+        if start is not None:
+            result.seconds = time.perf_counter() - start
+    if capture:
+        result.transcript = output.text()
+        if expected is not None:
+            result.matches = result.transcript == expected
+    return result
+
+
+def _init_worker(game_path):
+    global _game_factory
+    # forked workers already got the factory loaded by run_scripts, but
+    # sqlite connections (world stores) can't be used across a fork:
+    if _game_factory is None or game_path.endswith('.db'):
+        _game_factory = load_game_factory(game_path)
+
+
+def _run_script(script_path, keep_transcript):
+    return run_script(_game_factory, script_path, keep_transcript)
+
+
+def run_scripts(game_path, script_paths, jobs=None, keep_transcripts=False):
+    """ Plays many scripts in parallel, each one on a new game.
+
+    The game is loaded once, before starting the worker processes, so
+    loading errors are raised right away and forked workers share the
+    loaded world. Workers then play their share of the scripts.
+
+    Args:
+        game_path: see load_game_factory().
+        script_paths: A list holding the paths of the scripts to play
+            (a path may be repeated).
+        jobs: Amount of worker processes, os.cpu_count() by default.
+        keep_transcripts: see run_script().
+    Returns:
+        A list holding a ScriptResult object per script, in the given
+        order.
+    """
+    global _game_factory
+    _game_factory = load_game_factory(game_path)
+    jobs = min(jobs or os.cpu_count() or 1, len(script_paths)) or 1
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(game_path,)) as pool:
+        futures = [pool.submit(_run_script, path, keep_transcripts) for path in script_paths]
+        return [future.result() for future in futures]
+
+
+def report(results, seconds):
+    """ Answers a human readable summary of some results.
+
+    Args:
+        results: A list of ScriptResult objects.
+        seconds: Wall clock time taken to get them.
+    """
+    lines = []
+    for result in results:
+        status = 'ok'
+        if result.error is not None:
+            status = 'ERROR'
+        elif result.matches is False:
+            status = 'MISMATCH'
+        lines.append(format(status, '<9s') + result.script_path + ': ' + str(result.turns) + ' turns, '
+                     + format(result.turns_per_second(), '.0f') + ' turns/s')
+    turns = sum(result.turns for result in results)
+    failed = sum(1 for result in results if result.failed())
+    lines.append(str(len(results)) + ' scripts, ' + str(failed) + ' failed, ' + str(turns) + ' turns in '
+                 + format(seconds, '.2f') + ' s (' + format(turns / seconds if seconds else 0.0, '.0f')
+                 + ' turns/s)')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Plays pysud command scripts headlessly.')
+    PARSER.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    PARSER.add_argument('-n', '--repeat', type=int, default=1, help='times every script is played')
+    PARSER.add_argument('-o', '--output-dir', default=None, help='directory to write transcripts into')
+    PARSER.add_argument('game')
+    PARSER.add_argument('scripts', nargs='+')
+    ARGS = PARSER.parse_args()
+    START = time.perf_counter()
+    RESULTS = run_scripts(ARGS.game, ARGS.scripts * ARGS.repeat, ARGS.jobs, ARGS.output_dir is not None)
+    SECONDS = time.perf_counter() - START
+    for RESULT in RESULTS:
+        if RESULT.error is not None:
+            print(RESULT.script_path + ':\n' + RESULT.error, file=sys.stderr)
+        if ARGS.output_dir is not None and RESULT.transcript is not None:
+            os.makedirs(ARGS.output_dir, exist_ok=True)
+            TRANSCRIPT = os.path.join(ARGS.output_dir, os.path.basename(RESULT.script_path) + TRANSCRIPT_SUFFIX)
+            with open(TRANSCRIPT, 'w', encoding='utf-8') as TRANSCRIPT_FILE:
+                TRANSCRIPT_FILE.write(RESULT.transcript)
+    print(report(RESULTS, SECONDS))
+    sys.exit(1 if any(RESULT.failed() for RESULT in RESULTS) else 0)
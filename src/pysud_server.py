@@ -0,0 +1,217 @@
+"""
+pysud server module.
+
+Hosts many concurrent pysud.Game sessions in a single process, one per
+TCP (telnet like) connection, all of them sharing one asyncio event loop.
+Each session awaits its own player input, so a slow or idle player never
+stalls the others.
+
+Usage:
+    python3 pysud_server.py GAME_SCRIPT [PORT [METRICS_PORT]]
+
+GAME_SCRIPT is a python file defining either a make_world() function
+answering a pysud.World, shared by every session, or a
+make_game(player_name, **options) function answering a new pysud.Game
+ready to be run (see demos/en/demo.py). If METRICS_PORT is given, the
+server metrics are exposed at http://127.0.0.1:METRICS_PORT/metrics (see
+pysud_metrics).
+"""
+
+import asyncio
+import runpy
+import sys
+import traceback
+import pysud
+import pysud_output
+import pysud_str
+
+ENCODING = 'utf-8'
+NEWLINE = '\r\n'
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 4000
+
+
+async def read_line(reader):
+    """ Reads a line from an asyncio.StreamReader (see its readline()).
+
+    Raises:
+        ConnectionError: if the line exceeds the reader limit (the player
+            sent garbage).
+    """
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError) as e:
+        raise ConnectionError('line too long') from e
+
+
+class StreamOutput(pysud_output.OutputBackend):
+    """ Writes messages into an asyncio.StreamWriter buffer.
+
+    Buffered data is sent while the session waits for the player's next
+    command.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, string):
+        self.writer.write((string + NEWLINE).encode(ENCODING))
+
+
+class SocketIOManager(pysud.IOManager):
+    """ Handles a remote player I/O through asyncio streams.
+
+    Attributes:
+        reader: asyncio.StreamReader for the player connection.
+        writer: asyncio.StreamWriter for the player connection.
+    """
+
+    def __init__(self, game, reader, writer):
+        pysud.IOManager.__init__(self, game, StreamOutput(writer))
+        self.__game = game
+        self.reader = reader
+        self.writer = writer
+
+    def get_new_user_input(self):
+        raise RuntimeError('blocking input is not available, use run_game_async()')
+
+    async def read_line(self, prompt):
+        """ Sends prompt and waits for a full line from the player.
+
+        Returns:
+            the received line, or None if the connection was closed.
+        """
+        self.writer.write(prompt.encode(ENCODING))
+        await self.writer.drain()
+        line = await read_line(self.reader)
+        if not line:
+            return None
+        return line.decode(ENCODING, 'replace')
+
+    async def get_new_user_input_async(self):
+        """ Waits for (and returns) a new input from the player.
+
+        A closed connection stops the game.
+        """
+        self.flush()
+        line = await self.read_line(self.msg_dict['PROMPT_TEXT'])
+        if line is None:
+            self.__game.stop_game()
+            line = ''
+        self.last_user_input = pysud_str.normalize_command(line)
+        return self.last_user_input
+
+
+class GameServer():
+    """ Accepts player connections and runs a pysud.Game for each one.
+
+    Attributes:
+        game_factory: Callable receiving a player name (and pysud.Game
+            keyword options) that answers a new game ready to be run.
+        host: Address to listen on.
+        port: TCP port to listen on.
+        sessions: Amount of currently connected players.
+        metrics: pysud_metrics.GameMetrics every session game is attached
+            to, None if not measured.
+    """
+
+    # pysud.Game options every session is created with: sessions can't
+    # share a save file, their output goes to the socket instead.
+    GAME_OPTIONS = {'save_enabled': False, 'output': pysud_output.NullOutput()}
+
+    # pysud.IOManager class bound to every session connection:
+    io_manager_class = SocketIOManager
+
+    def __init__(self, game_factory, host=DEFAULT_HOST, port=DEFAULT_PORT, metrics=None):
+        self.game_factory = game_factory
+        self.host = host
+        self.port = port
+        self.sessions = 0
+        self.metrics = metrics
+
+    async def handle_session(self, reader, writer):
+        """ Runs a whole game session for a new connection. """
+        self.sessions += 1
+        try:
+            await self.run_session(reader, writer)
+        except ConnectionError:
+            pass  # player went away or sent garbage (see read_line)
+        except Exception:
+            # a failing game script must not bring the other sessions down
+            traceback.print_exc()
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def run_session(self, reader, writer):
+        prompt = pysud_str.MSG_DICT['PLAYER_NAME_PROMPT']
+        writer.write(prompt.encode(ENCODING))
+        await writer.drain()
+        line = await read_line(reader)
+        if not line:
+            return
+        player_name = line.decode(ENCODING, 'replace').strip()
+        game = self.new_game(player_name, reader, writer)
+        game.iom.show_welcome_message()
+        await self.play_game(game, writer)
+
+    def new_game(self, player_name, reader, writer):
+        """ Answers a new game for a player, its I/O bound to a connection. """
+        game = self.game_factory(player_name, **self.GAME_OPTIONS)
+        game.iom = self.io_manager_class(game, reader, writer)
+        if game.pc.current_room is None:
+            game.pc.move_to_room(game.rooms[0])
+        return game
+
+    async def play_game(self, game, writer, resumed=False):
+        """ Runs a session game until it stops (see
+        pysud.Game.run_game_async). """
+        if self.metrics is not None:
+            self.metrics.attach(game)
+        try:
+            await game.run_game_async(resumed)
+            await writer.drain()
+        finally:
+            if self.metrics is not None:
+                self.metrics.detach(game)
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_session, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """ Starts serving until interrupted. """
+        asyncio.run(self.serve_forever())
+
+
+def load_game_factory(script_path):
+    """ Answers a game factory for the game defined in a given python file.
+
+    A make_world() function is preferred over make_game(), since then all
+    the sessions share a single world.
+    """
+    script = runpy.run_path(script_path)
+    if 'make_world' in script:
+        return script['make_world']().new_game
+    return script['make_game']
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    FACTORY = load_game_factory(sys.argv[1])
+    PORT = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    METRICS = None
+    if len(sys.argv) > 3:
+        import pysud_metrics
+        METRICS = pysud_metrics.GameMetrics()
+        pysud_metrics.serve(METRICS.registry, port=int(sys.argv[3]))
+        print('pysud metrics at http://' + pysud_metrics.DEFAULT_HOST + ':' + sys.argv[3] + '/metrics')
+    SERVER = GameServer(FACTORY, port=PORT, metrics=METRICS)
+    print('pysud server listening on ' + SERVER.host + ':' + str(SERVER.port))
+    try:
+        SERVER.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,389 @@
+"""
+pysud shard module.
+
+Hosts game sessions on every core: a front end process accepts player
+connections (just like pysud_server) and hands each session to one of
+many worker processes, each one running its own pysud_server event loop.
+Sessions are assigned to workers by hashing the player name; the front
+end then relays the player I/O between both connections.
+
+Sessions can be moved to another worker while being played: the worker
+stops the session when it would wait for the player's next command, and
+answers its state in the save file format (see pysud_gm.dump_session),
+which is then resumed by the new worker. Players don't notice. Every some
+seconds sessions are moved from the busiest workers to the idlest ones
+(players leaving may unbalance them).
+
+Usage:
+    python3 pysud_shard.py [-w WORKERS] [-p PORT] [-r SECONDS] GAME_SCRIPT
+
+GAME_SCRIPT is a game script as in pysud_server, loaded by every worker.
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import zlib
+import pysud_gm
+import pysud_server
+import pysud_str
+
+DEFAULT_HOST = pysud_server.DEFAULT_HOST
+DEFAULT_PORT = pysud_server.DEFAULT_PORT
+ENCODING = pysud_server.ENCODING
+
+# Workers only listen on the local host, for the front end:
+WORKER_HOST = '127.0.0.1'
+# Seconds between rebalances, see ShardServer.rebalance():
+REBALANCE_SECONDS = 30
+BUFFER_SIZE = 65536
+
+# Lines starting with CONTROL are messages between the front end and a
+# worker, never player input nor game output:
+#   front end -> worker: 'new PLAYER_NAME' (first line), 'resume LENGTH
+#       PLAYER_NAME' (first line, followed by LENGTH bytes of session state)
+#       or 'move'.
+#   worker -> front end: 'state LENGTH' followed by LENGTH bytes of session
+#       state, as the last message of a moved session.
+CONTROL = b'\x00'
+
+
+def worker_index(player_name, workers_amount):
+    """ Answers the number of the worker a player's session goes to (the
+    same one on every run, unlike hash()). """
+    return zlib.crc32(player_name.encode(ENCODING)) % workers_amount
+
+
+class WorkerOutput(pysud_server.StreamOutput):
+    """ Writes game messages for the front end, without control bytes. """
+
+    def write(self, string):
+        pysud_server.StreamOutput.write(self, string.replace('\x00', ''))
+
+
+class WorkerIOManager(pysud_server.SocketIOManager):
+    """ Handles the I/O of a session relayed by the front end.
+
+    Attributes:
+        moving: Whether the front end asked for the session to be moved
+            (the game is then stopped).
+        resumed: Whether the session was moved from another worker and
+            the player has not been prompted by this one yet.
+    """
+
+    def __init__(self, game, reader, writer):
+        pysud_server.SocketIOManager.__init__(self, game, reader, writer)
+        self.output = WorkerOutput(writer)
+        self.moving = False
+        self.resumed = False
+
+    async def read_line(self, prompt):
+        if self.resumed:
+            # the previous worker already prompted the player:
+            self.resumed = False
+            prompt = ''
+        line = await pysud_server.SocketIOManager.read_line(self, prompt)
+        if line is not None and line.startswith('\x00'):
+            if line[1:].strip() == 'move':
+                self.moving = True
+            return None  # stops the game
+        return line
+
+
+class WorkerServer(pysud_server.GameServer):
+    """ Runs the sessions handed by the front end, in a worker process.
+
+    Attributes:
+        connection: multiprocessing connection the listening port is
+            sent through once known.
+    """
+
+    io_manager_class = WorkerIOManager
+
+    def __init__(self, game_factory, host, connection):
+        pysud_server.GameServer.__init__(self, game_factory, host, 0)
+        self.connection = connection
+
+    async def run_session(self, reader, writer):
+        header = await pysud_server.read_line(reader)
+        if not header.startswith(CONTROL):
+            return
+        message, _, argument = header[1:].rstrip(b'\r\n').decode(ENCODING, 'replace').partition(' ')
+        if message == 'new':
+            game = self.new_game(argument, reader, writer)
+            game.iom.show_welcome_message()
+        elif message == 'resume':
+            length, _, player_name = argument.partition(' ')
+            state_data = await reader.readexactly(int(length))
+            game = self.new_game(player_name, reader, writer)
+            game.set_session_state(pysud_gm.load_session(io.BytesIO(state_data), game))
+            game.iom.resumed = True
+        else:
+            return
+        await self.play_game(game, writer, resumed=game.iom.resumed)
+        if game.iom.moving:
+            state_file = io.BytesIO()
+            ids = pysud_gm.GameManager(game).get_world_ids()
+            pysud_gm.dump_session(game.get_session_state(), state_file, ids)
+            state_data = state_file.getvalue()
+            writer.write(CONTROL + b'state ' + str(len(state_data)).encode(ENCODING) + b'\n' + state_data)
+            await writer.drain()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_session, self.host, self.port)
+        self.connection.send(server.sockets[0].getsockname()[1])
+        self.connection.close()
+        async with server:
+            await server.serve_forever()
+
+
+def run_worker(script_path, host, connection):
+    """ A worker process main function: serves the sessions of the game
+    defined in a given python file, see WorkerServer. """
+    server = WorkerServer(pysud_server.load_game_factory(script_path), host, connection)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardSession():
+    """ A player connection relayed to a worker.
+
+    Attributes:
+        player_name: Name the player entered.
+        client_writer: asyncio.StreamWriter for the player connection.
+        worker: Number of the worker running the session.
+        worker_reader: asyncio.StreamReader for the worker connection.
+        worker_writer: asyncio.StreamWriter for the worker connection.
+        moving_to: Number of the worker the session is being moved to,
+            None if not being moved.
+        pending: Player lines received while moving, sent to the new
+            worker once resumed.
+        client_closed: Whether the player connection was closed.
+    """
+
+    def __init__(self, player_name, client_writer):
+        self.player_name = player_name
+        self.client_writer = client_writer
+        self.worker = None
+        self.worker_reader = None
+        self.worker_writer = None
+        self.moving_to = None
+        self.pending = []
+        self.client_closed = False
+
+
+class ShardServer(pysud_server.GameServer):
+    """ Accepts player connections and relays each one to a worker process.
+
+    Attributes:
+        script_path: Game script every worker loads.
+        workers_amount: Amount of worker processes.
+        worker_ports: Port each running worker listens on.
+        rebalance_seconds: Seconds between rebalances (None to disable).
+        shard_sessions: Set of current ShardSession objects.
+    """
+
+    def __init__(self, script_path, workers_amount=None, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 rebalance_seconds=REBALANCE_SECONDS):
+        pysud_server.GameServer.__init__(self, None, host, port)
+        self.script_path = script_path
+        self.workers_amount = workers_amount or os.cpu_count() or 1
+        self.worker_ports = []
+        self.rebalance_seconds = rebalance_seconds
+        self.shard_sessions = set()
+        self.__processes = []
+
+    def start_workers(self):
+        """ Starts the worker processes, waiting until they listen.
+
+        Raises:
+            EOFError: if a worker failed to start (e.g. a broken game
+                script).
+        """
+        for _ in range(self.workers_amount):
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_worker, args=(self.script_path, WORKER_HOST, sender),
+                                              daemon=True)
+            process.start()
+            sender.close()
+            self.__processes.append(process)
+            self.worker_ports.append(receiver.recv())
+            receiver.close()
+
+    def stop_workers(self):
+        for process in self.__processes:
+            process.terminate()
+        for process in self.__processes:
+            process.join()
+        self.__processes = []
+        self.worker_ports = []
+
+    async def run_session(self, reader, writer):
+        prompt = pysud_str.MSG_DICT['PLAYER_NAME_PROMPT']
+        writer.write(prompt.encode(ENCODING))
+        await writer.drain()
+        line = await pysud_server.read_line(reader)
+        if not line:
+            return
+        player_name = line.replace(CONTROL, b'').decode(ENCODING, 'replace').strip()
+        session = ShardSession(player_name, writer)
+        index = worker_index(player_name, len(self.worker_ports))
+        await self.connect(session, index, b'new ' + player_name.encode(ENCODING))
+        self.shard_sessions.add(session)
+        relay_input = asyncio.ensure_future(self.relay_input(session, reader))
+        try:
+            await self.relay_output(session)
+        finally:
+            self.shard_sessions.discard(session)
+            relay_input.cancel()
+            session.worker_writer.close()
+
+    async def connect(self, session, index, header, state_data=b''):
+        """ Connects a session to a worker, sending it a header message
+        (and some session state). """
+        session.worker_reader, session.worker_writer = await asyncio.open_connection(
+            WORKER_HOST, self.worker_ports[index])
+        session.worker = index
+        session.worker_writer.write(CONTROL + header + b'\n' + state_data)
+        await session.worker_writer.drain()
+
+    async def relay_input(self, session, reader):
+        """ Sends the player lines to the session worker. """
+        while True:
+            line = await pysud_server.read_line(reader)
+            if not line:
+                break
+            line = line.replace(CONTROL, b'')  # reserved for the front end
+            if session.moving_to is not None:
+                session.pending.append(line)
+            else:
+                session.worker_writer.write(line)
+                try:
+                    await session.worker_writer.drain()
+                except ConnectionError:
+                    pass  # closed as the session was moved
+        session.client_closed = True
+        if session.moving_to is None:
+            session.worker_writer.write_eof()
+
+    async def relay_output(self, session):
+        """ Sends the game output to the player until the session ends,
+        resuming it on another worker whenever moved. """
+        while True:
+            data = await session.worker_reader.read(BUFFER_SIZE)
+            if not data:
+                return
+            control = data.find(CONTROL)
+            if control < 0:
+                session.client_writer.write(data)
+                await session.client_writer.drain()
+                continue
+            session.client_writer.write(data[:control])
+            # the session state is the last thing the worker sends:
+            message = data[control + 1:] + await session.worker_reader.read()
+            header, _, state_data = message.partition(b'\n')
+            if header != b'state ' + str(len(state_data)).encode(ENCODING):
+                raise ConnectionError('broken session state from worker ' + str(session.worker))
+            session.worker_writer.close()
+            await self.resume(session, state_data)
+
+    async def resume(self, session, state_data):
+        index = session.moving_to
+        header = b'resume ' + str(len(state_data)).encode(ENCODING) + b' ' + session.player_name.encode(ENCODING)
+        await self.connect(session, index, header, state_data)
+        session.moving_to = None
+        for line in session.pending:
+            session.worker_writer.write(line)
+        session.pending = []
+        if session.client_closed:
+            session.worker_writer.write_eof()
+
+    def move(self, session, index):
+        """ Starts moving a session to another worker (it is moved as soon
+        as its current worker is done with the commands sent so far).
+
+        Returns:
+            True if the session is being moved, False if it was already
+            on that worker or being moved.
+        """
+        if session.moving_to is not None or session.worker == index or session.client_closed:
+            return False
+        session.moving_to = index
+        session.worker_writer.write(CONTROL + b'move\n')
+        return True
+
+    def worker_loads(self):
+        """ Answers a list holding the amount of sessions of every worker
+        (sessions being moved count for their new worker). """
+        loads = [0] * len(self.worker_ports)
+        for session in self.shard_sessions:
+            loads[session.worker if session.moving_to is None else session.moving_to] += 1
+        return loads
+
+    def rebalance(self):
+        """ Moves sessions from the busiest workers to the idlest ones,
+        until their amounts of sessions differ by one at most. Nothing is
+        done while sessions are still being moved.
+
+        Returns:
+            The amount of sessions moved.
+        """
+        by_worker = [[] for _ in self.worker_ports]
+        for session in self.shard_sessions:
+            if session.moving_to is not None:
+                return 0
+            by_worker[session.worker].append(session)
+        moved = 0
+        workers = range(len(by_worker))
+        while True:
+            busiest = max(workers, key=lambda i: len(by_worker[i]))
+            idlest = min(workers, key=lambda i: len(by_worker[i]))
+            if len(by_worker[busiest]) - len(by_worker[idlest]) <= 1:
+                return moved
+            session = by_worker[busiest].pop()
+            by_worker[idlest].append(session)
+            if self.move(session, idlest):
+                moved += 1
+
+    async def rebalance_forever(self):
+        while True:
+            await asyncio.sleep(self.rebalance_seconds)
+            self.rebalance()
+
+    async def serve_forever(self):
+        if self.rebalance_seconds:
+            rebalancer = asyncio.ensure_future(self.rebalance_forever())
+        try:
+            await pysud_server.GameServer.serve_forever(self)
+        finally:
+            if self.rebalance_seconds:
+                rebalancer.cancel()
+
+    def run(self):
+        """ Starts the workers and serves until interrupted. """
+        self.start_workers()
+        try:
+            pysud_server.GameServer.run(self)
+        finally:
+            self.stop_workers()
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Serves a pysud game from many worker processes.')
+    PARSER.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: cpu count)')
+    PARSER.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='TCP port to listen on')
+    PARSER.add_argument('-r', '--rebalance', type=float, default=REBALANCE_SECONDS,
+                        help='seconds between rebalances, 0 to disable')
+    PARSER.add_argument('game_script')
+    ARGS = PARSER.parse_args()
+    SERVER = ShardServer(ARGS.game_script, ARGS.workers, port=ARGS.port, rebalance_seconds=ARGS.rebalance)
+    print('pysud shard server listening on ' + SERVER.host + ':' + str(SERVER.port)
+          + ' (' + str(SERVER.workers_amount) + ' workers)')
+    try:
+        SERVER.run()
+    except KeyboardInterrupt:
+        pass
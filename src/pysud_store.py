@@ -0,0 +1,277 @@
+"""
+pysud store module.
+
+Provides an SQLite backed world store, so a game (or a pysud_server
+hosting many of them) can use worlds larger than the available memory.
+
+Rooms are read from the store, indexed by room id, only when something
+asks for them: the player moving into a room, a transition being
+followed, a saved game referencing it... A bounded LRU keeps the most
+recently used rooms in memory; evicted rooms are dropped as soon as no
+game references them (rooms a game is in, visited or changed stay
+alive), and a room is never materialized twice while alive, so room and
+event identities hold just like with an in memory pysud.World.
+
+Stores are read only, they hold what world sources can define: rooms and
+their transitions.
+
+Usage:
+    python3 pysud_store.py ROOMS_FILE STORE_FILE
+
+ROOMS_FILE is a rooms.json (or json lines) file, streamed into the store
+record by record (pysud_rooms_json_parser must be on the same directory).
+"""
+
+import collections
+import json
+import sqlite3
+import sys
+import weakref
+import pysud
+import pysud_events as ev
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS rooms (id PRIMARY KEY, position INTEGER UNIQUE, name TEXT, description TEXT, transitions TEXT)',
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+
+def build_store(room_records, store_path, start_room_id=None, variables=None):
+    """ Writes a world store.
+
+    Args:
+        room_records: An iterable of rooms.json like records: python
+            dictionaries holding 'id', 'name', 'description' and
+            optionally 'transitions' (each one a dictionary holding a
+            'destination' room id and its 'commands').
+        store_path: Path of the store file to be (re)created.
+        start_room_id: Id of the room new games start at (the first
+            record by default).
+        variables: Initial user defined variables for new games.
+    Returns:
+        Amount of rooms written.
+    """
+    connection = sqlite3.connect(store_path)
+    try:
+        with connection:
+            connection.execute('DROP TABLE IF EXISTS rooms')
+            connection.execute('DROP TABLE IF EXISTS meta')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            position = 0
+            for record in room_records:
+                transitions = [(t['destination'], t['commands']) for t in record.get('transitions', ())]
+                connection.execute(
+                    'INSERT INTO rooms VALUES (?, ?, ?, ?, ?)',
+                    (record['id'], position, record['name'], record['description'], json.dumps(transitions)))
+                if start_room_id is None:
+                    start_room_id = record['id']
+                position += 1
+            meta = {'start_room_id': start_room_id, 'variables': variables or dict()}
+            for key, value in meta.items():
+                connection.execute('INSERT INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+    finally:
+        connection.close()
+    return position
+
+
+def room_records(rooms):
+    """ Answers rooms.json like records (see build_store) for in memory
+    rooms, to store a world parsed by other means. """
+    for room in rooms:
+        yield {
+            'id': room.get_id(),
+            'name': room.get_name(),
+            'description': room.get_description(),
+            'transitions': [{'destination': t.destination.get_id(), 'commands': t.commands} for t in room.get_transitions()]}
+
+
+class PagedTransitionEvent(ev.TransitionEvent):
+    """ A transition whose destination is read from a WorldStore when
+    followed.
+
+    Attributes:
+        destination_id: Destination room id.
+        store: WorldStore holding the destination room.
+    """
+
+    __slots__ = ('destination_id', 'store')
+
+    def __init__(self, commands, destination_id, store):
+        ev.CommandEvent.__init__(self, commands)
+        self.destination_id = destination_id
+        self.store = store
+
+    @property
+    def destination(self):
+        return self.store.get_room(self.destination_id)
+
+    def get_destination_id(self):
+        return self.destination_id
+
+    def __reduce__(self):
+        # pickling slots would materialize (and then fail to set) the
+        # destination room:
+        return (PagedTransitionEvent, (self.commands, self.destination_id, self.store))
+
+
+class WorldStore():
+    """ Reads rooms from a store written by build_store().
+
+    Attributes:
+        store_path: Path of the store file.
+        cache_size: Amount of recently used rooms kept in memory even if
+            no game references them.
+        materialized: Amount of rooms read from the store so far.
+    """
+
+    def __init__(self, store_path, cache_size=1024):
+        self.store_path = store_path
+        self.cache_size = cache_size
+        self.materialized = 0
+        self.__connection = sqlite3.connect(store_path)
+        self.__recent = collections.OrderedDict()  # room id -> Room
+        self.__alive = weakref.WeakValueDictionary()  # room id -> Room
+
+    def __reduce__(self):
+        # games exported with pysud_gm keep a reference, not the rooms:
+        return (WorldStore, (self.store_path, self.cache_size))
+
+    def __len__(self):
+        return self.__connection.execute('SELECT COUNT(*) FROM rooms').fetchone()[0]
+
+    def get_meta(self, key):
+        """ Answers a value stored by build_store() ('start_room_id',
+        'variables'). """
+        row = self.__connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_room(self, room_id):
+        """ Answers the room whose id is room_id, None if not found. """
+        room = self.__recent.get(room_id)
+        if room is not None:
+            self.__recent.move_to_end(room_id)
+            return room
+        room = self.__alive.get(room_id)
+        if room is None:
+            row = self.__connection.execute(
+                'SELECT id, name, description, transitions FROM rooms WHERE id = ?', (room_id,)).fetchone()
+            if row is None:
+                return None
+            room = self.__build_room(row)
+        self.__recent[room_id] = room
+        if len(self.__recent) > self.cache_size:
+            self.__recent.popitem(last=False)
+        return room
+
+    def get_room_at(self, position):
+        """ Answers the room stored at a given position (0 based), in the
+        order build_store() received them.
+
+        Raises:
+            IndexError: if there is no such position.
+        """
+        row = self.__connection.execute('SELECT id FROM rooms WHERE position = ?', (position,)).fetchone()
+        if row is None:
+            raise IndexError('room position out of range')
+        return self.get_room(row[0])
+
+    def loaded_rooms(self):
+        """ Returns a tuple containing the rooms currently in memory. """
+        return tuple(self.__alive.values())
+
+    def iter_room_records(self):
+        """ Yields a build_store() like record for every stored room, in
+        order, without materializing any room. """
+        for room_id, name, description, transitions in self.__connection.execute(
+                'SELECT id, name, description, transitions FROM rooms ORDER BY position'):
+            yield {
+                'id': room_id,
+                'name': name,
+                'description': description,
+                'transitions': [{'destination': d, 'commands': c} for d, c in json.loads(transitions)]}
+
+    def get_transition_pairs(self):
+        """ Yields an (origin room id, destination room id) pair for
+        every stored transition, without materializing any room. """
+        for room_id, transitions in self.__connection.execute('SELECT id, transitions FROM rooms ORDER BY position'):
+            for destination_id, commands in json.loads(transitions):
+                yield room_id, destination_id
+
+    def close(self):
+        self.__connection.close()
+
+    def __build_room(self, row):
+        room_id, name, description, transitions = row
+        # (rooms are paged in during turns, so events are not added later)
+        room = pysud.Room(name, description, room_id, [
+            PagedTransitionEvent(commands, destination_id, self) for destination_id, commands in json.loads(transitions)])
+        self.__alive[room_id] = room
+        self.materialized += 1
+        return room
+
+
+class PagedRooms():
+    """ Read only sequence of the rooms in a WorldStore. Rooms are only
+    materialized when accessed. """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        return self.store.get_room_at(position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.store.get_room_at(position)
+
+
+class PagedWorld(pysud.World):
+    """
+    A pysud.World whose rooms are paged in from a WorldStore.
+
+    Attributes:
+        store: WorldStore holding the world rooms.
+        rooms: A PagedRooms sequence.
+        start_room_id: Id of the room new games start at.
+        variables: Initial user defined variables for new games.
+    """
+
+    def __init__(self, store, start_room_id=None, variables=None):
+        self.store = store
+        self.rooms = PagedRooms(store)
+        self.start_room_id = start_room_id if start_room_id is not None else store.get_meta('start_room_id')
+        self.variables = dict(variables if variables is not None else store.get_meta('variables') or ())
+
+    @property
+    def start_room(self):
+        return self.store.get_room(self.start_room_id)
+
+    def get_room_by_id(self, room_id):
+        room = self.store.get_room(room_id)
+        return room if room is not None else False
+
+    def loaded_rooms(self):
+        return self.store.loaded_rooms()
+
+    def get_transition_pairs(self):
+        return self.store.get_transition_pairs()
+
+
+def open_world(store_path, cache_size=1024):
+    """ Answers a PagedWorld for a given store file. """
+    return PagedWorld(WorldStore(store_path, cache_size))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    import pysud_rooms_json_parser
+    with open(sys.argv[1], 'r', encoding='utf-8') as ROOMS_FILE:
+        AMOUNT = build_store(pysud_rooms_json_parser.iter_room_records(ROOMS_FILE), sys.argv[2])
+    print(str(AMOUNT) + ' rooms stored in ' + sys.argv[2])
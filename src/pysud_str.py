@@ -9,33 +9,233 @@ CMD_SHOW_SCORE = 'score',
 CMD_SHOW_INVENTORY = 'i', 'inv'
 CMD_SHOW_HELP = 'h', '?'
 CMD_SHOW_STATS = 'stats', 'st'
+CMD_SHOW_PROFILE = 'profile',
 CMD_GAME_LOAD = 'load', 'resume'
 CMD_GAME_SAVE = 'save',
 CMD_GAME_QUIT = 'quit', 'exit', 'qq'
 CMD_ITEM_USE = 'use', 'u'
 CMD_ITEM_GET = 'get', 'pickup', 'take'
 CMD_ITEM_COMBINE = 'combine', 'merge'
+CMD_TRAVEL = 'goto', 'travel'
 
 # Default message strings dictionary:
 MSG_DICT = dict()
 MSG_DICT['PROMPT_TEXT'] = '~$>'
+MSG_DICT['PLAYER_NAME_PROMPT'] = 'Enter your character name:'
 MSG_DICT['INVALID_CMD_TEXT'] = 'Invalid input'
+MSG_DICT['DID_YOU_MEAN_STR'] = 'Did you mean'
 MSG_DICT['HELP_TEXT'] = 'THIS IS THE HELP TEXT'
 MSG_DICT['ROOM_ITEMS_STR'] = 'You see'
 MSG_DICT['ROOM_EXITS_STR_1'] = 'You may go to'
 MSG_DICT['ROOM_EXITS_STR_2'] = 'using'
 MSG_DICT['PLAYER_INVENTORY_STR'] = 'You have:'
 MSG_DICT['PLAYER_STATS_STR'] = 'Rooms visited:'
+MSG_DICT['PROFILE_DISABLED_TEXT'] = 'Profiling is not enabled'
 MSG_DICT['PLAYER_SCORE_STR'] = 'Your score is'
 MSG_DICT['GAME_START_TEXT'] = 'Welcome'
 MSG_DICT['GAME_RESUME_TEXT'] = 'welcome back'
 MSG_DICT['GAME_END_TEXT'] = 'Goodbye!'
 MSG_DICT['ITEM_RETRIEVED'] = 'You get'
 MSG_DICT['ITEM_COMBINED_OK'] = 'Items successfully combined!'
+MSG_DICT['TRAVEL_UNKNOWN_TEXT'] = "You don't know the way there"
+MSG_DICT['TRAVEL_ALREADY_TEXT'] = 'You are already there'
+MSG_DICT['TRAVEL_STOPPED_TEXT'] = "You can't go any further that way"
 
 # TODO docstring
 DEFAULT_CONNECTOR = ' '
 
+# Verb synonyms dictionary, maps every synonym to its canonical verb (see
+# register_verb):
+VERBS = dict()
+
+
+def normalize_command(command):
+    """ Answers the canonical form of a command string.
+
+    Leading, trailing and repeated whitespace is dropped so user input and
+    event commands can be compared (and hashed) as plain strings.
+    """
+    return ' '.join(command.split())
+
+
+def register_verb(synonyms):
+    """ Registers a verb for pysud_events.ActionEvent objects.
+
+    Args:
+        synonyms: A list/tuple holding single word strings, the first one
+            is the canonical verb.
+    Returns:
+        The canonical verb.
+    """
+    verb = synonyms[0]
+    for synonym in synonyms:
+        VERBS[synonym] = verb
+    return verb
+
+
+def parse_command(command):
+    """ Splits a normalized command into its verb and objects.
+
+    Args:
+        command: a normalized user input string (see normalize_command).
+    Returns:
+        A (canonical verb, objects string) tuple, an empty tuple if
+        command doesn't start with a registered verb or names no object.
+    """
+    verb, _, objects = command.partition(' ')
+    verb = VERBS.get(verb)
+    if verb is None or not objects:
+        return ()
+    return (verb, objects)
+
+
+# Verbs of the predefined events:
+VERB_LOOK = register_verb(CMD_LOOK)
+VERB_ITEM_USE = register_verb(CMD_ITEM_USE)
+VERB_ITEM_GET = register_verb(CMD_ITEM_GET)
+VERB_ITEM_COMBINE = register_verb(CMD_ITEM_COMBINE)
+VERB_TRAVEL = register_verb(CMD_TRAVEL)
+
+
+class _TrieNode():
+    __slots__ = ('children', 'count', 'size')
+
+    def __init__(self):
+        self.children = dict()  # character -> _TrieNode
+        self.count = 0  # times the word ending here was added
+        self.size = 0  # distinct words in this subtree
+
+
+class CommandTrie():
+    """ A prefix tree of command strings.
+
+    Lookups cost time proportional to the looked up string (and to the
+    amount of words answered), not to the amount of words stored. Words
+    are counted, so the same command may be added (and discarded) once
+    for every event using it.
+    """
+
+    __slots__ = ('__root',)
+
+    def __init__(self, words=()):
+        self.__root = _TrieNode()
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self.__root.size
+
+    def __contains__(self, word):
+        node = self.__find(word)
+        return node is not None and node.count > 0
+
+    def add(self, word):
+        """ Adds (one more occurrence of) given word to the receiver. """
+        path = [self.__root]
+        for character in word:
+            node = path[-1].children.get(character)
+            if node is None:
+                node = path[-1].children[character] = _TrieNode()
+            path.append(node)
+        if not path[-1].count:
+            for node in path:
+                node.size += 1
+        path[-1].count += 1
+
+    def discard(self, word):
+        """ Removes an occurrence of given word, if present. """
+        path = [self.__root]
+        for character in word:
+            node = path[-1].children.get(character)
+            if node is None:
+                return
+            path.append(node)
+        if not path[-1].count:
+            return
+        path[-1].count -= 1
+        if path[-1].count:
+            return
+        for node in path:
+            node.size -= 1
+        # prunes the branch no other word uses:
+        for depth in range(len(word), 0, -1):
+            if path[depth].size:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+
+    def complete(self, prefix, limit=None, separator=None):
+        """ Returns a list containing the words starting with prefix, at
+        most limit of them.
+
+        Args:
+            prefix: a string.
+            limit: maximum amount of words answered.
+            separator: when given, words adding a separator character to
+                prefix are skipped, so 'lo' completes 'look' but not
+                'look lamp' when separator is ' '.
+        """
+        found = []
+        node = self.__find(prefix)
+        if node is not None:
+            self.__collect(node, prefix, found, limit, separator)
+        return found
+
+    def close_matches(self, word, max_distance=1, limit=None):
+        """ Returns a list containing the words at most max_distance edits
+        (character insertions, deletions, substitutions or transpositions
+        of adjacent characters) away from given word, at most limit of
+        them.
+
+        The receiver is walked along word, only branching off at the
+        (at most max_distance) edited characters.
+        """
+        found = dict()  # words may be reached through different edits
+        self.__match(self.__root, word, 0, '', max_distance, found, limit)
+        return list(found)
+
+    def __find(self, prefix):
+        node = self.__root
+        for character in prefix:
+            node = node.children.get(character)
+            if node is None:
+                return None
+        return node
+
+    def __match(self, node, word, i, prefix, edits, found, limit):
+        if limit is not None and len(found) >= limit:
+            return
+        if i == len(word):
+            if node.count:
+                found[prefix] = None
+        else:
+            child = node.children.get(word[i])
+            if child is not None:
+                self.__match(child, word, i + 1, prefix + word[i], edits, found, limit)
+        if not edits:
+            return
+        edits -= 1
+        if i < len(word):  # deletion
+            self.__match(node, word, i + 1, prefix, edits, found, limit)
+        for character, child in node.children.items():
+            # insertion, substitution:
+            self.__match(child, word, i, prefix + character, edits, found, limit)
+            if i < len(word) and character != word[i]:
+                self.__match(child, word, i + 1, prefix + character, edits, found, limit)
+        if i + 1 < len(word) and word[i] != word[i + 1]:  # transposition
+            child = node.children.get(word[i + 1])
+            child = child.children.get(word[i]) if child is not None else None
+            if child is not None:
+                self.__match(child, word, i + 2, prefix + word[i + 1] + word[i], edits, found, limit)
+
+    def __collect(self, node, prefix, found, limit, separator):
+        if node.count:
+            found.append(prefix)
+        for character, child in node.children.items():
+            if limit is not None and len(found) >= limit:
+                return
+            if character != separator:
+                self.__collect(child, prefix + character, found, limit, separator)
+
 
 def simple_map(verbs, sust, connector=DEFAULT_CONNECTOR):
     expression = []
@@ -0,0 +1,302 @@
+"""
+pysud validate module.
+
+Checks a world for broken content before anyone plays it:
+
+    duplicate_id        (error) many rooms share an id, only one of them
+                        can be reached by it.
+    dangling_transition (error) a transition leads to a room id no room
+                        has.
+    invalid_record      (error) a room lacks its id, name or description.
+    command_conflict    (error) a command triggers many events of a room
+                        (all of them fire, see pysud.Game.run_turn).
+    global_conflict     (warning) a room command also triggers a global
+                        event ('look', 'save'...).
+    unreachable         (warning) a room can't be reached from the start
+                        room.
+
+The world is loaded once; room checks are then split into shards played
+by a process pool, so big worlds are checked on every core.
+
+Usage:
+    python3 pysud_validate.py [-j JOBS] [--json] [--strict] WORLD
+
+WORLD is a rooms source file (rooms.json, rooms.jsonl, rooms.xml), a
+world store (.db, see pysud_store) or a game script (a python file
+defining make_world() or make_game(), see pysud_server). The exit code is
+0 for a valid world, 1 if errors were found (warnings too with --strict)
+and 2 if the world could not be loaded.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as etree
+
+# rooms source parsers:
+SRC_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SRC_PATH, 'modules', 'json'))
+sys.path.insert(0, os.path.join(SRC_PATH, 'modules', 'xml'))
+
+import pysud
+import pysud_events as ev
+import pysud_output
+import pysud_route
+import pysud_str
+
+# Rooms checked by each worker task:
+SHARD_SIZE = 5000
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# pysud.Game options games are created with (see pysud_runner):
+GAME_OPTIONS = {'tts_enabled': False, 'output': pysud_output.NullOutput()}
+
+# Loaded world used by the worker processes, see validate():
+_world = None
+
+
+class LoadedWorld():
+    """ What the checks need to know about a world.
+
+    Attributes:
+        rooms: A python list holding a (room id, transitions, events)
+            tuple per room, in order. transitions is a tuple of
+            (destination id, commands) pairs, events a tuple of (event
+            description, commands) pairs for the other command events.
+        start_room_id: Id of the room games start at.
+        global_events: pysud_events.EventIndex holding the global events
+            of a new game.
+        issues: Issues found while loading (see issue()).
+    """
+
+    def __init__(self):
+        self.rooms = []
+        self.start_room_id = None
+        self.global_events = ev.EventIndex()
+        self.issues = []
+        self.__room_ids = None
+
+    def add_records(self, records):
+        """ Adds rooms.json like records (see pysud_store.build_store). """
+        for position, record in enumerate(records):
+            room_id = record.get('id')
+            for field in ('id', 'name', 'description'):
+                if record.get(field) is None:
+                    self.issues.append(issue('invalid_record', ERROR, room_id,
+                                             'room #' + str(position) + ' has no ' + field))
+            transitions = []
+            for transition in record.get('transitions', ()):
+                commands = transition.get('commands') or ()
+                if not commands or None in commands:
+                    self.issues.append(issue('invalid_record', ERROR, room_id, 'transition to '
+                                             + repr(transition.get('destination')) + ' has an empty command'))
+                commands = tuple(pysud_str.normalize_command(c) for c in commands if c is not None)
+                transitions.append((transition.get('destination'), commands))
+            self.rooms.append((room_id, tuple(transitions), ()))
+
+    def add_room(self, room):
+        """ Adds an in memory pysud.Room. """
+        transitions = []
+        events = []
+        for event in room.get_local_events():
+            if isinstance(event, ev.TransitionEvent):
+                transitions.append((event.get_destination_id(), event.commands))
+            elif isinstance(event, ev.ActionEvent) and event.verb is not None:
+                events.append((type(event).__name__, tuple(' '.join(a) for a in event.get_actions())))
+            elif isinstance(event, ev.CommandEvent):
+                events.append((type(event).__name__, event.commands))
+        self.rooms.append((room.get_id(), tuple(transitions), tuple(events)))
+
+    def get_room_ids(self):
+        """ Answers a set holding every room id. """
+        if self.__room_ids is None:
+            self.__room_ids = {room_id for room_id, transitions, events in self.rooms}
+        return self.__room_ids
+
+
+def issue(check, severity, room_id, message):
+    """ Answers an issue as a python dictionary (JSON ready). """
+    return {'check': check, 'severity': severity, 'room': room_id, 'message': message}
+
+
+class LoadError(Exception):
+    """ Raised when a world can't be loaded. """
+
+
+def load_world(world_path):
+    """ Loads a world from a rooms source file, world store or game script.
+
+    Returns:
+        A LoadedWorld object.
+    Raises:
+        LoadError: if the world file is missing or can't be read.
+    """
+    try:
+        return _load_world(world_path)
+    except (OSError, ValueError, KeyError, SyntaxError, sqlite3.Error, etree.ParseError) as e:
+        raise LoadError(repr(e)) from e
+
+
+def _load_world(world_path):
+    world = LoadedWorld()
+    if world_path.endswith('.py'):
+        import pysud_server
+        game = pysud_server.load_game_factory(world_path)('Validator', **GAME_OPTIONS)
+        for room in game.rooms:
+            world.add_room(room)
+        start_room = game.pc.current_room
+        if start_room is None and game.rooms:
+            start_room = game.rooms[0]
+        world.start_room_id = start_room.get_id() if start_room is not None else None
+    else:
+        game = pysud.Game('Validator', **GAME_OPTIONS)
+        if world_path.endswith('.db'):
+            import pysud_store
+            store = pysud_store.WorldStore(world_path)
+            try:
+                world.add_records(store.iter_room_records())
+                world.start_room_id = store.get_meta('start_room_id')
+            finally:
+                store.close()
+        elif world_path.endswith('.xml'):
+            import pysud_xml
+            world.add_records(pysud_xml.RoomsXMLParser(world_path).iter_room_records())
+        else:
+            import pysud_rooms_json_parser
+            with open(world_path, 'r', encoding='utf-8') as rooms_file:
+                world.add_records(pysud_rooms_json_parser.iter_room_records(rooms_file))
+        if world.start_room_id is None and world.rooms:
+            world.start_room_id = world.rooms[0][0]
+    for event in game.get_global_events():
+        world.global_events.add(event)
+    return world
+
+
+def check_rooms(world, start, end):
+    """ Checks the transitions and commands of a range of rooms.
+
+    Args:
+        world: A LoadedWorld object.
+        start: Position of the first room to check.
+        end: Position after the last room to check.
+    Returns:
+        A python list of issues.
+    """
+    issues = []
+    room_ids = world.get_room_ids()
+    for room_id, transitions, events in world.rooms[start:end]:
+        triggered = collections.defaultdict(list)  # command -> event descriptions
+        for destination_id, commands in transitions:
+            if destination_id not in room_ids:
+                issues.append(issue('dangling_transition', ERROR, room_id,
+                                    'transition to unknown room ' + repr(destination_id)))
+            for command in dict.fromkeys(commands):
+                triggered[command].append('transition to ' + repr(destination_id))
+        for description, commands in events:
+            for command in dict.fromkeys(commands):
+                triggered[command].append(description)
+        for command, descriptions in triggered.items():
+            if len(descriptions) > 1:
+                issues.append(issue('command_conflict', ERROR, room_id, repr(command) + ' triggers '
+                                    + str(len(descriptions)) + ' events: ' + ', '.join(descriptions)))
+            shadowed = world.global_events.candidates(command)
+            if shadowed:
+                issues.append(issue('global_conflict', WARNING, room_id, repr(command) + ' also triggers '
+                                    + ', '.join(type(e).__name__ for e in shadowed)))
+    return issues
+
+
+def _init_worker(world_path):
+    global _world
+    # forked workers already got the world loaded by validate():
+    if _world is None:
+        _world = load_world(world_path)
+
+
+def _check_shard(start, end):
+    return check_rooms(_world, start, end)
+
+
+def validate(world_path, jobs=None):
+    """ Runs every check on a world.
+
+    Args:
+        world_path: see load_world().
+        jobs: Amount of worker processes, os.cpu_count() by default.
+            Worlds up to SHARD_SIZE rooms are checked in this process.
+    Returns:
+        A python dictionary (JSON ready) holding the world path, its
+        amount of rooms, start room id, the amount of errors and
+        warnings, the issues found (see issue()) and the seconds taken.
+    """
+    global _world
+    started = time.perf_counter()
+    _world = world = load_world(world_path)
+    issues = list(world.issues)
+    counts = collections.Counter(room_id for room_id, transitions, events in world.rooms)
+    for room_id, amount in counts.items():
+        if amount > 1 and room_id is not None:
+            issues.append(issue('duplicate_id', ERROR, room_id, str(amount) + ' rooms share this id'))
+    shards = [(start, min(start + SHARD_SIZE, len(world.rooms))) for start in range(0, len(world.rooms), SHARD_SIZE)]
+    jobs = min(jobs or os.cpu_count() or 1, len(shards))
+    if jobs > 1:
+        world.get_room_ids()  # computed once, before forking
+        with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(world_path,)) as pool:
+            for shard_issues in pool.map(_check_shard, *zip(*shards)):
+                issues.extend(shard_issues)
+    else:
+        for start, end in shards:
+            issues.extend(check_rooms(world, start, end))
+    if world.start_room_id is not None:
+        routes = pysud_route.RoutingIndex((room_id, destination_id)
+                                          for room_id, transitions, events in world.rooms
+                                          for destination_id, commands in transitions)
+        reachable = routes.reachable(world.start_room_id)
+        for room_id in counts:
+            if room_id not in reachable:
+                issues.append(issue('unreachable', WARNING, room_id, 'not reachable from the start room'))
+    return {
+        'world': world_path,
+        'rooms': len(world.rooms),
+        'start_room': world.start_room_id,
+        'errors': sum(1 for i in issues if i['severity'] == ERROR),
+        'warnings': sum(1 for i in issues if i['severity'] == WARNING),
+        'issues': issues,
+        'seconds': time.perf_counter() - started}
+
+
+def report(result):
+    """ Answers a human readable summary of a validate() result. """
+    lines = []
+    for found in result['issues']:
+        lines.append(format(found['severity'], '<8s') + format(found['check'], '<20s')
+                     + str(found['room']) + ': ' + found['message'])
+    lines.append(result['world'] + ': ' + str(result['rooms']) + ' rooms, ' + str(result['errors']) + ' errors, '
+                 + str(result['warnings']) + ' warnings (' + format(result['seconds'], '.2f') + ' s)')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Checks a pysud world for broken content.')
+    PARSER.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    PARSER.add_argument('--json', action='store_true', help='print the report as JSON')
+    PARSER.add_argument('--strict', action='store_true', help='fail on warnings too')
+    PARSER.add_argument('world')
+    ARGS = PARSER.parse_args()
+    try:
+        RESULT = validate(ARGS.world, ARGS.jobs)
+    except LoadError as e:
+        if ARGS.json:
+            print(json.dumps({'world': ARGS.world, 'load_error': str(e)}, indent=2))
+        else:
+            print(ARGS.world + ': could not be loaded (' + str(e) + ')', file=sys.stderr)
+        sys.exit(2)
+    print(json.dumps(RESULT, indent=2) if ARGS.json else report(RESULT))
+    sys.exit(1 if RESULT['errors'] or (ARGS.strict and RESULT['warnings']) else 0)
@@ -0,0 +1,39 @@
+"""
+pytest configuration: puts the pysud modules on the import path and
+provides small worlds to play on.
+"""
+
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+for path in (SRC_PATH, os.path.join(SRC_PATH, 'modules', 'json'), os.path.join(SRC_PATH, 'modules', 'xml')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest
+import pysud
+import pysud_output
+
+
+def new_game(world, **game_options):
+    """ Answers a new headless game on a given world, capturing its
+    output (see pysud_output.CaptureOutput). """
+    game_options.setdefault('output', pysud_output.CaptureOutput())
+    return world.new_game('Tester', **game_options)
+
+
+@pytest.fixture
+def world():
+    """ A hall leading north to a kitchen, which leads east to a
+    cellar and back south to the hall. The cellar leads back west to the
+    kitchen. A lamp lies in the hall. """
+    hall = pysud.Room('Hall', 'A hall.', 'hall')
+    kitchen = pysud.Room('Kitchen', 'A kitchen.', 'kitchen')
+    cellar = pysud.Room('Cellar', 'A cellar.', 'cellar')
+    hall.add_transition(['go north'], kitchen)
+    kitchen.add_transition(['go south'], hall)
+    kitchen.add_transition(['go east'], cellar)
+    cellar.add_transition(['go west'], kitchen)
+    hall.add_item(pysud.Item('lamp', 'An old lamp.'))
+    return pysud.World([hall, kitchen, cellar])
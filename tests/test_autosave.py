@@ -0,0 +1,41 @@
+import pysud_gm
+from conftest import new_game
+
+
+def test_autosave_writes_a_loadable_save(world, tmp_path):
+    game = new_game(world)
+    game_mgr = pysud_gm.GameManager(game)
+    filename = str(tmp_path / 'autosave.data')
+    game_mgr.start_autosave(filename, every_turns=2)
+    game.run_turn('get lamp')
+    game.run_turn('go north')
+    assert game_mgr.autosaver.wait_until_done(5)
+    assert game_mgr.autosaver.saves == 1
+    game_mgr.load_game_data(filename)
+    assert game.pc.current_room.get_id() == 'kitchen'
+    assert [i.get_name() for i in game.pc.get_items()] == ['lamp']
+
+
+def test_autosave_snapshot_is_not_changed_by_further_play(world, tmp_path):
+    game = new_game(world)
+    game_mgr = pysud_gm.GameManager(game)
+    filename = str(tmp_path / 'autosave.data')
+    game_mgr.start_autosave(filename, every_turns=None)
+    notes = ['first']
+    game.set_user_defined_variable('notes', notes)
+    game_mgr.autosaver.save()
+    notes.append('second')  # the game goes on before the save is written
+    assert game_mgr.autosaver.wait_until_done(5)
+    game_mgr.load_game_data(filename)
+    assert game.get_user_defined_variable('notes') == ['first']
+
+
+def test_unpicklable_state_is_reported(world, tmp_path, capsys):
+    game = new_game(world)
+    game_mgr = pysud_gm.GameManager(game)
+    game_mgr.start_autosave(str(tmp_path / 'autosave.data'), every_turns=None)
+    game.set_user_defined_variable('callback', lambda: None)
+    game_mgr.autosaver.save()
+    assert game_mgr.autosaver.wait_until_done(5)
+    assert game_mgr.autosaver.saves == 0
+    assert 'autosave failed' in capsys.readouterr().err
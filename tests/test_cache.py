@@ -0,0 +1,51 @@
+import os
+import shutil
+import pysud_cache
+
+ROOMS_JSON = os.path.join(pysud_cache.__file__.rsplit(os.sep, 1)[0], 'modules', 'json', 'rooms.json')
+
+
+def describe(rooms):
+    """ Answers what a world source defines of some rooms. """
+    return [(r.get_id(), r.get_name(), r.get_description(),
+             [(t.commands, t.destination.get_id()) for t in r.get_transitions()]) for r in rooms]
+
+
+def test_cached_rooms_match_the_source(tmp_path):
+    source = str(tmp_path / 'rooms.json')
+    shutil.copy(ROOMS_JSON, source)
+    compiler = pysud_cache.WorldCompiler(source)
+    parsed = compiler.load()
+    assert not compiler.from_cache
+    cached = compiler.load()
+    assert compiler.from_cache
+    assert describe(cached) == describe(parsed)
+    assert all(t.destination in cached for r in cached for t in r.get_transitions())
+
+
+def test_touched_source_keeps_its_cache(tmp_path):
+    source = str(tmp_path / 'rooms.json')
+    shutil.copy(ROOMS_JSON, source)
+    compiler = pysud_cache.WorldCompiler(source)
+    compiler.load()
+    os.utime(source, ns=(1, 1))
+    compiler.load()
+    assert compiler.from_cache
+
+
+def test_source_changed_while_compiling_is_compiled_again(tmp_path):
+    source = str(tmp_path / 'rooms.json')
+    shutil.copy(ROOMS_JSON, source)
+
+    def parse_then_change(path):
+        rooms = pysud_cache.parse_source(path)
+        with open(path, 'a', encoding='utf-8') as source_file:
+            source_file.write('\n')
+        return rooms
+    compiler = pysud_cache.WorldCompiler(source, parser=parse_then_change)
+    compiler.load()
+    compiler.parser = pysud_cache.parse_source
+    compiler.load()
+    assert not compiler.from_cache
+    compiler.load()
+    assert compiler.from_cache
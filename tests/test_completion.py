@@ -0,0 +1,36 @@
+from conftest import new_game
+
+
+def test_prefix_is_suggested_not_run(world):
+    game = new_game(world, command_completion=True)
+    game.run_turn('go n')
+    assert game.pc.current_room.get_id() == 'hall'
+    assert game.iom.output.messages[-1] == "Did you mean 'go north'?"
+
+
+def test_typo_is_suggested(world):
+    game = new_game(world, command_completion=True)
+    game.run_turn('get lmap')
+    assert not game.pc.get_items()
+    assert game.iom.output.messages[-1] == "Did you mean 'get lamp'?"
+
+
+def test_system_commands_are_never_suggested(world):
+    game = new_game(world, command_completion=True)
+    for command in ('quiet', 'exot', 'sav', 'lad', 'loa'):
+        game.run_turn(command)
+        assert game.iom.output.messages[-1] == 'Invalid input'
+    assert game.is_running()
+
+
+def test_removed_events_are_not_suggested(world):
+    game = new_game(world, command_completion=True)
+    game.run_turn('get lamp')
+    game.run_turn('get lam')
+    assert game.iom.output.messages[-1] == 'Invalid input'
+
+
+def test_disabled_by_default(world):
+    game = new_game(world)
+    game.run_turn('loo')
+    assert game.iom.output.messages[-1] == 'Invalid input'
@@ -0,0 +1,139 @@
+import pickle
+import pysud
+import pysud_events as ev
+import pysud_str as ps
+from conftest import new_game
+
+
+def test_candidates_are_the_events_of_the_command():
+    index = ev.EventIndex()
+    north = ev.ShowMessageEvent(['go north', 'n'], 'north')
+    south = ev.ShowMessageEvent(['go south'], 'south')
+    also_north = ev.ShowMessageEvent(['n'], 'also north')
+    for event in (north, south, also_north):
+        index.add(event)
+    assert index.candidates('n') == (north, also_north)
+    assert index.candidates('go south') == (south,)
+    assert index.candidates('go west') == ()
+
+
+def test_candidates_keep_insertion_order():
+    index = ev.EventIndex()
+    polled = ev.Event()
+    message = ev.ShowMessageEvent(['look lamp'], 'a message')
+    item = pysud.Item('lamp', 'An old lamp.')
+    look = item.look_item_event()
+    for event in (message, polled, look):
+        index.add(event)
+    assert index.candidates('look lamp') == (message, polled, look)
+    assert index.candidates('examine lamp') == (polled, look)
+
+
+def test_action_events_match_objects_in_any_order():
+    index = ev.EventIndex()
+    a, b = pysud.Item('rope', ''), pysud.Item('hook', '')
+    combine = ev.CombineItemEvent(a, b, pysud.Item('grapple', ''))
+    index.add(combine)
+    assert index.candidates('combine rope hook') == (combine,)
+    assert index.candidates('combine hook rope') == (combine,)
+    assert index.candidates('combine rope') == ()
+
+
+class Shout(ev.CommandEvent):
+    """ Occurs on any input said out loud. """
+
+    __slots__ = ()
+
+    def check_conditions(self, game):
+        return game.iom.last_user_input.endswith('!')
+
+
+def test_events_with_own_conditions_are_always_candidates(world):
+    index = ev.EventIndex()
+    shout = Shout(['shout'])
+    wave = ev.ShowMessageEvent(['wave'], 'wave')
+    index.add(shout)
+    index.add(wave)
+    assert index.candidates('hello!') == (shout,)
+    assert index.candidates('wave') == (shout, wave)
+    assert 'shout' in index.vocabulary()
+    index.remove(shout)
+    assert index.candidates('hello!') == ()
+    assert 'shout' not in index.vocabulary()
+
+
+def test_events_with_own_conditions_occur(world):
+    messages = []
+
+    class Echo(Shout):
+        __slots__ = ()
+
+        def on_success(self, game):
+            messages.append(game.iom.last_user_input)
+    world.get_room_by_id('hall').add_local_event(Echo(['shout']))
+    game = new_game(world)
+    game.run_turn('hello!')
+    assert messages == ['hello!']
+
+
+def test_removed_events_are_no_candidates():
+    index = ev.EventIndex()
+    first = ev.ShowMessageEvent(['wave'], 'first')
+    second = ev.ShowMessageEvent(['wave'], 'second')
+    index.add(first)
+    index.add(second)
+    index.remove(first)
+    assert index.candidates('wave') == (second,)
+    assert first not in index and len(index) == 1
+    try:
+        index.remove(first)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('removed twice')
+
+
+def test_index_pickles_its_events_in_order():
+    index = ev.EventIndex()
+    events = [ev.ShowMessageEvent(['wave'], 'first'), ev.ScoreEvent(3), ev.ShowMessageEvent(['wave'], 'second')]
+    for event in events:
+        index.add(event)
+    copy = pickle.loads(pickle.dumps(index))
+    assert [type(e) for e in copy.events()] == [type(e) for e in events]
+    assert [e.message for e in copy.candidates('wave')] == ['first', 'second']
+    assert copy.reactions(0, 3) == (copy.events()[1],)
+
+
+def test_score_reactions():
+    index = ev.EventIndex()
+    low, high = ev.ScoreEvent(2), ev.ScoreEvent(5)
+    index.add(high)
+    index.add(low)
+    assert index.reactions(0, 1) == ()
+    assert index.reactions(1, 2) == (low,)
+    assert index.reactions(0, 9) == (high, low)
+    assert index.reactions(5, 9) == ()
+    assert index.reactions(None, 3) == (low,)
+
+
+def test_vocabulary_follows_the_index():
+    index = ev.EventIndex()
+    event = ev.ShowMessageEvent(['wave hand'], 'hi')
+    index.add(event)
+    vocabulary = index.vocabulary()
+    assert 'wave hand' in vocabulary
+    index.remove(event)
+    assert 'wave hand' not in vocabulary
+
+
+def test_command_trie():
+    trie = ps.CommandTrie(['look', 'look lamp', 'lock door', 'look'])
+    assert len(trie) == 3
+    assert sorted(trie.complete('lo')) == ['lock door', 'look', 'look lamp']
+    assert trie.complete('lo', separator=' ') == ['look']
+    assert trie.close_matches('lokk') == ['look']
+    assert trie.close_matches('olok') == ['look']  # transposition
+    trie.discard('look')
+    assert 'look' in trie  # added twice
+    trie.discard('look')
+    assert 'look' not in trie and 'look lamp' in trie
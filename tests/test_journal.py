@@ -0,0 +1,66 @@
+import os
+import pysud_gm
+import pysud_journal
+from conftest import new_game
+
+
+def start(world, filename, **journal_options):
+    game_mgr = pysud_gm.GameManager(new_game(world), filename)
+    recovered = game_mgr.start_journal(**journal_options)
+    return game_mgr, recovered
+
+
+def test_crashed_session_is_recovered(world, tmp_path):
+    filename = str(tmp_path / 'journal.data')
+    game_mgr, recovered = start(world, filename)
+    assert not recovered
+    for command in ('get lamp', 'look', 'go north', 'go east'):
+        game_mgr.game.run_turn(command)
+    assert [c for s, c in pysud_journal.read_commands(filename)] == ['get lamp', 'go north', 'go east']
+    # the process dies here, a new one starts:
+    game_mgr, recovered = start(world, filename)
+    assert recovered
+    game = game_mgr.game
+    assert game.pc.current_room.get_id() == 'cellar'
+    assert [i.get_name() for i in game.pc.get_items()] == ['lamp']
+    game.run_turn('go west')
+    game_mgr, recovered = start(world, filename)
+    assert game_mgr.game.pc.current_room.get_id() == 'kitchen'
+
+
+def test_recovery_from_snapshot_and_journal(world, tmp_path):
+    filename = str(tmp_path / 'journal.data')
+    game_mgr, _ = start(world, filename, snapshot_every=2)
+    for command in ('get lamp', 'go north', 'go east'):
+        game_mgr.game.run_turn(command)
+    assert os.path.exists(filename + pysud_journal.SNAPSHOT_SUFFIX)
+    assert [c for s, c in pysud_journal.read_commands(filename)] == ['go east']
+    game_mgr, recovered = start(world, filename)
+    assert recovered
+    assert game_mgr.game.pc.current_room.get_id() == 'cellar'
+    assert len(game_mgr.game.pc.get_items()) == 1
+
+
+def test_torn_last_line_is_ignored(world, tmp_path):
+    filename = str(tmp_path / 'journal.data')
+    game_mgr, _ = start(world, filename)
+    game_mgr.game.run_turn('go north')
+    with open(filename, 'a', encoding='utf-8') as journal_file:
+        journal_file.write('[2, "go ea')
+    game_mgr, recovered = start(world, filename)
+    assert recovered
+    assert game_mgr.game.pc.current_room.get_id() == 'kitchen'
+    game_mgr.game.run_turn('go east')
+    game_mgr, _ = start(world, filename)
+    assert game_mgr.game.pc.current_room.get_id() == 'cellar'
+
+
+def test_ended_session_leaves_nothing_to_recover(world, tmp_path):
+    filename = str(tmp_path / 'journal.data')
+    game_mgr, _ = start(world, filename)
+    game_mgr.game.run_turn('go north')
+    game_mgr.game.run_turn('quit')
+    assert not os.path.exists(filename)
+    game_mgr, recovered = start(world, filename)
+    assert not recovered
+    assert game_mgr.game.pc.current_room.get_id() == 'hall'
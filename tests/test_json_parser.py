@@ -0,0 +1,30 @@
+import io
+import pytest
+import pysud_rooms_json_parser
+
+ROOMS = ('[{"id": "1", "name": "Brace }", "description": "A \\"}\\" sign.", "transitions": []},\n'
+         ' {"id": "2", "name": "Two", "description": "", "transitions": '
+         '[{"destination": "1", "commands": ["north"]}]}]')
+
+
+def read(text, chunk_size, **options):
+    rooms_file = io.StringIO(text)
+    return [r['id'] for r in pysud_rooms_json_parser.iter_room_records(rooms_file, chunk_size, **options)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+def test_records_split_between_chunks(chunk_size):
+    assert read(ROOMS, chunk_size) == ['1', '2']
+    assert read(ROOMS[1:-1].replace(',\n', '\n'), chunk_size) == ['1', '2']  # json lines
+
+
+def test_malformed_record_fails_once_complete():
+    text = '{"id": "1"}\n{"id": "2",, "name": "Two"}\n' + '{"id": "3"}\n' * 1000
+    with pytest.raises(ValueError, match='offset 12'):
+        read(text, 4)
+
+
+def test_unterminated_record_fails_at_the_size_limit():
+    text = '{"id": "1"}\n{"id": "' + 'x' * 10000
+    with pytest.raises(ValueError, match='offset 12 exceeds 100 characters'):
+        read(text, 16, max_record_size=100)
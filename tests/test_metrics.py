@@ -0,0 +1,38 @@
+import threading
+import pysud_metrics
+from conftest import new_game
+
+
+def test_sessions_are_counted(world):
+    metrics = pysud_metrics.GameMetrics()
+    games = [new_game(world) for i in range(3)]
+    for game in games:
+        metrics.attach(game)
+    metrics.detach(games[0])
+    assert metrics.sessions_amount() == 2
+    assert set(metrics.games()) == set(games[1:])
+    assert 'pysud_sessions_active 2' in metrics.registry.exposition()
+
+
+def test_scraping_while_games_come_and_go(world):
+    metrics = pysud_metrics.GameMetrics()
+    games = [new_game(world) for i in range(50)]
+    errors = []
+
+    def scrape():
+        try:
+            for i in range(200):
+                metrics.sessions_amount()
+                metrics.journal_lag()
+        except Exception as e:
+            errors.append(e)
+
+    scraper = threading.Thread(target=scrape)
+    scraper.start()
+    for i in range(20):
+        for game in games:
+            metrics.attach(game)
+        for game in games:
+            metrics.detach(game)
+    scraper.join()
+    assert errors == []
@@ -0,0 +1,16 @@
+from conftest import new_game
+
+
+def test_profile_command_only_while_profiling(world):
+    game = new_game(world)
+    output = game.iom.output
+    game.run_turn('profile')
+    assert output.messages[-1] == 'Invalid input'
+    game.enable_profiling()
+    game.run_turn('look')
+    game.run_turn('profile')
+    assert output.messages[-1] != 'Invalid input'
+    assert game.profiler.get_histogram('turn').count >= 1
+    game.disable_profiling()
+    game.run_turn('profile')
+    assert output.messages[-1] == 'Invalid input'
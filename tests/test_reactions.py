@@ -0,0 +1,144 @@
+import pysud_events as ev
+from conftest import new_game
+
+
+class CountedScore(ev.ScoreEvent):
+
+    __slots__ = ('count',)
+
+    def __init__(self, score_number):
+        ev.ScoreEvent.__init__(self, score_number)
+        self.count = 0
+
+    def on_success(self, game):
+        self.count += 1
+
+
+class CountedLocation(ev.LocationEvent):
+
+    __slots__ = ('count',)
+
+    def __init__(self, rooms):
+        ev.LocationEvent.__init__(self, rooms)
+        self.count = 0
+
+    def on_success(self, game):
+        self.count += 1
+
+
+class Scoring(ev.CommandEvent):
+
+    __slots__ = ('points',)
+
+    def __init__(self, commands, points):
+        ev.CommandEvent.__init__(self, commands)
+        self.points = points
+
+    def on_success(self, game):
+        game.pc.score += self.points
+
+
+class AddingEvent(ev.CommandEvent):
+
+    __slots__ = ('event',)
+
+    def __init__(self, commands, event):
+        ev.CommandEvent.__init__(self, commands)
+        self.event = event
+
+    def on_success(self, game):
+        game.add_global_event(self.event)
+
+
+class PolledScore(CountedScore):
+
+    __slots__ = ()
+
+    def check_conditions(self, game):
+        return game.pc.score >= self.score_trigger and game.pc.current_room.get_id() == 'kitchen'
+
+
+def test_location_event_on_entering_a_room(world):
+    game = new_game(world)
+    event = CountedLocation([world.get_room_by_id('kitchen')])
+    world.get_room_by_id('kitchen').add_local_event(event)
+    game.run_turn('go north')
+    assert event.count == 1
+    game.run_turn('look')
+    game.run_turn('go east')
+    assert event.count == 1  # staying or leaving doesn't trigger it
+
+
+def test_location_event_on_entering_a_room_again(world):
+    game = new_game(world)
+    event = CountedLocation([world.get_room_by_id('kitchen')])
+    game.add_global_event(event)
+    for command in ('go north', 'go south', 'go north', 'look'):
+        game.run_turn(command)
+    assert event.count == 2
+
+
+def test_score_event_on_crossing_its_threshold(world):
+    game = new_game(world)
+    event = CountedScore(5)
+    game.add_global_event(event)
+    game.add_global_event(Scoring(['win'], 3))
+    game.add_global_event(Scoring(['lose'], -3))
+    game.run_turn('win')
+    assert event.count == 0
+    game.run_turn('win')
+    assert event.count == 1
+    game.run_turn('win')  # already past the threshold
+    game.run_turn('look')
+    assert event.count == 1
+    game.run_turn('lose')
+    game.run_turn('lose')  # back under it
+    assert event.count == 1
+    game.run_turn('win')  # and past it again
+    assert event.count == 2
+
+
+def test_room_score_event_on_entering_its_room_past_the_threshold(world):
+    game = new_game(world)
+    event = CountedScore(1)
+    world.get_room_by_id('kitchen').add_local_event(event)
+    game.add_global_event(Scoring(['win'], 1))
+    game.run_turn('win')
+    assert event.count == 0
+    game.run_turn('go north')
+    assert event.count == 1
+
+
+def test_events_added_during_a_turn_are_checked_that_turn(world):
+    game = new_game(world)
+    location = CountedLocation([world.get_room_by_id('hall')])
+    score = CountedScore(0)
+    game.add_global_event(AddingEvent(['wait'], location))
+    game.add_global_event(AddingEvent(['rest'], score))
+    game.run_turn('wait')
+    game.run_turn('rest')
+    assert (location.count, score.count) == (1, 1)
+    game.run_turn('look')
+    assert (location.count, score.count) == (1, 1)
+
+
+def test_events_added_between_turns_are_checked_next_turn(world):
+    game = new_game(world)
+    event = CountedLocation([world.get_room_by_id('hall')])
+    game.add_global_event(event)
+    assert event.count == 0
+    game.run_turn('look')
+    game.run_turn('look')
+    assert event.count == 1
+
+
+def test_events_overriding_check_conditions_are_checked_every_turn(world):
+    game = new_game(world)
+    event = PolledScore(0)
+    game.add_global_event(event)
+    game.run_turn('look')
+    game.run_turn('go north')  # checked along with command events
+    assert event.count == 0
+    game.run_turn('look')
+    game.run_turn('look')
+    assert event.count == 2
@@ -0,0 +1,93 @@
+import pysud
+import pysud_route
+from conftest import new_game
+
+
+def test_route_and_distance():
+    routes = pysud_route.RoutingIndex([('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'c')])
+    assert routes.route('a', 'd') == ['c', 'd']
+    assert routes.distance('a', 'd') == 2
+    assert routes.route('d', 'a') is None
+    assert routes.distance('a', 'a') == 0
+    assert routes.next_hop('b', 'd') == 'c'
+    assert routes.reachable('b') == {'b', 'c', 'd'}
+
+
+def test_added_transitions_update_cached_routes():
+    routes = pysud_route.RoutingIndex([('a', 'b'), ('b', 'c'), ('c', 'd')])
+    assert routes.route('a', 'd') == ['b', 'c', 'd']
+    routes.add_transition('a', 'd')
+    assert routes.route('a', 'd') == ['d']
+    routes.add_transition('d', 'e')  # a new room
+    assert routes.route('a', 'e') == ['d', 'e']
+
+
+def test_removed_transitions_invalidate_cached_routes():
+    routes = pysud_route.RoutingIndex([('a', 'b'), ('b', 'c'), ('a', 'c')])
+    assert routes.route('a', 'c') == ['c']
+    routes.remove_transition('a', 'c')
+    assert routes.route('a', 'c') == ['b', 'c']
+    routes.remove_transition('b', 'c')
+    assert routes.route('a', 'c') is None
+    try:
+        routes.remove_transition('b', 'c')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('removed twice')
+
+
+def test_copies_are_independent():
+    routes = pysud_route.RoutingIndex([('a', 'b'), ('b', 'c')])
+    copy = routes.copy()
+    copy.add_transition('a', 'c')
+    copy.remove_transition('a', 'b')
+    assert routes.route('a', 'c') == ['b', 'c']
+    assert copy.route('a', 'c') == ['c']
+
+
+def test_nearest():
+    routes = pysud_route.RoutingIndex([('a', 'b'), ('b', 'c'), ('a', 'd'), ('d', 'e'), ('e', 'c')])
+    assert routes.nearest('a', {'c', 'e'}) == ('c', ['b', 'c'])
+    assert routes.nearest('a', {'e'}) == ('e', ['d', 'e'])
+    assert routes.nearest('a', {'a', 'c'}) == ('a', [])
+    assert routes.nearest('c', {'a'}) is None
+
+
+def test_game_routes_follow_game_transitions(world):
+    hall, cellar = world.get_room_by_id('hall'), world.get_room_by_id('cellar')
+    game, other = new_game(world), new_game(world)
+    assert game.get_routes().route('hall', 'cellar') == ['kitchen', 'cellar']
+    transition = game.add_transition(hall, ['go down'], cellar)
+    assert game.get_routes().route('hall', 'cellar') == ['cellar']
+    assert other.get_routes().route('hall', 'cellar') == ['kitchen', 'cellar']
+    game.remove_room_local_event(hall, transition)
+    assert game.get_routes().route('hall', 'cellar') == ['kitchen', 'cellar']
+    kitchen_exit = world.get_room_by_id('kitchen').get_transitions()[1]
+    game.remove_room_local_event(world.get_room_by_id('kitchen'), kitchen_exit)
+    assert game.get_routes().route('hall', 'cellar') is None
+    assert other.get_routes().route('hall', 'cellar') == ['kitchen', 'cellar']
+
+
+def test_routes_follow_room_transitions(world):
+    hall, cellar = world.get_room_by_id('hall'), world.get_room_by_id('cellar')
+    game = new_game(world)
+    assert game.get_routes().route('cellar', 'hall') == ['kitchen', 'hall']
+    world.add_transition(cellar, ['go up'], hall)
+    assert game.get_routes().route('cellar', 'hall') == ['hall']
+    attic = pysud.Room('Attic', 'An attic.', 'attic')
+    hall.add_transition(['go up'], attic)  # outside turns: every game
+    assert world.get_routes().route('cellar', 'attic') == ['hall', 'attic']
+    assert game.get_routes().route('cellar', 'attic') == ['hall', 'attic']
+    hall.remove_local_event(hall.get_transitions()[-1])
+    assert game.get_routes().route('cellar', 'attic') is None
+
+
+def test_routes_of_games_owning_rooms(world):
+    game = pysud.Game('Tester', tts_enabled=False)
+    game.add_rooms(world.rooms)
+    assert game.get_routes().route('hall', 'cellar') == ['kitchen', 'cellar']
+    attic = pysud.Room('Attic', 'An attic.', 'attic')
+    attic.add_transition(['go down'], world.get_room_by_id('cellar'))
+    game.add_rooms([attic])
+    assert game.get_routes().route('attic', 'hall') == ['cellar', 'kitchen', 'hall']
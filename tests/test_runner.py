@@ -0,0 +1,32 @@
+import pysud_events as ev
+import pysud_runner
+
+
+class Broken(ev.CommandEvent):
+
+    __slots__ = ()
+
+    def on_success(self, game):
+        raise ValueError('broken game script')
+
+
+def write_script(tmp_path, *commands):
+    script_path = tmp_path / 'script.txt'
+    script_path.write_text('# a comment\n' + '\n'.join(commands) + '\n', encoding='utf-8')
+    return str(script_path)
+
+
+def test_script_turns_are_counted(world, tmp_path):
+    result = pysud_runner.run_script(world.new_game, write_script(tmp_path, 'go north', 'go east'))
+    assert not result.failed()
+    assert result.turns == 2
+
+
+def test_turns_are_counted_up_to_a_failing_one(world, tmp_path):
+    world.get_room_by_id('kitchen').add_local_event(Broken(['break']))
+    script_path = write_script(tmp_path, 'go north', 'look', 'break', 'go east')
+    result = pysud_runner.run_script(world.new_game, script_path, keep_transcript=True)
+    assert result.failed()
+    assert 'ValueError: broken game script' in result.error
+    assert result.turns == 3
+    assert 'A kitchen.' in result.transcript
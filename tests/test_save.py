@@ -0,0 +1,107 @@
+import pysud
+import pysud_gm
+import pysud_store
+from conftest import new_game
+
+
+def play(game):
+    game.set_user_defined_variable('door', 'open')
+    game.run_turn('get lamp')
+    game.run_turn('go north')
+
+
+def check_restored(game):
+    assert game.pc.current_room.get_id() == 'kitchen'
+    assert {r.get_id() for r in game.pc.visited_rooms} == {'hall', 'kitchen'}
+    assert game.get_user_defined_variable('door') == 'open'
+
+
+def test_save_and_load_into_a_new_game(world, tmp_path):
+    filename = str(tmp_path / 'save.data')
+    game = new_game(world)
+    play(game)
+    pysud_gm.GameManager(game).save_game(filename)
+    assert pysud_gm.is_save_file(filename)
+    loaded = new_game(world)
+    assert pysud_gm.GameManager(loaded).load_game_data(filename)
+    check_restored(loaded)
+    lamp = world.get_room_by_id('hall').get_items()[0]
+    assert loaded.pc.get_items() == (lamp,)  # a reference to the world item
+    assert loaded.get_room_items(world.get_room_by_id('hall')) == ()
+    loaded.run_turn('go south')
+    loaded.run_turn('get lamp')
+    assert loaded.pc.get_items() == (lamp,)
+
+
+def test_save_and_load_game_owning_its_rooms(world, tmp_path):
+    filename = str(tmp_path / 'save.data')
+    game = new_game(world)
+    game.add_rooms([pysud.Room('Attic', 'An attic.', 'attic')])
+    play(game)
+    game_mgr = pysud_gm.GameManager(game)
+    game_mgr.save_game(filename)
+    game.run_turn('go south')
+    assert game_mgr.load_game_data(filename)
+    check_restored(game)
+
+
+def test_save_and_load_paged_world(world, tmp_path):
+    store_path = str(tmp_path / 'world.db')
+    filename = str(tmp_path / 'save.data')
+    pysud_store.build_store(pysud_store.room_records(world.rooms), store_path, variables={'door': 'closed'})
+    game = new_game(pysud_store.open_world(store_path))
+    assert game.get_user_defined_variable('door') == 'closed'
+    game.set_user_defined_variable('door', 'open')
+    game.run_turn('go north')
+    game.run_turn('go east')
+    pysud_gm.GameManager(game).save_game(filename)
+    paged = pysud_store.open_world(store_path)
+    loaded = new_game(paged)
+    pysud_gm.GameManager(loaded).load_game_data(filename)
+    assert loaded.pc.current_room is paged.get_room_by_id('cellar')
+    assert {r.get_id() for r in loaded.pc.visited_rooms} == {'hall', 'kitchen', 'cellar'}
+    assert loaded.get_user_defined_variable('door') == 'open'
+    loaded.run_turn('go west')
+    assert loaded.pc.current_room.get_id() == 'kitchen'
+
+
+def make_attic(paged):
+    attic = pysud.Room('Attic', 'An attic.', 'attic')
+    attic.add_transition(['go down'], paged.get_room_by_id('hall'))
+    return attic
+
+
+def test_save_and_load_rooms_added_to_paged_world(world, tmp_path):
+    store_path = str(tmp_path / 'world.db')
+    filename = str(tmp_path / 'save.data')
+    pysud_store.build_store(pysud_store.room_records(world.rooms), store_path)
+    paged = pysud_store.open_world(store_path)
+    game = new_game(paged)
+    attic = make_attic(paged)
+    game.add_rooms([attic])
+    assert isinstance(game.rooms, pysud.ExtendedRooms)
+    assert paged.store.materialized == 1  # the start room, no other was loaded
+    game.add_transition(game.pc.current_room, ['go up'], attic)
+    game.run_turn('go up')
+    pysud_gm.GameManager(game).save_game(filename)
+    paged = pysud_store.open_world(store_path)
+    loaded = new_game(paged)
+    loaded.add_rooms([make_attic(paged)])
+    pysud_gm.GameManager(loaded).load_game_data(filename)
+    assert loaded.pc.current_room.get_id() == 'attic'
+    assert loaded.pc.current_room is loaded.get_room_by_id('attic')
+    loaded.run_turn('go down')
+    loaded.run_turn('go up')  # the transition added by the game was restored
+    assert loaded.pc.current_room.get_id() == 'attic'
+
+
+def test_export_and_load_whole_game(world, tmp_path):
+    filename = str(tmp_path / 'game.data')
+    game = new_game(world)
+    play(game)
+    game_mgr = pysud_gm.GameManager(game)
+    game_mgr.export_game(filename)
+    assert not pysud_gm.is_save_file(filename)
+    assert not game_mgr.load_game_data(filename)
+    assert game_mgr.game is not game
+    check_restored(game_mgr.game)
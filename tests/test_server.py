@@ -0,0 +1,51 @@
+import asyncio
+import pysud_events as ev
+import pysud_server
+import pysud_str
+
+PROMPT = pysud_str.MSG_DICT['PROMPT_TEXT'].encode()
+
+
+class Broken(ev.CommandEvent):
+
+    __slots__ = ()
+
+    def on_success(self, game):
+        raise ValueError('broken game script')
+
+
+async def session(server, *lines):
+    """ Plays lines on a server, answering everything it sent back. """
+    listener = await asyncio.start_server(server.handle_session, '127.0.0.1', 0)
+    reader, writer = await asyncio.open_connection('127.0.0.1', listener.sockets[0].getsockname()[1])
+    try:
+        writer.write(b'Tester\n')
+        for line in lines:
+            writer.write(line + b'\n')
+        writer.write_eof()
+        return (await asyncio.wait_for(reader.read(), 10)).decode()
+    finally:
+        writer.close()
+        listener.close()
+
+
+def test_sessions_play_until_disconnected(world):
+    server = pysud_server.GameServer(world.new_game)
+    output = asyncio.run(session(server, b'go north', b'go east'))
+    assert 'A kitchen.' in output and 'A cellar.' in output
+    assert server.sessions == 0
+
+
+def test_game_script_errors_are_reported(world, capsys):
+    world.get_room_by_id('hall').add_local_event(Broken(['break']))
+    server = pysud_server.GameServer(world.new_game)
+    asyncio.run(session(server, b'break', b'go north'))
+    err = capsys.readouterr().err
+    assert 'ValueError: broken game script' in err
+
+
+def test_garbage_closes_the_session_quietly(world, capsys):
+    server = pysud_server.GameServer(world.new_game)
+    output = asyncio.run(session(server, b'x' * 100000, b'go north'))
+    assert 'A kitchen.' not in output
+    assert capsys.readouterr().err == ''
@@ -0,0 +1,84 @@
+import asyncio
+import pysud_shard
+import pysud_str
+
+GAME_SCRIPT = '''
+import pysud
+
+
+def make_world():
+    hall = pysud.Room('Hall', 'A hall.', 'hall')
+    kitchen = pysud.Room('Kitchen', 'A kitchen.', 'kitchen')
+    cellar = pysud.Room('Cellar', 'A cellar.', 'cellar')
+    hall.add_transition(['go north'], kitchen)
+    kitchen.add_transition(['go east'], cellar)
+    hall.add_item(pysud.Item('lamp', 'An old lamp.'))
+    return pysud.World([hall, kitchen, cellar])
+'''
+
+PROMPT = pysud_str.MSG_DICT['PROMPT_TEXT'].encode()
+
+
+async def read_until_prompt(reader):
+    data = b''
+    while not data.endswith(PROMPT):
+        chunk = await asyncio.wait_for(reader.read(4096), 10)
+        assert chunk, 'connection closed'
+        data += chunk
+    return data.decode()
+
+
+async def play_and_move(server):
+    listener = await asyncio.start_server(server.handle_session, '127.0.0.1', 0)
+    reader, writer = await asyncio.open_connection('127.0.0.1', listener.sockets[0].getsockname()[1])
+    try:
+        await asyncio.wait_for(reader.readuntil(b':'), 10)
+        writer.write(b'Tester\n')
+        await read_until_prompt(reader)
+        writer.write(b'get lamp\n')
+        await read_until_prompt(reader)
+        writer.write(b'go north\n')
+        assert 'A kitchen.' in await read_until_prompt(reader)
+        session, = server.shard_sessions
+        first_worker = session.worker
+        assert server.move(session, 1 - first_worker)
+        writer.write(b'go east\n')  # sent while moving
+        assert 'A cellar.' in await read_until_prompt(reader)
+        writer.write(pysud_str.CMD_SHOW_INVENTORY[0].encode() + b'\n')
+        assert 'lamp' in await read_until_prompt(reader)
+        assert session.worker == 1 - first_worker and session.moving_to is None
+        assert server.worker_loads()[session.worker] == 1
+    finally:
+        writer.close()
+        listener.close()
+
+
+def test_sessions_keep_playing_when_moved(tmp_path):
+    script = tmp_path / 'game.py'
+    script.write_text(GAME_SCRIPT, encoding='utf-8')
+    server = pysud_shard.ShardServer(str(script), 2, rebalance_seconds=None)
+    server.start_workers()
+    try:
+        asyncio.run(play_and_move(server))
+    finally:
+        server.stop_workers()
+
+
+class LocalShardServer(pysud_shard.ShardServer):
+    """ Records moves instead of sending them to workers. """
+
+    def move(self, session, index):
+        session.moving_to = index
+        return True
+
+
+def test_rebalance_moves_sessions_to_idle_workers():
+    server = LocalShardServer('game.py', 3, rebalance_seconds=None)
+    server.worker_ports = [0, 0, 0]
+    for name in 'abcde':
+        session = pysud_shard.ShardSession(name, None)
+        session.worker = 0
+        server.shard_sessions.add(session)
+    assert server.rebalance() == 3
+    assert sorted(server.worker_loads()) == [1, 2, 2]
+    assert server.rebalance() == 0  # sessions are still being moved
@@ -0,0 +1,88 @@
+import pysud
+import pysud_events as ev
+from conftest import new_game
+
+
+class LockedTransition(ev.TransitionEvent):
+
+    __slots__ = ()
+
+    def check_conditions(self, game):
+        return ev.TransitionEvent.check_conditions(self, game) and game.get_user_defined_variable('unlocked')
+
+
+class EnteredEvent(ev.LocationEvent):
+
+    __slots__ = ('entered',)
+
+    def __init__(self, rooms):
+        ev.LocationEvent.__init__(self, rooms)
+        self.entered = 0
+
+    def on_success(self, game):
+        self.entered += 1
+
+
+def test_travel_walks_to_a_visited_room(world):
+    game = new_game(world, travel_enabled=True)
+    game.run_turn('go north')
+    game.run_turn('go east')
+    game.run_turn('goto hall')
+    assert game.pc.current_room.get_id() == 'hall'
+    game.run_turn('goto cellar')
+    assert game.pc.current_room.get_id() == 'cellar'
+
+
+def test_travel_to_unknown_or_current_room(world):
+    game = new_game(world, travel_enabled=True)
+    game.run_turn('goto cellar')
+    assert game.pc.current_room.get_id() == 'hall'
+    assert game.iom.output.messages[-1] == "You don't know the way there"
+    game.run_turn('goto hall')
+    assert game.iom.output.messages[-1] == 'You are already there'
+
+
+def test_travel_stops_at_transitions_that_do_not_occur():
+    hall = pysud.Room('Hall', 'A hall.', 'hall')
+    corridor = pysud.Room('Corridor', 'A corridor.', 'corridor')
+    vault = pysud.Room('Vault', 'A vault.', 'vault')
+    hall.add_transition(['go north'], corridor)
+    corridor.add_transition(['go south'], hall)
+    corridor.add_local_event(LockedTransition(['go north'], vault))
+    vault.add_transition(['go south'], corridor)
+    game = new_game(pysud.World([hall, corridor, vault]), travel_enabled=True)
+    game.set_user_defined_variable('unlocked', True)
+    game.run_turn('go north')
+    game.run_turn('go north')
+    game.run_turn('go south')
+    game.run_turn('go south')
+    game.set_user_defined_variable('unlocked', False)
+    game.run_turn('goto vault')
+    assert game.pc.current_room.get_id() == 'corridor'
+    assert game.iom.output.messages[-1].endswith("You can't go any further that way")
+
+
+def test_travel_checks_location_events_on_the_way(world):
+    kitchen = world.get_room_by_id('kitchen')
+    cellar = world.get_room_by_id('cellar')
+    on_the_way = EnteredEvent([kitchen])
+    at_destination = EnteredEvent([cellar])
+    game = new_game(world, travel_enabled=True)
+    game.run_turn('go north')
+    game.run_turn('go east')
+    game.run_turn('goto hall')
+    game.add_global_event(on_the_way)
+    game.add_global_event(at_destination)
+    game.run_turn('look')  # added events are checked once
+    game.run_turn('goto cellar')
+    assert on_the_way.entered == 1
+    assert at_destination.entered == 1
+    assert game.pc.current_room is cellar
+
+
+def test_travel_is_disabled_by_default(world):
+    game = new_game(world)
+    game.run_turn('go north')
+    game.run_turn('goto hall')
+    assert game.pc.current_room.get_id() == 'kitchen'
+    assert game.iom.output.messages[-1] == 'Invalid input'
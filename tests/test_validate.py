@@ -0,0 +1,60 @@
+import json
+import pytest
+import pysud_validate
+
+
+def write_rooms(path, rooms):
+    with open(path, 'w', encoding='utf-8') as rooms_file:
+        for room in rooms:
+            rooms_file.write(json.dumps(room) + '\n')
+    return str(path)
+
+
+def room(room_id, *transitions):
+    return {'id': room_id, 'name': 'Room ' + room_id, 'description': '',
+            'transitions': [{'destination': d, 'commands': c} for d, c in transitions]}
+
+
+def checks(result):
+    return sorted((i['check'], i['room']) for i in result['issues'])
+
+
+def test_valid_world(tmp_path):
+    path = write_rooms(tmp_path / 'rooms.jsonl', [room('a', ('b', ['n'])), room('b', ('a', ['s']))])
+    result = pysud_validate.validate(path, 1)
+    assert (result['rooms'], result['errors'], result['warnings']) == (2, 0, 0)
+
+
+def test_broken_world(tmp_path):
+    path = write_rooms(tmp_path / 'rooms.jsonl', [
+        room('a', ('b', ['n']), ('c', ['n'])),
+        room('b', ('x', ['s']), ('a', ['look'])),
+        room('c'),
+        room('c'),
+        {'id': 'd', 'name': 'Room d'}])
+    result = pysud_validate.validate(path, 1)
+    assert checks(result) == [
+        ('command_conflict', 'a'),
+        ('dangling_transition', 'b'),
+        ('duplicate_id', 'c'),
+        ('global_conflict', 'b'),
+        ('invalid_record', 'd'),
+        ('unreachable', 'd')]
+    assert result['errors'] == 4
+
+
+def test_shards_checked_by_a_process_pool(tmp_path, monkeypatch):
+    rooms = [room(str(i), (str(i + 1), ['next'])) for i in range(9)] + [room('9', ('nowhere', ['next']))]
+    path = write_rooms(tmp_path / 'rooms.jsonl', rooms)
+    monkeypatch.setattr(pysud_validate, 'SHARD_SIZE', 3)
+    assert checks(pysud_validate.validate(path, 2)) == checks(pysud_validate.validate(path, 1))
+    assert checks(pysud_validate.validate(path, 2)) == [('dangling_transition', '9')]
+
+
+def test_load_errors(tmp_path):
+    with pytest.raises(pysud_validate.LoadError):
+        pysud_validate.validate(str(tmp_path / 'missing.json'), 1)
+    broken = tmp_path / 'rooms.json'
+    broken.write_text('[{"id": "a", ', encoding='utf-8')
+    with pytest.raises(pysud_validate.LoadError):
+        pysud_validate.validate(str(broken), 1)
@@ -0,0 +1,58 @@
+import pysud
+import pysud_events as ev
+from conftest import new_game
+
+
+class DropKey(ev.CommandEvent):
+
+    __slots__ = ()
+
+    def on_success(self, game):
+        game.pc.current_room.add_item(pysud.Item('key', 'A small key.'))
+
+
+def item_names(game):
+    return [i.get_name() for i in game.get_room_items(game.pc.current_room)]
+
+
+def test_games_share_world_rooms(world):
+    first, second = new_game(world), new_game(world)
+    first.run_turn('get lamp')
+    assert [i.get_name() for i in first.pc.get_items()] == ['lamp']
+    assert item_names(first) == []
+    assert item_names(second) == ['lamp']
+    second.run_turn('get lamp')
+    assert [i.get_name() for i in second.pc.get_items()] == ['lamp']
+
+
+def test_room_changes_during_a_turn_only_change_that_game(world):
+    hall = world.get_room_by_id('hall')
+    hall.add_local_event(DropKey(['shake lamp']))
+    first, second = new_game(world), new_game(world)
+    first.run_turn('shake lamp')
+    assert item_names(first) == ['lamp', 'key']
+    assert item_names(second) == ['lamp']
+    assert [i.get_name() for i in hall.get_items()] == ['lamp']
+    first.run_turn('get key')
+    assert [i.get_name() for i in first.pc.get_items()] == ['key']
+    second.run_turn('get key')
+    assert second.pc.get_items() == ()
+
+
+def test_transitions_added_during_a_turn_only_change_that_game(world):
+    cellar = world.get_room_by_id('cellar')
+
+    class DigTunnel(ev.CommandEvent):
+
+        __slots__ = ()
+
+        def on_success(self, game):
+            game.pc.current_room.add_transition(['go down'], cellar)
+
+    world.get_room_by_id('hall').add_local_event(DigTunnel(['dig']))
+    first, second = new_game(world), new_game(world)
+    first.run_turn('dig')
+    first.run_turn('go down')
+    second.run_turn('go down')
+    assert first.pc.current_room is cellar
+    assert second.pc.current_room.get_id() == 'hall'